@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""
+Micro-batched classification: throughput vs. added latency under load.
+
+    .venv/bin/python benchmarks/classification_batching.py --clients 32 --max-concurrency 8
+
+--clients closed-loop clients each classify --requests messages back to back
+against the fake LLM, whose --max-concurrency stands in for a provider's
+concurrency quota. Runs once with one LLM call per classification, then with
+the micro-batcher for every --max-wait-ms and --max-batch combination, and
+reports classifications per second, latency, batch size and LLM calls made.
+"""
+
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import SAMPLE_MESSAGES, print_table, summarize, timed, write_results
+
+
+def configure(args):
+    os.environ["MODEL_FAMILY"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["FAKE_LLM_TOKEN_MS"] = str(args.token_latency_ms)
+    os.environ["FAKE_LLM_MAX_CONCURRENCY"] = str(args.max_concurrency)
+    os.environ.setdefault("CREWAI_TRACING_ENABLED", "false")
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+
+
+def load(args, classify, bus, calls):
+    def client(offset):
+        latencies = []
+        for i in range(args.requests):
+            message = SAMPLE_MESSAGES[(offset + i) % len(SAMPLE_MESSAGES)]
+            _, elapsed = timed(classify, message, "")
+            latencies.append(elapsed)
+        return latencies
+
+    calls.clear()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        latencies = sum(pool.map(client, range(args.clients)), [])
+    wall = time.perf_counter() - started
+    bus.flush()
+    return {
+        "throughput_per_s": round(len(latencies) / wall, 2),
+        "latency": summarize(latencies),
+        "llm_calls": len(calls),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=10)
+    parser.add_argument("--max-wait-ms", type=float, nargs="+", default=[2, 10, 25])
+    parser.add_argument("--max-batch", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--max-concurrency", type=int, default=8)
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--token-latency-ms", type=float, default=0)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    configure(args)
+    from crewai.events import crewai_event_bus
+    from crewai.events.types.llm_events import LLMCallStartedEvent
+
+    from conversational_routing.batching import MicroBatcher
+    from conversational_routing.main import classify_batch, classify_with_llm
+
+    calls = []
+
+    @crewai_event_bus.on(LLMCallStartedEvent)
+    def llm_started(source, event):
+        calls.append(event.call_id)
+
+    # Pays for model and agent setup outside the measurements
+    classify_with_llm("Hello", "")
+
+    results = {"unbatched": load(args, classify_with_llm, crewai_event_bus, calls)}
+    for max_wait_ms, max_batch in itertools.product(args.max_wait_ms, args.max_batch):
+        batcher = MicroBatcher(
+            classify_batch,
+            max_batch=max_batch,
+            max_wait_ms=max_wait_ms,
+            name=f"classification_batches_{max_wait_ms:g}ms_{max_batch}",
+        )
+        result = load(
+            args,
+            lambda message, context: batcher.submit((message, context)),
+            crewai_event_bus,
+            calls,
+        )
+        result["stats"] = batcher.summary()
+        results[f"wait {max_wait_ms:g} ms, batch {max_batch}"] = result
+
+    print_table({name: result["latency"] for name, result in results.items()})
+    print()
+    for name, result in results.items():
+        line = (
+            f"{name:<28}{result['throughput_per_s']:>10.1f} classifications/s, "
+            f"{result['llm_calls']:>5} LLM calls"
+        )
+        if "stats" in result:
+            line += f", mean batch {result['stats']['mean_batch_size']:.1f}"
+            line += f", mean wait {result['stats']['mean_wait_ms']:.1f} ms"
+        print(line)
+    if args.output:
+        write_results(args.output, {"config": vars(args), "results": results})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""
+Classifier call profile: latency, tokens and parse failures of LLM classification.
+
+    .venv/bin/python benchmarks/classifier_profile.py --repeat 20 --label-noise 0.1
+
+Classifies SAMPLE_MESSAGES with the fake LLM (see models/fake.py), three ways:
+
+- agent, exact match: the classifier agent with default settings, and a reply
+  that isn't exactly a label counts as a failure, as the router used to see it
+- agent, normalized: the same agent, with label normalization and a retry
+- constrained: one direct call with the enum-constrained, low-token profile
+
+--label-noise is the share of unconstrained replies the fake LLM decorates
+("Question.", "**pleasantries**"). --token-latency-ms makes every generated
+word cost time, like real decoding. The fake LLM counts words as tokens.
+"""
+
+import argparse
+import os
+import time
+
+from common import SAMPLE_MESSAGES, print_table, summarize, timed, write_results
+
+
+def configure(args):
+    os.environ["MODEL_FAMILY"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["FAKE_LLM_TOKEN_MS"] = str(args.token_latency_ms)
+    os.environ["FAKE_LLM_LABEL_NOISE"] = str(args.label_noise)
+    os.environ.setdefault("CREWAI_TRACING_ENABLED", "false")
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+
+
+def run(args, classify, bus, usage):
+    from conversational_routing.classifier import LABELS
+
+    latencies, failures = [], 0
+    usage.clear()
+    for _ in range(args.repeat):
+        for message in SAMPLE_MESSAGES:
+            label, elapsed = timed(classify, message, "")
+            latencies.append(elapsed)
+            failures += label not in LABELS
+    bus.flush()
+    calls = len(latencies)
+    return {
+        "latency": summarize(latencies),
+        "failures": failures,
+        "llm_calls_per_classification": round(len(usage) / calls, 3),
+        "prompt_tokens": round(sum(p for p, _ in usage) / calls, 1),
+        "completion_tokens": round(sum(c for _, c in usage) / calls, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--token-latency-ms", type=float, default=10)
+    parser.add_argument("--label-noise", type=float, default=0.1)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    configure(args)
+    from crewai.events import crewai_event_bus
+    from crewai.events.types.llm_events import LLMCallCompletedEvent
+
+    from conversational_routing import main as chat
+
+    usage = []
+
+    @crewai_event_bus.on(LLMCallCompletedEvent)
+    def llm_completed(source, event):
+        tokens = getattr(event, "usage", None) or {}
+        usage.append(
+            (tokens.get("prompt_tokens", 0), tokens.get("completion_tokens", 0))
+        )
+
+    # Pays for model setup outside the measurements
+    chat.classify_with_agent("Hello", "")
+    chat.classify_constrained("Hello", "")
+    time.sleep(0.1)
+
+    def agent_exact(message, context):
+        return chat.classify_with_agent(message, context)
+
+    results = {"agent, exact match": run(args, agent_exact, crewai_event_bus, usage)}
+    chat.classifier_profile = "agent"
+    chat.classifier_stats.reset()
+    results["agent, normalized"] = run(
+        args, chat.classify_with_llm, crewai_event_bus, usage
+    )
+    results["agent, normalized"]["stats"] = chat.classifier_stats.snapshot()
+    chat.classifier_profile = "constrained"
+    chat.classifier_stats.reset()
+    results["constrained"] = run(args, chat.classify_with_llm, crewai_event_bus, usage)
+    results["constrained"]["stats"] = chat.classifier_stats.snapshot()
+
+    print_table({name: result["latency"] for name, result in results.items()})
+    print()
+    print(
+        f"{'per classification':<28}{'failures':>10}{'LLM calls':>11}"
+        f"{'prompt tok':>12}{'output tok':>12}"
+    )
+    for name, result in results.items():
+        print(
+            f"{name:<28}{result['failures']:>10}"
+            f"{result['llm_calls_per_classification']:>11.2f}"
+            f"{result['prompt_tokens']:>12.1f}{result['completion_tokens']:>12.1f}"
+        )
+    for name in ("agent, normalized", "constrained"):
+        print(f"{name} stats: {results[name]['stats']}")
+    if args.output:
+        write_results(args.output, {"config": vars(args), "results": results})
+
+
+if __name__ == "__main__":
+    main()
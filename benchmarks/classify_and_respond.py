@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""
+Classify-and-respond: per-route latency and tokens, one LLM call vs. two hops.
+
+    .venv/bin/python benchmarks/classify_and_respond.py --repeat 10 --llm-latency-ms 200
+
+Runs turns for every route against the fake LLM (see flow_suite.py) with the
+fast path off, so every turn is classified by the LLM. "2-hop" is the
+classifier agent followed by the route's answer step; "1-call" classifies
+and drafts the pleasantry reply together (CLASSIFY_AND_RESPOND). Reports turn
+latency, and LLM calls and tokens per turn, from each turn's timings. The fake
+LLM counts words as tokens.
+"""
+
+import argparse
+import os
+import tempfile
+from collections import defaultdict
+
+from common import print_table, summarize, write_results
+from flow_suite import ROUTE_MESSAGES, configure, run_turn
+
+
+def run(args):
+    latency = defaultdict(list)
+    usage = defaultdict(lambda: defaultdict(float))
+    for i in range(args.repeat):
+        for messages in ROUTE_MESSAGES.values():
+            result, elapsed = run_turn(messages[i % len(messages)])
+            route = result["classification"]
+            latency[route].append(elapsed)
+            for key in ("llm_calls", "prompt_tokens", "completion_tokens"):
+                usage[route][key] += result["timings"].get(key, 0)
+    return {
+        route: {
+            "latency": summarize(samples),
+            **{
+                key: round(total / len(samples), 1)
+                for key, total in usage[route].items()
+            },
+        }
+        for route, samples in latency.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--token-latency-ms", type=float, default=0)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    os.environ["FAST_PATH_CLASSIFIER"] = "false"
+    with tempfile.TemporaryDirectory() as directory:
+        configure(args, directory)
+        from conversational_routing import main as chat
+
+        # First turns pay for imports, agent setup and index loading
+        for messages in ROUTE_MESSAGES.values():
+            run_turn(messages[0])
+
+        chat.classify_and_respond_mode = False
+        results = {"2-hop": run(args)}
+        chat.classify_and_respond_mode = True
+        results["1-call"] = run(args)
+        stats = chat.classify_and_respond_stats.snapshot()
+
+    print_table(
+        {
+            f"{route} ({mode})": result["latency"]
+            for mode, routes in results.items()
+            for route, result in sorted(routes.items())
+        }
+    )
+    print()
+    print(f"{'per turn':<36}{'LLM calls':>10}{'prompt tok':>12}{'output tok':>12}")
+    for mode, routes in results.items():
+        for route, result in sorted(routes.items()):
+            print(
+                f"{route + ' (' + mode + ')':<36}{result['llm_calls']:>10.1f}"
+                f"{result['prompt_tokens']:>12.1f}{result['completion_tokens']:>12.1f}"
+            )
+    print(f"\nstats: {stats}")
+    if args.output:
+        write_results(
+            args.output, {"config": vars(args), "results": results, "stats": stats}
+        )
+
+
+if __name__ == "__main__":
+    main()
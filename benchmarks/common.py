@@ -0,0 +1,56 @@
+import json
+import time
+from pathlib import Path
+
+SAMPLE_MESSAGES = [
+    "Hello",
+    "Thanks, that helps!",
+    "Tell me about benefits",
+    "Is there an extended warranty protection?",
+    "What are coverage limits?",
+    "Does my card cover rental cars abroad?",
+    "What's the weather in Chicago tomorrow?",
+    "Can you recommend a good book?",
+    "Good morning!",
+    "How do I make sourdough bread?",
+]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; good enough for benchmark reporting."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples_ms):
+    return {
+        "count": len(samples_ms),
+        "p50_ms": round(percentile(samples_ms, 50), 4),
+        "p99_ms": round(percentile(samples_ms, 99), 4),
+        "mean_ms": round(sum(samples_ms) / len(samples_ms), 4) if samples_ms else 0.0,
+    }
+
+
+def timed(fn, *args, **kwargs):
+    """Run fn and return (result, elapsed milliseconds)."""
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - started) * 1000
+
+
+def print_table(rows):
+    print(f"{'path':<28}{'count':>8}{'p50 ms':>14}{'p99 ms':>14}{'mean ms':>14}")
+    for name, summary in rows.items():
+        print(
+            f"{name:<28}{summary['count']:>8}{summary['p50_ms']:>14.4f}"
+            f"{summary['p99_ms']:>14.4f}{summary['mean_ms']:>14.4f}"
+        )
+
+
+def write_results(path, results):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2))
@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+"""
+End-to-end ChatFlow benchmarks against the fake LLM and embedder (no network).
+
+    .venv/bin/python benchmarks/flow_suite.py --llm-latency-ms 200 --output results/flow.json
+    .venv/bin/python benchmarks/flow_suite.py --baseline results/flow.json
+
+Runs the real flow (routing, agents, knowledge search, memory and
+persistence) with MODEL_FAMILY=fake, and reports:
+
+- per-route turn latency (pleasantries, question, non-chase-question)
+- where a turn's time goes: flow methods, LLM calls, tool calls, persistence,
+  and the remaining framework overhead
+- memory retained per conversation and persisted bytes per conversation
+- throughput at several concurrency levels
+
+With --baseline, p50 latencies and throughput are compared against an earlier
+--output file and the run fails if any got worse by more than --tolerance.
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from common import print_table, summarize, timed, write_results
+
+ROUTE_MESSAGES = {
+    "pleasantries": ["Hello", "Thanks, that helps!", "Good morning!"],
+    "question": [
+        "Does my card cover rental cars abroad?",
+        "Is there an extended warranty protection?",
+        "How do I file a purchase protection claim?",
+    ],
+    "non-chase-question": [
+        "How do I make sourdough bread?",
+        "Can you recommend a good book?",
+        "What's the weather in Chicago tomorrow?",
+    ],
+}
+
+
+def configure(args, directory):
+    """Point every backend at the fake models and throwaway storage."""
+    os.environ["MODEL_FAMILY"] = "fake"
+    os.environ["FAKE_LLM_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ["FAKE_LLM_TOKEN_MS"] = str(args.token_latency_ms)
+    os.environ["FLOW_PERSISTENCE_DB"] = str(Path(directory) / "flows.db")
+    os.environ["KNOWLEDGE_INDEX_DIR"] = str(Path(directory) / "index")
+    os.environ["KNOWLEDGE_BACKEND"] = "index"
+    os.environ.setdefault("ANSWER_CACHE", "false")
+    os.environ.setdefault("CREWAI_TRACING_ENABLED", "false")
+    os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+
+    from conversational_routing.embeddings import embed
+    from conversational_routing.knowledge_index import KNOWLEDGE_DIRECTORY, build_index
+
+    build_index(KNOWLEDGE_DIRECTORY, Path(directory) / "index", embed)
+
+
+class StepRecorder:
+    """Collects flow method, LLM and tool timings from the event bus."""
+
+    def __init__(self):
+        from crewai.events import crewai_event_bus
+        from crewai.events.types.flow_events import (
+            MethodExecutionFinishedEvent,
+            MethodExecutionStartedEvent,
+        )
+        from crewai.events.types.llm_events import (
+            LLMCallCompletedEvent,
+            LLMCallStartedEvent,
+        )
+        from crewai.events.types.tool_usage_events import ToolUsageFinishedEvent
+
+        self.bus = crewai_event_bus
+        self.started = {}
+        self.samples = defaultdict(list)
+
+        @crewai_event_bus.on(MethodExecutionStartedEvent)
+        def method_started(source, event):
+            self.started[("method", event.method_name)] = event.timestamp
+
+        @crewai_event_bus.on(MethodExecutionFinishedEvent)
+        def method_finished(source, event):
+            started = self.started.pop(("method", event.method_name), None)
+            if started is not None:
+                self._add(f"method:{event.method_name}", started, event.timestamp)
+
+        @crewai_event_bus.on(LLMCallStartedEvent)
+        def llm_started(source, event):
+            self.started[("llm", event.call_id)] = event.timestamp
+
+        @crewai_event_bus.on(LLMCallCompletedEvent)
+        def llm_completed(source, event):
+            started = self.started.pop(("llm", event.call_id), None)
+            if started is not None:
+                self._add("llm", started, event.timestamp)
+
+        @crewai_event_bus.on(ToolUsageFinishedEvent)
+        def tool_finished(source, event):
+            self._add("tool", event.started_at, event.finished_at)
+
+    def _add(self, name, started, finished):
+        self.samples[name].append((finished - started).total_seconds() * 1000)
+
+    def turn(self):
+        """Wait for pending handlers, then return and reset this turn's timings."""
+        self.bus.flush()
+        samples, self.samples = self.samples, defaultdict(list)
+        return samples
+
+
+def time_persistence(persistence, samples):
+    """Record how long each save_state call blocks the flow."""
+    save_state = persistence.save_state
+
+    def timed_save_state(*args, **kwargs):
+        _, elapsed = timed(save_state, *args, **kwargs)
+        samples.append(elapsed)
+
+    # Pydantic models reject unknown attributes; patch the bound method directly
+    object.__setattr__(persistence, "save_state", timed_save_state)
+
+
+def run_turn(message, conversation_id=None):
+    from conversational_routing.main import ChatFlow
+
+    inputs = {"current_message": message}
+    if conversation_id:
+        inputs["id"] = conversation_id
+    raw, elapsed = timed(ChatFlow().kickoff, inputs=inputs)
+    return json.loads(raw), elapsed
+
+
+def bench_routes(args, recorder, persistence_samples):
+    latency = defaultdict(list)
+    steps = defaultdict(lambda: defaultdict(list))
+    for i in range(args.repeat):
+        for messages in ROUTE_MESSAGES.values():
+            persistence_samples.clear()
+            result, elapsed = run_turn(messages[i % len(messages)])
+            samples = recorder.turn()
+            label = result["classification"]
+            latency[label].append(elapsed)
+
+            accounted = 0.0
+            for name, values in samples.items():
+                steps[label][name].append(sum(values))
+                if not name.startswith("method:"):
+                    accounted += sum(values)
+            persisted = sum(persistence_samples)
+            steps[label]["persistence"].append(persisted)
+            steps[label]["overhead"].append(elapsed - accounted - persisted)
+
+    return (
+        {route: summarize(values) for route, values in latency.items()},
+        {
+            route: {name: summarize(values) for name, values in names.items()}
+            for route, names in steps.items()
+        },
+    )
+
+
+def bench_memory(args, persistence):
+    messages = [m for values in ROUTE_MESSAGES.values() for m in values]
+    db_before = persistence_size(persistence)
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for conversation in range(args.memory_conversations):
+        conversation_id = None
+        for turn in range(args.memory_turns):
+            result, _ = run_turn(
+                messages[(conversation + turn) % len(messages)], conversation_id
+            )
+            conversation_id = result["id"]
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "conversations": args.memory_conversations,
+        "turns": args.memory_turns,
+        "retained_bytes_per_conversation": round(
+            (current - baseline) / args.memory_conversations
+        ),
+        "peak_bytes": peak - baseline,
+        "persisted_bytes_per_conversation": round(
+            (persistence_size(persistence) - db_before) / args.memory_conversations
+        ),
+    }
+
+
+def persistence_size(persistence):
+    path = Path(getattr(persistence, "db_path", ""))
+    return sum(
+        p.stat().st_size for p in path.parent.glob(path.name + "*") if p.is_file()
+    )
+
+
+def bench_throughput(args):
+    messages = [m for values in ROUTE_MESSAGES.values() for m in values]
+    results = {}
+    for concurrency in args.concurrency:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = [
+                elapsed
+                for _, elapsed in pool.map(
+                    lambda i: run_turn(messages[i % len(messages)]),
+                    range(args.throughput_turns),
+                )
+            ]
+        wall = time.perf_counter() - started
+        results[str(concurrency)] = {
+            "turns_per_second": round(args.throughput_turns / wall, 2),
+            "latency": summarize(latencies),
+        }
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return human-readable regressions of results against baseline."""
+    regressions = []
+    for route, summary in results["routes"].items():
+        before = baseline.get("routes", {}).get(route)
+        if before and summary["p50_ms"] > before["p50_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{route} p50 {before['p50_ms']:.1f} -> {summary['p50_ms']:.1f} ms"
+            )
+    for concurrency, summary in results["throughput"].items():
+        before = baseline.get("throughput", {}).get(concurrency)
+        if before and summary["turns_per_second"] < before["turns_per_second"] * (
+            1 - tolerance
+        ):
+            regressions.append(
+                f"throughput x{concurrency} {before['turns_per_second']} -> "
+                f"{summary['turns_per_second']} turns/s"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--token-latency-ms", type=float, default=0)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--memory-conversations", type=int, default=20)
+    parser.add_argument("--memory-turns", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--throughput-turns", type=int, default=64)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        configure(args, directory)
+        from conversational_routing.main import flow_persistence
+
+        recorder = StepRecorder()
+        persistence_samples = []
+        time_persistence(flow_persistence, persistence_samples)
+
+        # First turns pay for imports, agent setup and index loading
+        for messages in ROUTE_MESSAGES.values():
+            run_turn(messages[0])
+        recorder.turn()
+
+        routes, steps = bench_routes(args, recorder, persistence_samples)
+        memory = bench_memory(args, flow_persistence)
+        throughput = bench_throughput(args)
+
+    results = {
+        "config": {
+            "llm_latency_ms": args.llm_latency_ms,
+            "token_latency_ms": args.token_latency_ms,
+            "repeat": args.repeat,
+        },
+        "routes": routes,
+        "steps": steps,
+        "memory": memory,
+        "throughput": throughput,
+    }
+
+    print_table({f"route {route}": summary for route, summary in routes.items()})
+    print()
+    for route, names in steps.items():
+        print_table({f"{route[:12]} {name}"[:27]: s for name, s in names.items()})
+        print()
+    print(json.dumps(memory, indent=2))
+    for concurrency, summary in throughput.items():
+        print(
+            f"concurrency {concurrency:>4}: {summary['turns_per_second']:>8} turns/s, "
+            f"p50 {summary['latency']['p50_ms']:.1f} ms"
+        )
+    if args.output:
+        write_results(args.output, results)
+
+    if args.baseline:
+        regressions = compare(
+            results, json.loads(Path(args.baseline).read_text()), args.tolerance
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
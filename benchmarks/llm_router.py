@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+LLM router: single providers vs. routing with failover and hedged requests.
+
+    .venv/bin/python benchmarks/llm_router.py --calls 300 --concurrency 8
+
+Uses fake providers (no network) with different profiles: one steady, one fast
+with a slow tail, one that is rate limited on a share of calls. Each
+configuration makes the same calls; failed calls count as errors. Reports
+end-to-end latency per configuration, then the router's per-provider latency
+and error rate and how often it hedged or failed over.
+"""
+
+import argparse
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("CREWAI_TRACING_ENABLED", "false")
+
+from common import SAMPLE_MESSAGES, print_table, summarize, timed, write_results
+
+from conversational_routing.models.fake import FakeLLM
+from conversational_routing.models.router import RoutingLLM, router_stats
+
+PROMPT = (
+    "Evaluate the user prompt: '{}'.\n\n"
+    "Return the classification result as a single word: pleasantries, question, "
+    "or non-chase-question."
+)
+
+
+def providers(args):
+    return {
+        "steady": FakeLLM(model="fake/steady", provider="steady", latency_ms=120),
+        "spiky": FakeLLM(
+            model="fake/spiky",
+            provider="spiky",
+            latency_ms=60,
+            tail_rate=args.tail_rate,
+            tail_latency_ms=args.tail_ms,
+        ),
+        "limited": FakeLLM(
+            model="fake/limited",
+            provider="limited",
+            latency_ms=80,
+            error_rate=args.error_rate,
+        ),
+    }
+
+
+def run(llm, args):
+    def one(i):
+        message = PROMPT.format(SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)])
+        try:
+            _, elapsed = timed(llm.call, [{"role": "user", "content": message}])
+        except Exception:
+            return None
+        return elapsed
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(one, range(args.calls)))
+    latencies = [r for r in results if r is not None]
+    return summarize(latencies), len(results) - len(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--tail-rate", type=float, default=0.03)
+    parser.add_argument("--tail-ms", type=float, default=1000)
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    rows, errors, reports = {}, {}, {}
+    configurations = list(providers(args).items())
+    for hedge in (False, True):
+        router = RoutingLLM(
+            model="router",
+            provider="router",
+            providers=providers(args),
+            hedge=hedge,
+            hedge_default_ms=300,
+            cooldown_seconds=0.5,
+        )
+        configurations.append((f"router hedge={hedge}", router))
+
+    for name, llm in configurations:
+        random.seed(args.seed)
+        router_stats.reset()
+        rows[name], errors[name] = run(llm, args)
+        if isinstance(llm, RoutingLLM):
+            reports[name] = {"providers": llm.report(), **router_stats.snapshot()}
+
+    print_table(rows)
+    print()
+    for name, count in errors.items():
+        print(f"{name:<28}{count:>8} failed calls")
+    for name, report in reports.items():
+        counts = {k: int(v) for k, v in report.items() if k != "providers"}
+        print(f"\n{name}: {counts}")
+        for provider, stats in report["providers"].items():
+            print(
+                f"  {provider:<10} {stats['calls']:>6} calls {stats['error_rate']:>7.2%} "
+                f"errors  p50 {stats['p50_ms']:>8.1f}  p95 {stats['p95_ms']:>8.1f}  "
+                f"p99 {stats['p99_ms']:>8.1f} ms"
+            )
+
+    if args.output:
+        write_results(
+            args.output,
+            {
+                "config": vars(args),
+                "latency": rows,
+                "errors": errors,
+                "routers": reports,
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+"""
+Flow persistence cost per turn: CrewAI's SQLiteFlowPersistence vs. TurnPersistence.
+
+    .venv/bin/python benchmarks/persistence_writes.py --turns 30 --threads 8
+
+Replays ChatFlow's save_state calls (one per flow method, as class-level
+@persist does) for simulated conversations, with the same memory folding the
+flow applies. Reports per-turn persistence latency, bytes written per turn
+(write amplification) and the database size on disk. No LLM calls are made.
+"""
+
+import argparse
+import json
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from common import print_table, summarize, write_results
+from crewai.flow.persistence import SQLiteFlowPersistence
+
+from conversational_routing.memory import ConversationMemory
+from conversational_routing.persistence import TurnPersistence
+
+# Methods @persist saves after, for one question turn through ChatFlow
+TURN_METHODS = [
+    "initial_processing",
+    "classify_message",
+    "answer_question",
+    "send_response",
+]
+
+ANSWER = (
+    "Auto Rental Collision Damage Waiver covers theft and collision damage for "
+    "most rental cars in the U.S. and abroad when you decline the rental company's "
+    "collision insurance and pay for the entire rental with your card. "
+) * 2
+
+
+class Recorder:
+    """Wraps a backend to count the payload bytes each save_state hands it."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.bytes = 0
+
+    def save_state(self, flow_uuid, method_name, state):
+        self.bytes += len(json.dumps(state))
+        self.backend.save_state(flow_uuid, method_name, state)
+
+
+def run_conversation(recorder, conversation, turns, memory, latencies):
+    state = {
+        "id": f"conversation-{conversation}",
+        "current_message": "",
+        "conversation_history": [],
+        "conversation_summary": "",
+        "history_offset": 0,
+        "current_agent": "",
+        "current_agent_response": "",
+        "classification": "",
+    }
+    for turn in range(turns):
+        state["current_message"] = f"Question {turn}: is my rental car covered abroad?"
+        update = memory.update(
+            state["conversation_summary"], state["conversation_history"]
+        )
+        state["history_offset"] += len(state["conversation_history"]) - len(
+            update.conversation_history
+        )
+        state["conversation_summary"] = update.summary
+        state["conversation_history"] = list(update.conversation_history)
+
+        started = time.perf_counter()
+        for method in TURN_METHODS:
+            if method == "send_response":
+                state["conversation_history"] += [
+                    {"role": "user", "content": state["current_message"]},
+                    {"role": "assistant", "content": ANSWER},
+                ]
+            elif method == "answer_question":
+                state["current_agent_response"] = ANSWER
+            recorder.save_state(state["id"], method, json.loads(json.dumps(state)))
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+def db_size(path):
+    return sum(
+        p.stat().st_size
+        for p in Path(path).parent.glob(Path(path).name + "*")
+        if p.is_file()
+    )
+
+
+def run_backend(name, make_backend, args, directory):
+    db_path = str(Path(directory) / f"{name}.db")
+    recorder = Recorder(make_backend(db_path))
+    memory = ConversationMemory()
+    latencies = []
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(
+            pool.map(
+                lambda c: run_conversation(recorder, c, args.turns, memory, latencies),
+                range(args.conversations),
+            )
+        )
+
+    total_turns = args.turns * args.conversations
+    stats = getattr(recorder.backend, "stats", None)
+    written = stats.get("bytes_written") if stats else recorder.bytes
+    return summarize(latencies), {
+        "bytes_per_turn": round(written / total_turns),
+        "db_bytes": db_size(db_path),
+        "commits": stats.get("commits") if stats else total_turns * len(TURN_METHODS),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--conversations", type=int, default=16)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        rows, results = {}, {}
+        for name, make_backend in (
+            ("sqlite", SQLiteFlowPersistence),
+            ("turn", TurnPersistence),
+        ):
+            latency, writes = run_backend(name, make_backend, args, directory)
+            rows[f"{name} persistence per turn"] = latency
+            results[name] = {"latency": latency, **writes}
+
+    print_table(rows)
+    print()
+    for name, result in results.items():
+        print(
+            f"{name:<8}{result['bytes_per_turn']:>10} bytes/turn"
+            f"{result['db_bytes']:>12} bytes on disk{int(result['commits']):>8} commits"
+        )
+    if args.output:
+        write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
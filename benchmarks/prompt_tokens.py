@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Prompt tokens per turn spent on conversation history: last-10 repr vs. rolling summary.
+
+    .venv/bin/python benchmarks/prompt_tokens.py --turns 30
+
+"before" is what ChatFlow used to interpolate (the Python repr of the last 10
+history entries); "after" is ConversationMemory's rendered summary plus recent
+turns. The offline run uses the extractive summarizer; the LLM summarizer
+produces shorter summaries, so these numbers are an upper bound.
+"""
+
+import argparse
+
+from common import SAMPLE_MESSAGES, write_results
+
+from conversational_routing.memory import (
+    ConversationMemory,
+    count_tokens,
+    render_context,
+)
+
+SAMPLE_ANSWER = (
+    "With your Chase Freedom card, purchase protection covers eligible items against "
+    "damage or theft for 120 days from the date of purchase, up to $500 per claim and "
+    "$50,000 per account. To file a claim, call the benefits administrator within 90 "
+    "days of the incident and keep your receipt and card statement. Some items, such "
+    "as motorized vehicles and perishables, are excluded. Let me know if you would "
+    "like details about extended warranty protection as well."
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--output", default=None, help="optional JSON results path")
+    args = parser.parse_args()
+
+    memory = ConversationMemory.from_env()
+    raw_history, history, summary = [], [], ""
+    rows, summarizations = [], 0
+
+    for turn in range(args.turns):
+        message = SAMPLE_MESSAGES[turn % len(SAMPLE_MESSAGES)]
+
+        before = count_tokens(str(raw_history[-10:]))
+        update = memory.update(summary, history)
+        summary, history = update.summary, update.conversation_history
+        summarizations += update.summarized
+        after = count_tokens(render_context(summary, history))
+        rows.append({"turn": turn + 1, "before": before, "after": after})
+
+        for entries in (raw_history, history):
+            entries.append({"role": "user", "content": message})
+            entries.append({"role": "assistant", "content": SAMPLE_ANSWER})
+
+    print(f"{'turn':>6}{'before':>10}{'after':>10}")
+    for row in rows:
+        print(f"{row['turn']:>6}{row['before']:>10}{row['after']:>10}")
+    total_before = sum(r["before"] for r in rows)
+    total_after = sum(r["after"] for r in rows)
+    print(
+        f"\ntotal history tokens: before {total_before}, after {total_after} "
+        f"({1 - total_after / total_before:.0%} fewer); "
+        f"summarizer ran {summarizations} times in {args.turns} turns"
+    )
+    if args.output:
+        write_results(args.output, {"turns": rows, "summarizations": summarizations})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Knowledge retrieval latency: NumPy VectorRetriever vs. a ChromaDB collection.
+
+    .venv/bin/python benchmarks/retrieval_latency.py
+
+ChromaDB is what CrewAI's default knowledge storage queries. Both sides search
+the same precomputed vectors, so provider embedding calls are excluded. Uses the
+index from `ingest` when present, otherwise a random corpus of the same shape.
+"""
+
+import argparse
+import uuid
+
+import numpy as np
+from common import print_table, summarize, timed
+
+from conversational_routing.knowledge_index import INDEX_DIRECTORY, KnowledgeIndex
+from conversational_routing.retriever import VectorRetriever
+
+
+def load_corpus(args):
+    if (INDEX_DIRECTORY / "CURRENT").exists() and not args.synthetic:
+        index = KnowledgeIndex.open()
+        return np.asarray(index.embeddings), index.chunks
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((args.chunks, args.dimensions)).astype(np.float32)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix, [f"chunk {i}" for i in range(args.chunks)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--synthetic", action="store_true")
+    parser.add_argument("--chunks", type=int, default=18)
+    parser.add_argument("--dimensions", type=int, default=768)
+    args = parser.parse_args()
+
+    matrix, chunks = load_corpus(args)
+    rng = np.random.default_rng(1)
+    queries = matrix[rng.integers(0, len(matrix), args.queries)]
+    queries = queries + rng.normal(0, 0.05, queries.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    retriever = VectorRetriever(matrix, chunks, results_limit=args.k)
+    rows = {
+        "numpy single query": summarize(
+            [timed(retriever.search, q)[1] for q in queries]
+        )
+    }
+    batch_samples = []
+    for start in range(0, len(queries), args.batch):
+        batch = queries[start : start + args.batch]
+        _, elapsed = timed(retriever.search_batch, batch)
+        batch_samples.append(elapsed / len(batch))
+    rows[f"numpy batch of {args.batch} (per q)"] = summarize(batch_samples)
+
+    try:
+        import chromadb
+    except ImportError:
+        chromadb = None
+
+    if chromadb is not None:
+        client = chromadb.EphemeralClient()
+        collection = client.create_collection(
+            f"bench_{uuid.uuid4().hex}", metadata={"hnsw:space": "cosine"}
+        )
+        collection.add(
+            ids=[str(i) for i in range(len(chunks))],
+            embeddings=matrix.tolist(),
+            documents=list(chunks),
+        )
+        rows["chromadb query"] = summarize(
+            [
+                timed(
+                    collection.query, query_embeddings=[q.tolist()], n_results=args.k
+                )[1]
+                for q in queries
+            ]
+        )
+
+    print(f"corpus: {matrix.shape[0]} chunks x {matrix.shape[1]} dimensions\n")
+    print_table(rows)
+
+
+if __name__ == "__main__":
+    main()
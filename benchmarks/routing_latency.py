@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+"""
+Routing latency: in-process fast path vs. the LLM classification agent.
+
+    .venv/bin/python benchmarks/routing_latency.py --llm-samples 10
+
+The LLM path uses the configured MODEL_FAMILY and therefore needs credentials;
+pass --llm-samples 0 to benchmark the fast path alone.
+"""
+
+import argparse
+
+from common import SAMPLE_MESSAGES, print_table, summarize, timed
+
+from conversational_routing.classifier import FastPathClassifier
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--llm-samples", type=int, default=10)
+    args = parser.parse_args()
+
+    classifier = FastPathClassifier.from_env()
+
+    fast_path = []
+    for _ in range(args.repeat):
+        for message in SAMPLE_MESSAGES:
+            _, elapsed = timed(classifier.classify, message)
+            fast_path.append(elapsed)
+
+    rows = {"fast path (all messages)": summarize(fast_path)}
+
+    if args.llm_samples:
+        from conversational_routing.main import classify_with_llm
+
+        llm_path = []
+        for i in range(args.llm_samples):
+            message = SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)]
+            _, elapsed = timed(classify_with_llm, message, "")
+            llm_path.append(elapsed)
+        rows["llm classifier"] = summarize(llm_path)
+
+    print_table(rows)
+    print(
+        f"\nfast path hit rate: {classifier.hit_rate():.1%}, "
+        f"fallback rate: {classifier.fallback_rate():.1%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
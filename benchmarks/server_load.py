@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+End-to-end load test for a /kickoff + /status deployment of ChatFlow.
+
+    .venv/bin/serve --concurrency 16 &
+    .venv/bin/python benchmarks/server_load.py --requests 200 --concurrency 32
+
+Works against the self-hosted server or a CrewAI deployment (pass --base-url
+and --token). Each client sends a kickoff, then polls /status until it settles.
+"""
+
+import argparse
+import asyncio
+import time
+
+from aiohttp import ClientSession
+from common import SAMPLE_MESSAGES, print_table, summarize, write_results
+
+
+async def run_one(session, base_url, message, poll_interval):
+    started = time.perf_counter()
+    async with session.post(
+        f"{base_url}/kickoff", json={"inputs": {"current_message": message}}
+    ) as response:
+        response.raise_for_status()
+        kickoff_id = (await response.json())["kickoff_id"]
+    while True:
+        await asyncio.sleep(poll_interval)
+        async with session.get(f"{base_url}/status/{kickoff_id}") as response:
+            status = await response.json()
+        if status["state"] in ("SUCCESS", "FAILURE"):
+            return status["state"], (time.perf_counter() - started) * 1000
+
+
+async def run(args):
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    limit = asyncio.Semaphore(args.concurrency)
+    latencies, failures = [], 0
+
+    async with ClientSession(headers=headers) as session:
+
+        async def client(i):
+            nonlocal failures
+            async with limit:
+                message = SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)]
+                state, ms = await run_one(
+                    session, args.base_url, message, args.poll_interval
+                )
+            if state == "SUCCESS":
+                latencies.append(ms)
+            else:
+                failures += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+    summary = summarize(latencies)
+    print_table({"kickoff -> SUCCESS": summary})
+    print(
+        f"\n{args.requests} kickoffs in {elapsed:.1f}s "
+        f"({args.requests / elapsed:.2f}/s), {failures} failed"
+    )
+    if args.output:
+        write_results(
+            args.output,
+            {
+                "latency": summary,
+                "throughput_per_s": args.requests / elapsed,
+                "failures": failures,
+            },
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--token")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--poll-interval", type=float, default=0.25)
+    parser.add_argument("--output")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+Single-flight: a burst of identical questions with and without coalescing.
+
+    .venv/bin/python benchmarks/single_flight.py --burst 50 --llm-latency-ms 200
+
+Simulates everyone clicking the same Slack suggested prompt at once: --burst
+new conversations send the same message concurrently, against the fake LLM
+(see flow_suite.py). The answer cache is off, so every saving comes from
+coalescing. Reports the burst's wall time, turn latency and LLM calls made.
+"""
+
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import print_table, summarize, write_results
+from flow_suite import configure, run_turn
+
+MESSAGE = "What benefits does the Chase Freedom card offer?"
+
+
+def burst(args, bus, calls):
+    calls.clear()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.burst) as pool:
+        latencies = [
+            elapsed for _, elapsed in pool.map(run_turn, [args.message] * args.burst)
+        ]
+    wall = (time.perf_counter() - started) * 1000
+    bus.flush()
+    return {
+        "wall_ms": round(wall, 2),
+        "latency": summarize(latencies),
+        "llm_calls": len(calls),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--burst", type=int, default=50)
+    parser.add_argument("--message", default=MESSAGE)
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--token-latency-ms", type=float, default=0)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        configure(args, directory)
+        from crewai.events import crewai_event_bus
+        from crewai.events.types.llm_events import LLMCallStartedEvent
+
+        from conversational_routing import main as chat
+
+        calls = []
+
+        @crewai_event_bus.on(LLMCallStartedEvent)
+        def llm_started(source, event):
+            calls.append(event.call_id)
+
+        # First turn pays for imports, agent setup and index loading
+        run_turn(args.message)
+
+        single_flight = chat.single_flight
+        chat.single_flight = None
+        results = {"off": burst(args, crewai_event_bus, calls)}
+        chat.single_flight = single_flight
+        if single_flight is not None:
+            single_flight.stats.reset()
+            results["on"] = burst(args, crewai_event_bus, calls)
+            results["on"]["stats"] = single_flight.summary()
+
+    print_table(
+        {f"single flight {mode}": result["latency"] for mode, result in results.items()}
+    )
+    print()
+    for mode, result in results.items():
+        print(
+            f"single flight {mode:>3}: burst of {args.burst} took "
+            f"{result['wall_ms']:.0f} ms with {result['llm_calls']} LLM calls"
+        )
+    if "on" in results:
+        print(f"stats: {results['on']['stats']}")
+    if args.output:
+        write_results(args.output, {"config": vars(args), "results": results})
+
+
+if __name__ == "__main__":
+    main()
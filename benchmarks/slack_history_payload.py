@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Slack thread submission: full history per message vs. delta (message + flow id).
+
+    ANSWER_CACHE=false FAST_PATH_CONFIDENCE=0 \\
+        .venv/bin/python benchmarks/slack_history_payload.py --turns 30
+
+Replays one Slack thread against an in-process ChatFlow the way the bot builds
+its kickoff inputs in each SLACK_HISTORY_MODE, and reports the request body
+size and the flow's per-turn latency. Messages are ones the fast path routes to
+the canned non-Chase answer, so no LLM calls are made (the model credentials
+still have to be set for the flow module to import). `--expire-at N` drops the
+flow's persisted state before turn N to exercise the delta mode resync path.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+
+from common import print_table, summarize, timed, write_results
+
+MESSAGES = [
+    "How do I make sourdough bread?",
+    "What's the weather in Chicago tomorrow?",
+    "Can you recommend a good book?",
+]
+MAX_HISTORY = 20
+
+
+def thread_inputs(mode, message, session):
+    """Mirror of the Slack bot's turn_inputs."""
+    inputs = {"current_message": message}
+    if mode == "full":
+        if session.get("history"):
+            inputs["conversation_history"] = session["history"]
+    elif session.get("session_id"):
+        inputs["id"] = session["session_id"]
+        inputs["expected_turns"] = session.get("turns", 0)
+    return inputs
+
+
+def expire(db_path, flow_id):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DELETE FROM conversations WHERE flow_uuid = ?", (flow_id,))
+        conn.execute("DELETE FROM history WHERE flow_uuid = ?", (flow_id,))
+
+
+def run_thread(mode, args, db_path):
+    from conversational_routing.main import ChatFlow
+
+    session = {"history": [], "turns": 0}
+    request_bytes, latencies, resyncs = [], [], 0
+    for turn in range(args.turns):
+        if mode == "delta" and turn == args.expire_at and session.get("session_id"):
+            expire(db_path, session["session_id"])
+
+        message = MESSAGES[turn % len(MESSAGES)]
+        inputs = thread_inputs(mode, message, session)
+        request_bytes.append(len(json.dumps({"inputs": inputs})))
+        raw, elapsed = timed(ChatFlow().kickoff, inputs=inputs)
+        result = json.loads(raw)
+        if result.get("resync"):
+            resyncs += 1
+            inputs["resync_history"] = session["history"]
+            request_bytes[-1] += len(json.dumps({"inputs": inputs}))
+            raw, retry_elapsed = timed(ChatFlow().kickoff, inputs=inputs)
+            result = json.loads(raw)
+            elapsed += retry_elapsed
+        latencies.append(elapsed)
+
+        session["session_id"] = result["id"]
+        session["turns"] += 1
+        session["history"] = (
+            session["history"]
+            + [
+                {"role": "user", "content": message},
+                {"role": "assistant", "content": result["response"]},
+            ]
+        )[-MAX_HISTORY:]
+
+    return {
+        "latency": summarize(latencies),
+        "total_request_bytes": sum(request_bytes),
+        "last_request_bytes": request_bytes[-1],
+        "resyncs": resyncs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=30)
+    parser.add_argument("--expire-at", type=int, default=None)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = str(Path(directory) / "flows.db")
+        os.environ["FLOW_PERSISTENCE_DB"] = db_path
+        results = {mode: run_thread(mode, args, db_path) for mode in ("full", "delta")}
+
+    print_table({f"{mode} per turn": r["latency"] for mode, r in results.items()})
+    print()
+    for mode, result in results.items():
+        print(
+            f"{mode:<8}{result['total_request_bytes']:>10} request bytes"
+            f"{result['last_request_bytes']:>8} on turn {args.turns}"
+            f"{result['resyncs']:>6} resyncs"
+        )
+    if args.output:
+        write_results(args.output, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+Speculative retrieval: turn latency with knowledge search overlapped with classification.
+
+    .venv/bin/python benchmarks/speculative_retrieval.py --repeat 10 --embedder-latency-ms 80
+
+Runs turns for every route against the fake LLM and embedder (see flow_suite.py)
+with the fast path off, so every turn is classified by the LLM, first with
+speculative retrieval off and then on. Reports per-route turn latency, and
+how much retrieval time the speculative searches took off the critical path.
+The answer cache is off, so every question runs the crew. The fake embedder's
+similarity scores are low, hence the --score-threshold default of 0; with the
+usual 0.7 no passages are found.
+"""
+
+import argparse
+import os
+import tempfile
+from collections import defaultdict
+
+from common import print_table, summarize, write_results
+from flow_suite import ROUTE_MESSAGES, configure, run_turn
+
+
+def run(args):
+    latency = defaultdict(list)
+    for i in range(args.repeat):
+        for messages in ROUTE_MESSAGES.values():
+            result, elapsed = run_turn(messages[i % len(messages)])
+            latency[result["classification"]].append(elapsed)
+    return {route: summarize(samples) for route, samples in latency.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--token-latency-ms", type=float, default=0)
+    parser.add_argument("--embedder-latency-ms", type=float, default=80)
+    parser.add_argument("--score-threshold", type=float, default=0.0)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    os.environ["FAST_PATH_CLASSIFIER"] = "false"
+    os.environ["FAKE_EMBEDDER_LATENCY_MS"] = str(args.embedder_latency_ms)
+    os.environ["KNOWLEDGE_SCORE_THRESHOLD"] = str(args.score_threshold)
+    with tempfile.TemporaryDirectory() as directory:
+        configure(args, directory)
+        from conversational_routing import main as chat
+        from conversational_routing.speculative import SpeculativeRetrieval
+
+        # First turns pay for imports, agent setup and index loading
+        for messages in ROUTE_MESSAGES.values():
+            run_turn(messages[0])
+
+        results = {"off": run(args)}
+        chat.speculative_retrieval = SpeculativeRetrieval.from_env()
+        results["on"] = run(args)
+        stats = chat.speculative_retrieval.summary()
+
+    print_table(
+        {
+            f"{route} ({mode})": summary
+            for mode, routes in results.items()
+            for route, summary in sorted(routes.items())
+        }
+    )
+    print()
+    for route in sorted(results["off"]):
+        saved = results["off"][route]["p50_ms"] - results["on"][route]["p50_ms"]
+        print(f"{route:<28}p50 saved {saved:>8.1f} ms")
+    print(f"stats: {stats}")
+    if args.output:
+        write_results(
+            args.output, {"config": vars(args), "results": results, "stats": stats}
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+"""
+Cold-start import time of the ChatFlow entry points.
+
+    .venv/bin/python benchmarks/startup_time.py --runs 5 --output results/startup.json
+    .venv/bin/python benchmarks/startup_time.py --baseline results/startup.json
+
+Each run imports a module in a fresh interpreter with `python -X importtime`, the
+way a new worker, `kickoff` or `plot` starts. Reports the import time of every
+module and the slowest modules it pulls in, so a new import-time dependency
+shows up here instead of in production cold starts.
+
+With --baseline, p50 import times are compared against an earlier --output file
+and the run fails if any got worse by more than --tolerance.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+from common import print_table, summarize, write_results
+
+MODULES = [
+    "conversational_routing.main",
+    "conversational_routing.server",
+    "conversational_routing.models",
+]
+
+IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(module, env):
+    """Import module in a new interpreter; return cumulative ms of it and its imports."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # Imports are logged as they finish, nested ones first and indented deeper;
+    # keep the block that ends with `module` itself, not interpreter startup
+    times = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORT_TIME.match(line)
+        if not match:
+            continue
+        name, elapsed = match.group(4), int(match.group(2)) / 1000
+        times[name] = elapsed
+        if len(match.group(3)) == 1:
+            if name == module:
+                return times
+            times = {}
+    return times
+
+
+def bench_module(module, runs, env, top):
+    totals = []
+    cumulative = defaultdict(list)
+    for _ in range(runs):
+        times = import_times(module, env)
+        totals.append(times.get(module, 0.0))
+        for name, elapsed in times.items():
+            cumulative[name].append(elapsed)
+    # Top-level packages only, so crewai is not listed next to crewai.flow
+    slowest = sorted(
+        (
+            (name, summarize(values))
+            for name, values in cumulative.items()
+            if name != module
+            and "." not in name.removeprefix("conversational_routing.")
+        ),
+        key=lambda item: item[1]["p50_ms"],
+        reverse=True,
+    )[:top]
+    return {"total": summarize(totals), "slowest": dict(slowest)}
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for module, summary in results["modules"].items():
+        before = baseline.get("modules", {}).get(module)
+        if before and summary["total"]["p50_ms"] > before["total"]["p50_ms"] * (
+            1 + tolerance
+        ):
+            regressions.append(
+                f"{module} p50 {before['total']['p50_ms']:.1f} -> "
+                f"{summary['total']['p50_ms']:.1f} ms"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--output")
+    parser.add_argument("--baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    src = str(Path(__file__).resolve().parent.parent / "src")
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [src, os.getenv("PYTHONPATH")])),
+        "CREWAI_DISABLE_TELEMETRY": os.getenv("CREWAI_DISABLE_TELEMETRY", "true"),
+    }
+
+    modules = {
+        module: bench_module(module, args.runs, env, args.top)
+        for module in args.modules
+    }
+    results = {
+        "config": {
+            "runs": args.runs,
+            "model_family": os.getenv("MODEL_FAMILY", "gemini"),
+            "python": sys.version.split()[0],
+        },
+        "modules": modules,
+    }
+
+    for module, summary in modules.items():
+        print(f"import {module}")
+        print_table(
+            {
+                "total": summary["total"],
+                **{f"  {name}"[:27]: s for name, s in summary["slowest"].items()},
+            }
+        )
+        print()
+    if args.output:
+        write_results(args.output, results)
+
+    if args.baseline:
+        regressions = compare(
+            results, json.loads(Path(args.baseline).read_text()), args.tolerance
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
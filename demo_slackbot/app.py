@@ -2,9 +2,12 @@ import json
 import logging
 import os
 import time
+from functools import lru_cache
 
-import requests
+from crewai_client import CrewAIClient, CrewAIError
 from dotenv import load_dotenv
+from keepalive import KeepAlive
+from session_store import session_store_from_env
 from slack_bolt import App, Assistant
 from slack_bolt.adapter.socket_mode import SocketModeHandler
 from slack_bolt.context.get_thread_context import GetThreadContext
@@ -12,6 +15,7 @@ from slack_bolt.context.say import Say
 from slack_bolt.context.set_status import SetStatus
 from slack_bolt.context.set_suggested_prompts import SetSuggestedPrompts
 from slack_bolt.context.set_title import SetTitle
+from turn_executor import KeyedExecutor
 
 load_dotenv()
 
@@ -22,12 +26,25 @@ logger = logging.getLogger(__name__)
 app = App(token=os.environ.get("SLACK_BOT_TOKEN"))
 assistant = Assistant()
 
-base_url = os.environ.get("CREWAI_BASE_URL")
-bearer_token = os.environ.get("CREWAI_BEARER_TOKEN")
-headers = {"Authorization": f"Bearer {bearer_token}"}
+crewai_client = CrewAIClient.from_env()
 
-conversation_sessions = {}
-conversation_histories = {}
+# CrewAI session id + recent history per {channel}_{thread_ts}, bounded by LRU/TTL
+# (or shared across processes with SLACK_SESSION_STORE=sqlite)
+sessions = session_store_from_env()
+
+# Listeners only validate and enqueue, so Bolt acks and frees its thread at once;
+# turns run here, concurrently across threads and in order within a thread
+turns = KeyedExecutor(max_workers=int(os.environ.get("SLACK_MAX_CONCURRENCY", "32")))
+
+# CREWAI_MODE=local runs ChatFlow in this process and streams the answer into the
+# Slack message as it is generated; the default talks to the deployed crew API
+local_mode = os.environ.get("CREWAI_MODE", "api").lower() == "local"
+# Slack allows roughly one chat.update per second per message
+stream_update_interval = float(os.environ.get("SLACK_STREAM_UPDATE_INTERVAL", "1.0"))
+
+# delta: send only the new message and the flow id, the flow keeps the history
+# full: send the thread's whole (bounded) history with every message
+history_mode = os.environ.get("SLACK_HISTORY_MODE", "delta").lower()
 
 
 def to_mrkdwn(text: str) -> str:
@@ -94,78 +111,107 @@ SUGGESTED_PROMPTS = [
 ]
 
 
-def poll_status(kickoff_id, max_polling_time=60):
-    """Poll the API for the status of a kickoff request."""
-    while max_polling_time > 0:
-        try:
-            url = f"{base_url}/status/{kickoff_id}"
-            logger.debug(f"[API REQUEST] GET {url}")
-            status_response = requests.get(url, headers=headers, timeout=5)
-            logger.debug(
-                f"[API RESPONSE] GET {url} -> {status_response.status_code}: {status_response.text[:200]}"
-            )
-
-            if status_response.ok:
-                status_data = status_response.json()
-                if status_data["state"] == "SUCCESS":
-                    result = json.loads(status_data["result"])
-                    return result
-                elif status_data["state"] == "FAILURE":
-                    logger.error(
-                        f"Kickoff failed: {status_data.get('error', 'Unknown error')}"
-                    )
-                    return None
-            else:
-                logger.error(f"Status check failed: {status_response.text}")
-                return None
-
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Request error during polling: {str(e)}")
-            return None
+@lru_cache(maxsize=1)
+def get_bot_user_id() -> str:
+    """The bot's own user id; looked up once (primed in main) instead of per event."""
+    return app.client.auth_test()["user_id"]
 
-        time.sleep(1)
-        max_polling_time -= 1
 
-    logger.error(
-        "Timeout: The agent did not complete the conversation within the allowed time."
-    )
-    return None
+def turn_inputs(message: str, session: dict) -> dict:
+    """Kickoff inputs for one message, following SLACK_HISTORY_MODE."""
+    inputs = {"current_message": message}
+    if history_mode == "full":
+        if session.get("history"):
+            inputs["conversation_history"] = session["history"]
+    elif session.get("session_id"):
+        inputs["id"] = session["session_id"]
+        inputs["expected_turns"] = session.get("turns", 0)
+    return inputs
 
 
-def submit_message(message, session_id=None, conversation_history=None):
-    """Submit a message to the CrewAI API and poll for the response."""
-    inputs = {"current_message": message}
+def submit_message(inputs):
+    """Submit a turn to the CrewAI API and wait for the response."""
+    try:
+        return crewai_client.run(inputs, timeout=60)
+    except CrewAIError as e:
+        logger.error(str(e))
+        return None
 
-    # if session_id:
-    # inputs["id"] = session_id
 
-    if conversation_history:
-        inputs["conversation_history"] = conversation_history
+def stream_message(client, channel, thread_ts, inputs):
+    """Run the flow in-process, rendering answer tokens with throttled chat.update calls."""
+    from conversational_routing.streaming import stream_chat
 
+    message_ts = None
+    text = ""
+    last_update = 0.0
     try:
-        url = f"{base_url}/kickoff"
-        body = {"inputs": inputs}
-        logger.debug(f"[API REQUEST] POST {url} body={json.dumps(body)}")
-        response = requests.post(url, json=body, headers=headers, timeout=10)
-        logger.debug(
-            f"[API RESPONSE] POST {url} -> {response.status_code}: {response.text[:200]}"
-        )
-
-        if response.ok:
-            kickoff_id = response.json().get("kickoff_id")
-            if kickoff_id:
-                return poll_status(kickoff_id)
-            else:
-                logger.error("No kickoff_id in response")
-                return None
+        for event in stream_chat(inputs):
+            if event.get("done"):
+                result = event
+                break
+            text += event["delta"]
+            now = time.monotonic()
+            if message_ts is None:
+                message_ts = client.chat_postMessage(
+                    channel=channel, thread_ts=thread_ts, text=to_mrkdwn(text)
+                )["ts"]
+                last_update = now
+            elif now - last_update >= stream_update_interval:
+                client.chat_update(channel=channel, ts=message_ts, text=to_mrkdwn(text))
+                last_update = now
         else:
-            logger.error(f"Kickoff request failed: {response.text}")
             return None
-
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Request error during message submission: {str(e)}")
+    except Exception as e:
+        logger.error(f"Streaming run failed: {str(e)}", exc_info=True)
         return None
 
+    if result.get("resync"):
+        return result
+
+    # The final response replaces whatever was streamed (cached answers don't stream)
+    response = result["response"]
+    if message_ts is None:
+        client.chat_postMessage(
+            channel=channel,
+            thread_ts=thread_ts,
+            text=response,
+            blocks=make_blocks(response),
+        )
+    else:
+        client.chat_update(
+            channel=channel, ts=message_ts, text=response, blocks=make_blocks(response)
+        )
+    return result
+
+
+def run_turn(client, channel, thread_ts, inputs):
+    if local_mode:
+        return stream_message(client, channel, thread_ts, inputs)
+    return submit_message(inputs)
+
+
+def get_response(client, channel, thread_ts, message, session):
+    """Answer a message; in local mode the reply is already posted when this returns."""
+    inputs = turn_inputs(message, session)
+    result = run_turn(client, channel, thread_ts, inputs)
+    if result and result.get("resync"):
+        # The flow's state is gone or behind: resend our (bounded) copy of the thread once
+        logger.info(
+            f"Resyncing flow {result['id']}: flow has {result['turns']} turns, "
+            f"thread has {inputs['expected_turns']}"
+        )
+        inputs["resync_history"] = session.get("history", [])
+        result = run_turn(client, channel, thread_ts, inputs)
+        if result and result.get("resync"):
+            logger.error(f"Resync failed for flow {result['id']}")
+            return None
+    if result and result.get("timings"):
+        logger.info(
+            f"Flow {result['id']} turn timings: {json.dumps(result['timings'])}"
+        )
+    return result
+
 
 @assistant.thread_started
 def handle_assistant_thread_started(
@@ -195,11 +241,20 @@ def handle_user_message(
     say: Say,
     set_status: SetStatus,
     set_title: SetTitle,
+    client,
     logger: logging.Logger,
 ):
-    """Handle messages sent to the assistant thread."""
+    """Queue messages sent to the assistant thread."""
+    logger.debug(f"[SLACK EVENT] user_message payload={json.dumps(payload)}")
+    session_key = f"{payload['channel']}_{payload['thread_ts']}"
+    turns.submit(
+        session_key, answer_user_message, payload, say, set_status, set_title, client
+    )
+
+
+def answer_user_message(payload, say, set_status, set_title, client):
+    """Answer one assistant thread message (runs on the turn pool)."""
     try:
-        logger.debug(f"[SLACK EVENT] user_message payload={json.dumps(payload)}")
         channel_id = payload["channel"]
         thread_ts = payload["thread_ts"]
         user_message = payload["text"]
@@ -214,18 +269,21 @@ def handle_user_message(
         )
 
         session_key = f"{channel_id}_{thread_ts}"
-        crewai_session_id = conversation_sessions.get(session_key)
-        history = conversation_histories.get(session_key, [])
-
-        result = submit_message(user_message, crewai_session_id, history)
+        session = sessions.get(session_key) or {}
+        result = get_response(client, channel_id, thread_ts, user_message, session)
 
         if result:
-            conversation_sessions[session_key] = result["id"]
-            history.append({"role": "user", "message": user_message})
-            history.append({"role": "assistant", "message": result["response"]})
-            conversation_histories[session_key] = history
+            history = session.get("history", []) + [
+                {"role": "user", "content": user_message},
+                {"role": "assistant", "content": result["response"]},
+            ]
+            sessions.save(
+                session_key, result["id"], history, turns=session.get("turns", 0) + 1
+            )
+            logger.debug(f"[SESSIONS] {sessions.stats()}")
             set_title(title=user_message[:50])
-            say(text=result["response"], blocks=make_blocks(result["response"]))
+            if not local_mode:
+                say(text=result["response"], blocks=make_blocks(result["response"]))
         else:
             say(
                 text=":warning: Sorry, I encountered an error processing your request. Please try again."
@@ -246,8 +304,7 @@ def handle_thread_replies(event, say, client, logger):
     if event.get("subtype") is not None:
         return
 
-    bot_user_id = client.auth_test()["user_id"]
-    if event.get("user") == bot_user_id:
+    if event.get("user") == get_bot_user_id():
         return
 
     channel = event.get("channel")
@@ -261,78 +318,70 @@ def handle_thread_replies(event, say, client, logger):
     session_key = f"{channel}_{thread_ts}"
 
     # Only respond if this thread already has an active session from a prior mention
-    if session_key not in conversation_sessions:
+    # (or the mention's first turn is still running)
+    if not sessions.has(session_key) and not turns.busy(session_key):
         return
 
     text = event.get("text", "").strip()
     if not text:
         return
 
+    # Replies that mention the bot also arrive as app_mention, which answers them
+    if f"<@{get_bot_user_id()}>" in text:
+        return
+
     logger.debug(f"[SLACK EVENT] thread_reply event={json.dumps(event)}")
+    turns.submit(session_key, answer_in_thread, text, channel, thread_ts, say, client)
 
-    set_channel_status(client, channel, thread_ts, "thinking...")
 
-    crewai_session_id = conversation_sessions.get(session_key)
-    history = conversation_histories.get(session_key, [])
+@app.event("app_mention")
+def handle_mention(event, say, client):
+    """Handle when the bot is mentioned in a channel or thread."""
+    logger.debug(f"[SLACK EVENT] app_mention event={json.dumps(event)}")
+    text = event.get("text", "")
+    channel = event.get("channel")
+    thread_ts = event.get("thread_ts") or event.get("ts")
 
-    result = submit_message(text, crewai_session_id, history)
-    set_channel_status(client, channel, thread_ts)
+    message = text.replace(f"<@{get_bot_user_id()}>", "").strip()
 
-    if result:
-        conversation_sessions[session_key] = result["id"]
-        history.append({"role": "user", "message": text})
-        history.append({"role": "assistant", "message": result["response"]})
-        conversation_histories[session_key] = history
+    if not message:
         say(
-            text=result["response"],
-            blocks=make_blocks(result["response"]),
+            text="Hi! How can I help you with Chase Freedom card benefits?",
             thread_ts=thread_ts,
         )
-    else:
-        say(
-            text=":warning: Sorry, I encountered an error processing your request. Please try again.",
-            thread_ts=thread_ts,
-        )
-
-
-@app.event("app_mention")
-def handle_mention(event, say, client):
-    """Handle when the bot is mentioned in a channel or thread."""
-    try:
-        logger.debug(f"[SLACK EVENT] app_mention event={json.dumps(event)}")
-        text = event.get("text", "")
-        channel = event.get("channel")
-        thread_ts = event.get("thread_ts") or event.get("ts")
+        return
 
-        bot_user_id = client.auth_test()["user_id"]
-        message = text.replace(f"<@{bot_user_id}>", "").strip()
+    session_key = f"{channel}_{thread_ts}"
+    turns.submit(
+        session_key, answer_in_thread, message, channel, thread_ts, say, client
+    )
 
-        if not message:
-            say(
-                text="Hi! How can I help you with Chase Freedom card benefits?",
-                thread_ts=thread_ts,
-            )
-            return
 
+def answer_in_thread(message, channel, thread_ts, say, client):
+    """Answer a mention or thread reply in a channel thread (runs on the turn pool)."""
+    try:
         session_key = f"{channel}_{thread_ts}"
         set_channel_status(client, channel, thread_ts, "thinking...")
 
-        crewai_session_id = conversation_sessions.get(session_key)
-        history = conversation_histories.get(session_key, [])
-
-        result = submit_message(message, crewai_session_id, history)
+        session = sessions.get(session_key) or {}
+        result = get_response(client, channel, thread_ts, message, session)
         set_channel_status(client, channel, thread_ts)
 
         if result:
-            conversation_sessions[session_key] = result["id"]
-            history.append({"role": "user", "message": message})
-            history.append({"role": "assistant", "message": result["response"]})
-            conversation_histories[session_key] = history
-            say(
-                text=result["response"],
-                blocks=make_blocks(result["response"]),
-                thread_ts=thread_ts,
+            history = session.get("history", []) + [
+                {"role": "user", "content": message},
+                {"role": "assistant", "content": result["response"]},
+            ]
+            sessions.save(
+                session_key, result["id"], history, turns=session.get("turns", 0) + 1
             )
+            logger.debug(f"[SESSIONS] {sessions.stats()}")
+            if not local_mode:
+                say(
+                    text=result["response"],
+                    blocks=make_blocks(result["response"]),
+                    thread_ts=thread_ts,
+                )
         else:
             say(
                 text=":warning: Sorry, I encountered an error processing your request. Please try again.",
@@ -340,17 +389,28 @@ def handle_mention(event, say, client):
             )
 
     except Exception as e:
-        logger.error(f"Error handling mention: {str(e)}", exc_info=True)
+        logger.error(f"Error handling message: {str(e)}", exc_info=True)
         say(
             text=":warning: Sorry, I encountered an error processing your request. Please try again.",
-            thread_ts=event.get("thread_ts") or event.get("ts"),
+            thread_ts=thread_ts,
         )
 
 
 def main():
     """Start the Slack bot using Socket Mode."""
+    if local_mode:
+        # Build models, agents and the knowledge index before the first message
+        from conversational_routing.instrumentation import instrumentation
+        from conversational_routing.warmup import warmup
+
+        warmup.start()
+        instrumentation.serve_metrics_from_env()
+    elif os.environ.get("CREWAI_BASE_URL"):
+        KeepAlive.from_env(lambda: crewai_client.inputs(timeout=120)).start()
+
+    bot_user_id = get_bot_user_id()
     handler = SocketModeHandler(app, os.environ.get("SLACK_APP_TOKEN"))
-    logger.info("⚡️ Slack bot is running!")
+    logger.info(f"⚡️ Slack bot is running as {bot_user_id}!")
     handler.start()
 
 
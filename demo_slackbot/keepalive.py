@@ -0,0 +1,96 @@
+"""
+Keeps a CrewAI deployment warm from a single background thread per process.
+
+Each demo ships its own copy so it can be deployed from its own directory;
+keep the copies identical.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+
+class KeepAlive:
+    """
+    Calls `ping` every `interval_seconds` from one daemon thread.
+
+    `poke()` asks for a ping right away, e.g. on a page load because a message
+    is probably coming. Pokes within `min_interval_seconds` of the last ping
+    are dropped, so a burst of page loads costs one request, not one each.
+    """
+
+    def __init__(
+        self,
+        ping,
+        interval_seconds: float = 240,
+        min_interval_seconds: float = 30,
+    ):
+        self.ping = ping
+        self.interval_seconds = interval_seconds
+        self.min_interval_seconds = min_interval_seconds
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._counters = defaultdict(int)
+        self._last_ping = None
+        self._thread = None
+
+    @classmethod
+    def from_env(cls, ping) -> "KeepAlive":
+        return cls(
+            ping,
+            interval_seconds=float(os.getenv("KEEPALIVE_INTERVAL_SECONDS", "240")),
+            min_interval_seconds=float(
+                os.getenv("KEEPALIVE_MIN_INTERVAL_SECONDS", "30")
+            ),
+        )
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="keep-alive", daemon=True
+                )
+                self._thread.start()
+
+    def poke(self):
+        self.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            now = time.monotonic()
+            if (
+                self._last_ping is None
+                or now - self._last_ping >= self.min_interval_seconds
+            ):
+                self._last_ping = now
+                try:
+                    self.ping()
+                    self._incr("pings")
+                except Exception as e:
+                    # Best effort: the next ping or the user's kickoff will tell
+                    logger.debug(f"Keep-alive ping failed: {e}")
+                    self._incr("failures")
+            else:
+                self._incr("skipped_pokes")
+            self._wake.wait(
+                self.interval_seconds if self.interval_seconds > 0 else None
+            )
+            self._wake.clear()
+
+    def _incr(self, key: str):
+        with self._lock:
+            self._counters[key] += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        if self._last_ping is not None:
+            counters["seconds_since_ping"] = round(
+                time.monotonic() - self._last_ping, 1
+            )
+        return counters
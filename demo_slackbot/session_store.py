@@ -0,0 +1,294 @@
+"""
+Per-thread conversation state for the Slack bot: the CrewAI session id and the
+recent message history, keyed by `{channel}_{thread_ts}`.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict
+
+logger = logging.getLogger(__name__)
+
+
+class SessionStore(ABC):
+    """
+    Interface shared by the in-memory and SQLite stores.
+
+    Sessions are dicts with `session_id`, `history` and `turns` (messages
+    answered in the thread, which keeps counting after history is trimmed).
+    `save` keeps only the
+    last `max_history` history entries; sessions not touched for `ttl_seconds`
+    are treated as gone.
+    """
+
+    def __init__(self, ttl_seconds: float = 86400, max_history: int = 20):
+        self.ttl_seconds = ttl_seconds
+        self.max_history = max_history
+        self._counters = defaultdict(int)
+        self._counters_lock = threading.Lock()
+
+    def _incr(self, key: str, value: int = 1):
+        with self._counters_lock:
+            self._counters[key] += value
+
+    def _trim(self, history: list) -> list:
+        if self.max_history and len(history) > self.max_history:
+            self._incr("history_trimmed", len(history) - self.max_history)
+            return list(history[-self.max_history :])
+        return list(history)
+
+    @abstractmethod
+    def get(self, key: str) -> dict | None: ...
+
+    @abstractmethod
+    def save(self, key: str, session_id: str, history: list, turns: int = 0): ...
+
+    @abstractmethod
+    def has(self, key: str) -> bool:
+        """Whether a live session exists, without touching LRU order or counters."""
+
+    def __contains__(self, key: str) -> bool:
+        return self.has(key)
+
+    @abstractmethod
+    def __len__(self) -> int: ...
+
+    def stats(self) -> dict:
+        with self._counters_lock:
+            return {"sessions": len(self), **self._counters}
+
+
+class MemorySessionStore(SessionStore):
+    """
+    LRU + TTL store in process memory.
+
+    Holds at most `max_sessions` sessions and about `max_bytes` of serialized
+    history; the least recently used sessions are evicted first.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 86400,
+        max_history: int = 20,
+    ):
+        super().__init__(ttl_seconds=ttl_seconds, max_history=max_history)
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> (session, size_bytes, last_used)
+        self._sessions = OrderedDict()
+        self._bytes = 0
+
+    def _drop(self, key: str, reason: str):
+        _, size, _ = self._sessions.pop(key)
+        self._bytes -= size
+        self._incr(f"evictions_{reason}")
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry is None:
+                self._incr("misses")
+                return None
+            session, size, last_used = entry
+            now = time.monotonic()
+            if now - last_used > self.ttl_seconds:
+                self._drop(key, "ttl")
+                self._incr("misses")
+                return None
+            # Reads count as use, so the dict stays ordered by last_used
+            self._sessions[key] = (session, size, now)
+            self._sessions.move_to_end(key)
+            self._incr("hits")
+            return {**session, "history": list(session["history"])}
+
+    def has(self, key: str) -> bool:
+        with self._lock:
+            entry = self._sessions.get(key)
+            return entry is not None and time.monotonic() - entry[2] <= self.ttl_seconds
+
+    def save(self, key: str, session_id: str, history: list, turns: int = 0):
+        session = {
+            "session_id": session_id,
+            "history": self._trim(history),
+            "turns": turns,
+        }
+        size = len(key) + len(session_id or "") + len(json.dumps(session["history"]))
+        with self._lock:
+            if key in self._sessions:
+                self._bytes -= self._sessions.pop(key)[1]
+            self._sessions[key] = (session, size, time.monotonic())
+            self._bytes += size
+            self._evict()
+
+    def _evict(self):
+        now = time.monotonic()
+        # get() and save() move entries to the end with a fresh last_used, so
+        # the least recently used are at the front; stop at the first fresh one
+        while self._sessions:
+            key, (_, _, last_used) = next(iter(self._sessions.items()))
+            if now - last_used <= self.ttl_seconds:
+                break
+            self._drop(key, "ttl")
+        while len(self._sessions) > self.max_sessions or (
+            self._bytes > self.max_bytes and len(self._sessions) > 1
+        ):
+            self._drop(next(iter(self._sessions)), "lru")
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "bytes": self._bytes}
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Store backed by a SQLite file, so sessions survive restarts and can be
+    shared by several bot processes on one host (WAL mode, one connection per
+    thread). Expired sessions are purged at most once per `purge_interval`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: float = 86400,
+        max_history: int = 20,
+        purge_interval: float = 300,
+    ):
+        super().__init__(ttl_seconds=ttl_seconds, max_history=max_history)
+        self.path = path
+        self.purge_interval = purge_interval
+        self._local = threading.local()
+        self._last_purge = 0.0
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS slack_sessions (
+                    session_key TEXT PRIMARY KEY,
+                    session_id TEXT,
+                    history_json TEXT NOT NULL,
+                    turns INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS slack_sessions_updated_at "
+                "ON slack_sessions (updated_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> dict | None:
+        now = time.time()
+        with self._connect() as conn:
+            # Reads count as use, as in MemorySessionStore: refresh updated_at
+            refreshed = conn.execute(
+                "UPDATE slack_sessions SET updated_at = ? "
+                "WHERE session_key = ? AND updated_at >= ?",
+                (now, key, now - self.ttl_seconds),
+            ).rowcount
+            row = (
+                conn.execute(
+                    "SELECT session_id, history_json, turns FROM slack_sessions "
+                    "WHERE session_key = ?",
+                    (key,),
+                ).fetchone()
+                if refreshed
+                else None
+            )
+        if row is None:
+            self._incr("misses")
+            return None
+        self._incr("hits")
+        return {"session_id": row[0], "history": json.loads(row[1]), "turns": row[2]}
+
+    def has(self, key: str) -> bool:
+        row = (
+            self._connect()
+            .execute(
+                "SELECT 1 FROM slack_sessions WHERE session_key = ? AND updated_at >= ?",
+                (key, time.time() - self.ttl_seconds),
+            )
+            .fetchone()
+        )
+        return row is not None
+
+    def save(self, key: str, session_id: str, history: list, turns: int = 0):
+        history_json = json.dumps(self._trim(history))
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO slack_sessions (
+                    session_key, session_id, history_json, turns, updated_at
+                ) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(session_key) DO UPDATE SET
+                    session_id = excluded.session_id,
+                    history_json = excluded.history_json,
+                    turns = excluded.turns,
+                    updated_at = excluded.updated_at
+                """,
+                (key, session_id, history_json, turns, now),
+            )
+        if now - self._last_purge > self.purge_interval:
+            self._last_purge = now
+            self.purge()
+
+    def purge(self) -> int:
+        with self._connect() as conn:
+            removed = conn.execute(
+                "DELETE FROM slack_sessions WHERE updated_at < ?",
+                (time.time() - self.ttl_seconds,),
+            ).rowcount
+        self._incr("evictions_ttl", removed)
+        return removed
+
+    def __len__(self) -> int:
+        return (
+            self._connect().execute("SELECT COUNT(*) FROM slack_sessions").fetchone()[0]
+        )
+
+    def stats(self) -> dict:
+        (size,) = (
+            self._connect()
+            .execute(
+                "SELECT COALESCE(SUM(LENGTH(history_json)), 0) FROM slack_sessions"
+            )
+            .fetchone()
+        )
+        return {**super().stats(), "bytes": size}
+
+
+def session_store_from_env() -> SessionStore:
+    """Build the store selected by SLACK_SESSION_STORE (`memory` or `sqlite`)."""
+    ttl_seconds = float(os.environ.get("SLACK_SESSION_TTL", "86400"))
+    max_history = int(os.environ.get("SLACK_SESSION_MAX_HISTORY", "20"))
+    kind = os.environ.get("SLACK_SESSION_STORE", "memory").lower()
+    if kind == "sqlite":
+        path = os.environ.get("SLACK_SESSION_DB", "slack_sessions.db")
+        logger.info(f"Using SQLite session store at {path}")
+        return SQLiteSessionStore(
+            path, ttl_seconds=ttl_seconds, max_history=max_history
+        )
+    return MemorySessionStore(
+        max_sessions=int(os.environ.get("SLACK_SESSION_MAX", "10000")),
+        max_bytes=int(os.environ.get("SLACK_SESSION_MAX_BYTES", str(64 * 1024 * 1024))),
+        ttl_seconds=ttl_seconds,
+        max_history=max_history,
+    )
@@ -0,0 +1,53 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class KeyedExecutor:
+    """
+    Bounded worker pool that runs tasks with the same key one at a time, in order.
+
+    Tasks for different keys (Slack threads) run concurrently on up to
+    `max_workers` threads. A task submitted while its key is busy is queued
+    behind it and runs on the same worker once the earlier ones finish, so two
+    quick messages in one thread never race for that thread's session.
+    """
+
+    def __init__(self, max_workers: int = 32):
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="slack-turn"
+        )
+        self._lock = threading.Lock()
+        self._pending = {}
+
+    def submit(self, key: str, fn, *args, **kwargs):
+        with self._lock:
+            queue = self._pending.get(key)
+            if queue is not None:
+                queue.append((fn, args, kwargs))
+                return
+            self._pending[key] = deque()
+        self._pool.submit(self._drain, key, fn, args, kwargs)
+
+    def busy(self, key: str) -> bool:
+        with self._lock:
+            return key in self._pending
+
+    def _drain(self, key, fn, args, kwargs):
+        while True:
+            try:
+                fn(*args, **kwargs)
+            except Exception:
+                logger.exception(f"Task for {key} failed")
+            with self._lock:
+                queue = self._pending[key]
+                if not queue:
+                    del self._pending[key]
+                    return
+                fn, args, kwargs = queue.popleft()
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
@@ -0,0 +1,198 @@
+"""
+Shared client for the CrewAI kickoff/status API, used by every demo front end.
+
+Each demo ships its own copy so it can be deployed from its own directory;
+keep the copies identical.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+class CrewAIError(Exception):
+    """A kickoff failed, timed out or could not be submitted."""
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class CallMetrics:
+    """Per-call latency samples (bounded) and error counts."""
+
+    def __init__(self, max_samples: int = 1000):
+        self._lock = threading.Lock()
+        self._samples = defaultdict(lambda: deque(maxlen=max_samples))
+        self._errors = defaultdict(int)
+
+    def record(self, name: str, elapsed_ms: float, ok: bool = True):
+        with self._lock:
+            self._samples[name].append(elapsed_ms)
+            if not ok:
+                self._errors[name] += 1
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                name: {
+                    "count": len(samples),
+                    "errors": self._errors[name],
+                    "p50_ms": round(_percentile(samples, 50), 1),
+                    "p99_ms": round(_percentile(samples, 99), 1),
+                }
+                for name, samples in self._samples.items()
+            }
+
+
+class CrewAIClient:
+    """
+    Kickoff/status client over one pooled, keep-alive requests.Session.
+
+    GET calls (/status, /inputs) are retried on connection errors and 5xx with
+    exponential backoff. POST /kickoff is only retried when the connection
+    could not be opened, so a message is never submitted twice. `wait` polls
+    fast at first and backs off with jitter, so short turns return quickly
+    without hammering the API on long ones.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        bearer_token: str,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 10.0,
+        retries: int = 3,
+        pool_size: int = 10,
+        poll_initial: float = 0.25,
+        poll_max: float = 2.0,
+        poll_multiplier: float = 1.5,
+        poll_jitter: float = 0.2,
+    ):
+        self.base_url = (base_url or "").rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.poll_multiplier = poll_multiplier
+        self.poll_jitter = poll_jitter
+        self.metrics = CallMetrics()
+
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=0.3,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"Bearer {bearer_token}"
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @classmethod
+    def from_env(cls) -> "CrewAIClient":
+        return cls(
+            base_url=os.getenv("CREWAI_BASE_URL"),
+            bearer_token=os.getenv("CREWAI_BEARER_TOKEN"),
+            read_timeout=float(os.getenv("CREWAI_READ_TIMEOUT", "10")),
+            retries=int(os.getenv("CREWAI_RETRIES", "3")),
+            pool_size=int(os.getenv("CREWAI_POOL_SIZE", "10")),
+            poll_initial=float(os.getenv("CREWAI_POLL_INITIAL", "0.25")),
+            poll_max=float(os.getenv("CREWAI_POLL_MAX", "2.0")),
+        )
+
+    def _request(self, name: str, method: str, path: str, **kwargs):
+        url = f"{self.base_url}{path}"
+        kwargs.setdefault("timeout", self.timeout)
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = self.session.request(method, url, **kwargs)
+            ok = response.ok
+            logger.debug(
+                f"[API RESPONSE] {method} {url} -> {response.status_code}: {response.text[:200]}"
+            )
+            return response
+        except requests.exceptions.RequestException as e:
+            raise CrewAIError(f"{method} {path} failed: {e}") from e
+        finally:
+            self.metrics.record(name, (time.perf_counter() - started) * 1000, ok)
+
+    def inputs(self, timeout: float = None) -> dict:
+        """GET /inputs; also a cheap way to warm the deployment and the pool."""
+        response = self._request(
+            "inputs", "GET", "/inputs", timeout=timeout or self.timeout
+        )
+        if not response.ok:
+            raise CrewAIError(f"Inputs request failed: {response.text}")
+        return response.json()
+
+    def kickoff(self, inputs: dict, webhooks: dict = None) -> str:
+        body = {"inputs": inputs}
+        if webhooks:
+            body["webhooks"] = webhooks
+        response = self._request("kickoff", "POST", "/kickoff", json=body)
+        if not response.ok:
+            raise CrewAIError(f"Kickoff request failed: {response.text}")
+        kickoff_id = response.json().get("kickoff_id")
+        if not kickoff_id:
+            raise CrewAIError("No kickoff_id in response")
+        return kickoff_id
+
+    def status(self, kickoff_id: str) -> dict:
+        response = self._request("status", "GET", f"/status/{kickoff_id}")
+        if not response.ok:
+            raise CrewAIError(f"Status check failed: {response.text}")
+        return response.json()
+
+    def wait(self, kickoff_id: str, timeout: float = 60) -> dict:
+        """Poll /status until the kickoff settles; return the parsed flow result."""
+        started = time.monotonic()
+        deadline = started + timeout
+        interval = self.poll_initial
+        while True:
+            status = self.status(kickoff_id)
+            if status["state"] == "SUCCESS":
+                self.metrics.record("turn", (time.monotonic() - started) * 1000)
+                result = status["result"]
+                return json.loads(result) if isinstance(result, str) else result
+            if status["state"] == "FAILURE":
+                raise CrewAIError(
+                    f"Kickoff failed: {status.get('error', 'Unknown error')}"
+                )
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise CrewAIError(
+                    "Timeout: The agent did not complete the conversation within the allowed time."
+                )
+            sleep = interval * random.uniform(
+                1 - self.poll_jitter, 1 + self.poll_jitter
+            )
+            time.sleep(min(sleep, remaining))
+            interval = min(interval * self.poll_multiplier, self.poll_max)
+
+    def run(self, inputs: dict, timeout: float = 60) -> dict:
+        """Kick off a turn and wait for its result."""
+        return self.wait(self.kickoff(inputs), timeout=timeout)
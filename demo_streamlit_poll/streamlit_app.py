@@ -1,11 +1,12 @@
 import streamlit as st
-import requests
-import time
-import json
+from crewai_client import CrewAIClient, CrewAIError
+
+
+# Streamlit re-runs this script on every interaction; keep one pooled client
+@st.cache_resource
+def get_client():
+    return CrewAIClient(st.secrets["base_url"], st.secrets["bearer_token"])
 
-base_url = st.secrets["base_url"]
-bearer_token = st.secrets["bearer_token"]
-headers = {"Authorization": f"Bearer {bearer_token}"}
 
 # initialize session state
 
@@ -19,28 +20,6 @@ crew_favicon = "data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAADAAAAAwCAYAAABXAv
 
 # define api methods
 
-def poll_status(kickoff_id):
-    max_polling_time = 30 # seconds
-
-    while max_polling_time > 0: 
-        status_response = requests.get(f"{base_url}/status/{kickoff_id}", headers=headers)
-        if status_response.ok:
-            status_data = status_response.json()
-            if status_data["state"] == "SUCCESS":
-                result = json.loads(status_data["result"])
-                response = result["response"]
-                st.chat_message("crew", avatar=crew_favicon).text(response)
-                
-                st.session_state.crewai_conversation_id = result["id"]
-                return response
-        else:
-            st.error(f"Error: {status_response.text}")
-        time.sleep(1)
-        max_polling_time -= 1
-    
-    if max_polling_time == 0:
-        st.error("Timeout: The agent did not complete the conversation within the allowed time.")
-
 def submit_message(message):
     inputs = {
         "current_message": message,
@@ -48,19 +27,18 @@ def submit_message(message):
 
     if st.session_state.crewai_conversation_id is not None:
         inputs["id"] = st.session_state.crewai_conversation_id
-    
-    response = requests.post(
-        f"{base_url}/kickoff",
-        json={ "inputs": inputs },
-        headers=headers
-    )
-
-    if response.ok:
-        kickoff_id = response.json().get("kickoff_id", "N/A")
-        response = poll_status(kickoff_id)
-        return response
-    else:
-        st.error(f"Error: {response.text}") 
+
+    try:
+        result = get_client().run(inputs, timeout=30)
+    except CrewAIError as e:
+        st.error(f"Error: {e}")
+        return None
+
+    response = result["response"]
+    st.chat_message("crew", avatar=crew_favicon).text(response)
+
+    st.session_state.crewai_conversation_id = result["id"]
+    return response
 
 # render page
 
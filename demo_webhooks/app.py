@@ -3,16 +3,18 @@
 Flask-based chat application with webhook support for CrewAI conversational agents.
 """
 
+import hmac
 import json
 import os
-import queue
 import secrets
-import threading
 import time
 
-import requests
+from crewai_client import CrewAIClient, CrewAIError
 from dotenv import load_dotenv
+from event_broker import event_broker_from_env
 from flask import Flask, Response, jsonify, render_template, request, session
+from keepalive import KeepAlive
+from webhook_consumer import WebhookConsumer
 
 load_dotenv()
 
@@ -21,40 +23,40 @@ app.secret_key = os.getenv("FLASK_SECRET_KEY", secrets.token_hex(32))
 
 # CrewAI API configuration
 BASE_URL = os.getenv("CREWAI_BASE_URL")
-BEARER_TOKEN = os.getenv("CREWAI_BEARER_TOKEN")
 WEBHOOK_BEARER_TOKEN = os.getenv("WEBHOOK_BEARER_TOKEN")
 WEBHOOK_URL_BASE = os.getenv("WEBHOOK_URL_BASE")
-HEADERS = {"Authorization": f"Bearer {BEARER_TOKEN}"}
 
-# Store for webhook responses (in production, use Redis or database)
-webhook_responses = {}
+# One pooled client for the whole app, so kickoffs reuse warm connections
+crewai_client = CrewAIClient.from_env()
 
-# Store for SSE clients (execution_id -> queue)
-sse_clients = {}
+# Webhook events are published per kickoff id and read by the SSE stream, which
+# may run in another worker (EVENT_BROKER=sqlite); unread channels expire after a TTL
+broker = event_broker_from_env()
+
+# Only tokens from the answering agents are streamed to the browser
+STREAMED_AGENT_ROLES = {"Chase Freedom Card Assistant", "Chase Freedom Benefits Expert"}
+
+# SSE comment sent on quiet streams so proxies keep the connection open
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+SSE_TIMEOUT_SECONDS = float(os.getenv("SSE_TIMEOUT_SECONDS", "60"))
+
+WEBHOOK_MAX_BYTES = int(os.getenv("WEBHOOK_MAX_BYTES", str(1024 * 1024)))
+
+
+# Keeps the deployment warm: one thread per worker pings /inputs periodically and
+# right after page loads. This also keeps the pooled connection kickoffs reuse open.
+# A cold deployment can take a while to answer, so each ping gets time to wake it up.
+keep_alive = KeepAlive.from_env(lambda: crewai_client.inputs(timeout=120))
 
 
 @app.route("/")
 def index():
     """Render the chat interface."""
-    # Fire-and-forget warm-up request; no timeout and non-blocking for the route.
     if BASE_URL:
-        threading.Thread(
-            target=_warm_inputs_endpoint,
-            args=(f"{BASE_URL}/inputs",),
-            daemon=True,
-        ).start()
+        keep_alive.poke()
     return render_template("index.html")
 
 
-def _warm_inputs_endpoint(url: str) -> None:
-    try:
-        # Explicitly pass timeout=None to avoid any client-side timeout.
-        requests.get(url, headers=HEADERS, timeout=120)
-    except Exception:
-        # Ignore errors; this is best-effort and should not impact the request.
-        pass
-
-
 @app.route("/api/send_message", methods=["POST"])
 def send_message():
     """
@@ -79,163 +81,172 @@ def send_message():
 
     # Make request to CrewAI with webhook
     try:
-        response = requests.post(
-            f"{BASE_URL}/kickoff",
-            json={
-                "inputs": inputs,
-                "webhooks": {
-                    "events": [
-                        "flow_finished",
-                        "agent_execution_started",
-                        "lite_agent_execution_started",
-                        "knowledge_search_query_started",
-                        "knowledge_query_started",
-                        "crew_kickoff_started",
-                    ],
-                    "url": webhook_url,
-                    "realtime": True,
-                    "authentication": {
-                        "strategy": "bearer",
-                        "token": WEBHOOK_BEARER_TOKEN,
-                    },
+        kickoff_id = crewai_client.kickoff(
+            inputs,
+            webhooks={
+                "events": [
+                    "flow_finished",
+                    "agent_execution_started",
+                    "lite_agent_execution_started",
+                    "knowledge_search_query_started",
+                    "knowledge_query_started",
+                    "crew_kickoff_started",
+                    "llm_stream_chunk",
+                ],
+                "url": webhook_url,
+                "realtime": True,
+                "authentication": {
+                    "strategy": "bearer",
+                    "token": WEBHOOK_BEARER_TOKEN,
                 },
             },
-            headers=HEADERS,
         )
+        return jsonify({"status": "processing", "kickoff_id": kickoff_id})
 
-        if response.ok:
-            kickoff_id = response.json().get("kickoff_id")
-            return jsonify({"status": "processing", "kickoff_id": kickoff_id})
-        else:
-            return jsonify({"error": response.text}), response.status_code
-
+    except CrewAIError as e:
+        return jsonify({"error": str(e)}), 502
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def bearer_authorized() -> bool:
+    """Whether the request carries WEBHOOK_BEARER_TOKEN (always, when it is unset)."""
+    return not WEBHOOK_BEARER_TOKEN or hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {WEBHOOK_BEARER_TOKEN}"
+    )
+
+
 @app.route("/api/webhook", methods=["POST"])
 def webhook():
     """
-    Receive webhook callback from CrewAI when processing is complete.
+    Receive webhook callbacks from CrewAI.
+
+    The batch is only checked and queued here; webhook_consumer handles its
+    events in the background, so CrewAI is answered without waiting on them.
     """
-    data = request.json
+    if not bearer_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    if not request.is_json:
+        return jsonify({"error": "Expected a JSON body"}), 415
+    if (request.content_length or 0) > WEBHOOK_MAX_BYTES:
+        return jsonify({"error": "Batch too large"}), 413
+
+    if not webhook_consumer.submit(request.get_data()):
+        return jsonify({"error": "Webhook queue is full"}), 503
+    return jsonify({"status": "received"}), 200
 
-    # Handle new webhook format with events array
-    events = data.get("events", [])
-
-    for event in events:
-        event_type = event.get("type")
-        execution_id = event.get("execution_id")
-        event_data = event.get("data", {})
-
-        # Process flow_finished events
-        if event_type == "flow_finished":
-            result = event_data.get("result")
-
-            if result:
-                # Parse the result JSON string
-                result_data = json.loads(result)
-
-                final_data = {
-                    "response": result_data.get("response"),
-                    "conversation_id": result_data.get("id"),
-                    "current_agent": result_data.get("current_agent"),
-                    "done": True,
-                }
-
-                # Store the response using execution_id as the key
-                webhook_responses[execution_id] = final_data
-
-                # Push to SSE client if connected
-                if execution_id in sse_clients:
-                    try:
-                        sse_clients[execution_id].put(final_data)
-                    except Exception:
-                        # Client may have disconnected, ignore
-                        pass
-
-        elif event_type == "lite_agent_execution_started":
-            agent_info = event_data.get("agent_info", {})
-            agent_role = agent_info.get("role")
-            status_messages = {
-                "User Prompt Classification Agent": "Understanding the user's message...",
-                "Chase Freedom Card Assistant": "Preparing a response...",
+
+def process_webhook_event(event: dict):
+    """Turn one webhook event into broker events for the SSE streams."""
+    event_type = event.get("type")
+    execution_id = event.get("execution_id")
+    event_data = event.get("data", {})
+
+    # Process flow_finished events
+    if event_type == "flow_finished":
+        result = event_data.get("result")
+
+        if result:
+            # Parse the result JSON string
+            result_data = json.loads(result)
+
+            final_data = {
+                "response": result_data.get("response"),
+                "conversation_id": result_data.get("id"),
+                "current_agent": result_data.get("current_agent"),
+                "timings": result_data.get("timings"),
+                "done": True,
             }
-            status_text = status_messages.get(agent_role)
-            if status_text and execution_id in sse_clients:
-                try:
-                    sse_clients[execution_id].put({"status": status_text})
-                except Exception:
-                    pass
-
-        elif (
-            event_type == "knowledge_query_started"
-            or event_type == "knowledge_search_query_started"
+
+            # Kept until the stream for execution_id reads it, or the TTL passes
+            broker.publish(execution_id, final_data)
+
+    elif event_type == "llm_stream_chunk":
+        # Forward answer tokens as they arrive; the flow_finished event still
+        # carries the full response, which replaces the streamed text
+        chunk = event_data.get("chunk")
+        agent_role = (event_data.get("agent_role") or "").strip()
+        if (
+            chunk
+            and not event_data.get("tool_call")
+            and agent_role in STREAMED_AGENT_ROLES
         ):
-            if execution_id in sse_clients:
-                try:
-                    sse_clients[execution_id].put({"status": "Retrieving knowledge..."})
-                except Exception:
-                    pass
-
-        elif event_type == "agent_execution_started":
-            if execution_id in sse_clients:
-                try:
-                    sse_clients[execution_id].put(
-                        {"status": "Drafting a response using knowledge..."}
-                    )
-                except Exception:
-                    pass
-
-        elif event_type == "crew_kickoff_started":
-            if execution_id in sse_clients:
-                try:
-                    sse_clients[execution_id].put(
-                        {"status": "Picked the right Crew to respond..."}
-                    )
-                except Exception:
-                    pass
+            broker.publish(execution_id, {"delta": chunk})
+
+    elif event_type == "lite_agent_execution_started":
+        agent_info = event_data.get("agent_info", {})
+        agent_role = agent_info.get("role")
+        status_messages = {
+            "User Prompt Classification Agent": "Understanding the user's message...",
+            "Chase Freedom Card Assistant": "Preparing a response...",
+        }
+        status_text = status_messages.get(agent_role)
+        if status_text:
+            broker.publish(execution_id, {"status": status_text})
+
+    elif (
+        event_type == "knowledge_query_started"
+        or event_type == "knowledge_search_query_started"
+    ):
+        broker.publish(execution_id, {"status": "Retrieving knowledge..."})
+
+    elif event_type == "agent_execution_started":
+        broker.publish(
+            execution_id, {"status": "Drafting a response using knowledge..."}
+        )
 
-    return jsonify({"status": "received"}), 200
+    elif event_type == "crew_kickoff_started":
+        broker.publish(execution_id, {"status": "Picked the right Crew to respond..."})
+
+
+# Started lazily by the first webhook, so each gunicorn worker runs its own
+webhook_consumer = WebhookConsumer(
+    process_webhook_event,
+    # Idempotency keys live in the broker, shared by the workers using it
+    claim=broker.claim,
+    max_queue=int(os.getenv("WEBHOOK_QUEUE_SIZE", "10000")),
+)
 
 
 @app.route("/api/stream/<kickoff_id>")
 def stream(kickoff_id):
     """
     Server-Sent Events endpoint for real-time webhook results.
-    """
 
-    def event_stream():
-        # Create a queue for this client
-        client_queue = queue.Queue()
-        sse_clients[kickoff_id] = client_queue
-        deadline = time.time() + 60
-
-        try:
-            # Check if final result already exists (webhook arrived before SSE connection)
-            if kickoff_id in webhook_responses:
-                response_data = webhook_responses.pop(kickoff_id)
-                yield f"data: {json.dumps(response_data)}\n\n"
-                return
-
-            # Loop until we receive a done event or timeout
-            while time.time() < deadline:
-                remaining = deadline - time.time()
-                try:
-                    response_data = client_queue.get(timeout=min(remaining, 5))
-                    yield f"data: {json.dumps(response_data)}\n\n"
-                    if response_data.get("done"):
-                        return
-                except queue.Empty:
-                    pass
-
-            yield f"data: {json.dumps({'error': 'Timeout waiting for response'})}\n\n"
-        finally:
-            # Clean up
-            if kickoff_id in sse_clients:
-                del sse_clients[kickoff_id]
-
-    response = Response(event_stream(), mimetype="text/event-stream")
+    Any number of streams can follow one kickoff. Every event carries its broker
+    sequence number as the SSE id, so a reconnecting EventSource resumes after
+    the last event it received (Last-Event-ID).
+    """
+    try:
+        last_seq = int(request.headers.get("Last-Event-ID") or 0)
+    except ValueError:
+        # Not one of our ids: replay the stream from the start
+        last_seq = 0
+
+    def event_stream(last_seq):
+        deadline = time.time() + SSE_TIMEOUT_SECONDS
+        # Events published before the connection opened are replayed from the broker
+        yield "retry: 1000\n\n"
+
+        # Loop until we receive a done event or timeout
+        while time.time() < deadline:
+            remaining = deadline - time.time()
+            events = broker.read(
+                kickoff_id,
+                after=last_seq,
+                timeout=min(remaining, SSE_HEARTBEAT_SECONDS),
+            )
+            if not events:
+                yield ": keep-alive\n\n"
+            for seq, response_data in events:
+                last_seq = seq
+                yield f"id: {seq}\ndata: {json.dumps(response_data)}\n\n"
+                if response_data.get("done"):
+                    return
+
+        yield f"data: {json.dumps({'error': 'Timeout waiting for response'})}\n\n"
+
+    response = Response(event_stream(last_seq), mimetype="text/event-stream")
     response.headers["Cache-Control"] = "no-cache"
     response.headers["X-Accel-Buffering"] = "no"
     return response
@@ -254,6 +265,21 @@ def update_session():
     return jsonify({"error": "conversation_id required"}), 400
 
 
+@app.route("/api/metrics")
+def metrics():
+    """Latency and error counts of the calls made to the CrewAI API."""
+    if not bearer_authorized():
+        return jsonify({"error": "Unauthorized"}), 401
+    return jsonify(
+        {
+            **crewai_client.metrics.summary(),
+            "broker": broker.stats(),
+            "webhooks": webhook_consumer.metrics(),
+            "keep_alive": keep_alive.metrics(),
+        }
+    )
+
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 5000))
     debug = os.getenv("FLASK_DEBUG", "False").lower() == "true"
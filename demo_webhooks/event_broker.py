@@ -0,0 +1,350 @@
+"""
+Event brokers between the webhook receiver and the SSE streams.
+
+Webhook callbacks for a kickoff can land on any worker, and the browser's SSE
+connection may be held by another one. Every event is published to a channel
+named after the kickoff id, and stream readers fetch everything after the last
+sequence number they have seen, so any number of tabs can follow one kickoff
+and a reconnecting stream resumes where it stopped. Each channel keeps at most
+`max_events` events, and channels are evicted `ttl_seconds` after their last
+event.
+
+Brokers also hold the idempotency keys of webhook events (`claim`), so a
+redelivered event is handled once even when it lands on another worker.
+
+Readers block on a per-channel condition rather than polling, so an idle
+stream costs nothing until an event arrives; under gunicorn's gevent worker
+threading is monkey-patched and these waits yield to other greenlets.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, defaultdict, deque
+
+logger = logging.getLogger(__name__)
+
+
+class EventBroker(ABC):
+    """
+    Interface shared by the in-memory and SQLite brokers.
+
+    `read` returns `(seq, event)` pairs published to `channel` after `after`,
+    waiting up to `timeout` seconds for the first one. `claim(key)` is True
+    only the first time `key` is claimed, across every process sharing the
+    broker; keys are kept for at least `ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 300,
+        sweep_interval: float = 30,
+        max_events: int = 2000,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.sweep_interval = sweep_interval
+        self.max_events = max_events
+        self._last_sweep = 0.0
+        self._counters = defaultdict(int)
+        self._counters_lock = threading.Lock()
+
+    def _incr(self, key: str, value: int = 1):
+        with self._counters_lock:
+            self._counters[key] += value
+
+    def _maybe_sweep(self):
+        now = time.time()
+        if now - self._last_sweep > self.sweep_interval:
+            self._last_sweep = now
+            expired = self.expire(now - self.ttl_seconds)
+            if expired:
+                self._incr("expired_events", expired)
+                logger.info(f"Evicted {expired} undelivered events")
+
+    @abstractmethod
+    def publish(self, channel: str, event: dict) -> int: ...
+
+    @abstractmethod
+    def read(self, channel: str, after: int = 0, timeout: float = 5) -> list: ...
+
+    @abstractmethod
+    def discard(self, channel: str): ...
+
+    @abstractmethod
+    def claim(self, key: str) -> bool: ...
+
+    @abstractmethod
+    def expire(self, cutoff: float) -> int:
+        """Drop channels last published to before `cutoff`; return the events dropped."""
+
+    def stats(self) -> dict:
+        with self._counters_lock:
+            return dict(self._counters)
+
+
+class MemoryEventBroker(EventBroker):
+    """Broker for a single worker process; each channel is a ring buffer."""
+
+    def __init__(self, max_keys: int = 100000, **kwargs):
+        super().__init__(**kwargs)
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._seq = 0
+        # channel -> {"events": deque of (seq, event), "updated_at", "changed"}
+        self._channels = {}
+        # claimed key -> claimed at, oldest first
+        self._claimed = OrderedDict()
+
+    def _channel(self, channel: str) -> dict:
+        entry = self._channels.get(channel)
+        if entry is None:
+            entry = self._channels[channel] = {
+                "events": deque(maxlen=self.max_events),
+                "updated_at": time.time(),
+                "changed": threading.Condition(self._lock),
+            }
+        return entry
+
+    def publish(self, channel: str, event: dict) -> int:
+        with self._lock:
+            self._seq += 1
+            entry = self._channel(channel)
+            entry["events"].append((self._seq, event))
+            entry["updated_at"] = time.time()
+            entry["changed"].notify_all()
+            seq = self._seq
+        self._incr("published")
+        self._maybe_sweep()
+        return seq
+
+    def read(self, channel: str, after: int = 0, timeout: float = 5) -> list:
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while True:
+                entry = self._channel(channel)
+                events = [e for e in entry["events"] if e[0] > after]
+                remaining = deadline - time.monotonic()
+                if events or remaining <= 0:
+                    break
+                entry["changed"].wait(remaining)
+        self._incr("delivered", len(events))
+        return events
+
+    def discard(self, channel: str):
+        with self._lock:
+            self._channels.pop(channel, None)
+
+    def claim(self, key: str) -> bool:
+        now = time.time()
+        with self._lock:
+            if key in self._claimed:
+                return False
+            self._claimed[key] = now
+            # Only the newest max_keys are kept, but never ones within ttl_seconds
+            while len(self._claimed) > self.max_keys:
+                oldest, claimed_at = next(iter(self._claimed.items()))
+                if now - claimed_at <= self.ttl_seconds:
+                    break
+                del self._claimed[oldest]
+            return True
+
+    def expire(self, cutoff: float) -> int:
+        with self._lock:
+            expired = [
+                channel
+                for channel, entry in self._channels.items()
+                if entry["updated_at"] < cutoff
+            ]
+            return sum(
+                len(self._channels.pop(channel)["events"]) for channel in expired
+            )
+
+    def stats(self) -> dict:
+        with self._lock:
+            channels = len(self._channels)
+        return {**super().stats(), "channels": channels}
+
+
+class SQLiteEventBroker(EventBroker):
+    """
+    Broker shared by every worker process on one host through a SQLite file
+    (WAL mode, one connection per thread).
+
+    Each channel is trimmed back to `max_events` after every `max_events // 10`
+    publishes to it from this process, so it briefly holds up to that many
+    extra events per worker.
+
+    Publishes from this process wake its readers at once. Events published by
+    other workers are picked up by polling, starting at `poll_interval` and
+    backing off to `max_poll_interval` while the channel stays quiet.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        poll_interval: float = 0.05,
+        max_poll_interval: float = 1.0,
+        **kwargs,
+    ):
+        super().__init__(**kwargs)
+        self.path = path
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # channel -> [Condition, readers], only for channels with readers waiting here
+        self._waiting = {}
+        # channel -> publishes from this process since it was last trimmed
+        self._untrimmed = defaultdict(int)
+        self._trim_every = max(1, self.max_events // 10)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS webhook_events (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    channel TEXT NOT NULL,
+                    event_json TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS webhook_events_channel "
+                "ON webhook_events (channel, seq)"
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS webhook_keys (
+                    key TEXT PRIMARY KEY,
+                    claimed_at REAL NOT NULL
+                )
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def publish(self, channel: str, event: dict) -> int:
+        with self._connect() as conn:
+            seq = conn.execute(
+                "INSERT INTO webhook_events (channel, event_json, created_at) "
+                "VALUES (?, ?, ?)",
+                (channel, json.dumps(event), time.time()),
+            ).lastrowid
+            # Trimming walks max_events index entries, so batch it per channel
+            with self._lock:
+                self._untrimmed[channel] += 1
+                trim = self._untrimmed[channel] >= self._trim_every
+                if trim:
+                    del self._untrimmed[channel]
+            if trim:
+                self._trim(conn, channel)
+        with self._lock:
+            waiting = self._waiting.get(channel)
+            if waiting is not None:
+                waiting[0].notify_all()
+        self._incr("published")
+        self._maybe_sweep()
+        return seq
+
+    def _trim(self, conn: sqlite3.Connection, channel: str):
+        # Keep the channel a ring buffer of its newest max_events events
+        conn.execute(
+            """
+            DELETE FROM webhook_events WHERE channel = ? AND seq <= (
+                SELECT seq FROM webhook_events WHERE channel = ?
+                ORDER BY seq DESC LIMIT 1 OFFSET ?
+            )
+            """,
+            (channel, channel, self.max_events),
+        )
+
+    def read(self, channel: str, after: int = 0, timeout: float = 5) -> list:
+        deadline = time.monotonic() + timeout
+        conn = self._connect()
+        interval = self.poll_interval
+        while True:
+            rows = conn.execute(
+                "SELECT seq, event_json FROM webhook_events "
+                "WHERE channel = ? AND seq > ? ORDER BY seq",
+                (channel, after),
+            ).fetchall()
+            remaining = deadline - time.monotonic()
+            if rows or remaining <= 0:
+                break
+            with self._lock:
+                waiting = self._waiting.setdefault(
+                    channel, [threading.Condition(self._lock), 0]
+                )
+                waiting[1] += 1
+                waiting[0].wait(min(interval, remaining))
+                waiting[1] -= 1
+                if not waiting[1]:
+                    del self._waiting[channel]
+            interval = min(interval * 2, self.max_poll_interval)
+        self._incr("delivered", len(rows))
+        return [(seq, json.loads(event_json)) for seq, event_json in rows]
+
+    def discard(self, channel: str):
+        with self._lock:
+            self._untrimmed.pop(channel, None)
+        with self._connect() as conn:
+            conn.execute("DELETE FROM webhook_events WHERE channel = ?", (channel,))
+
+    def claim(self, key: str) -> bool:
+        with self._connect() as conn:
+            return (
+                conn.execute(
+                    "INSERT OR IGNORE INTO webhook_keys (key, claimed_at) VALUES (?, ?)",
+                    (key, time.time()),
+                ).rowcount
+                == 1
+            )
+
+    def expire(self, cutoff: float) -> int:
+        # A channel expires as a whole, once its newest event is older than cutoff.
+        # Trim counts restart too, so those of gone channels don't pile up
+        with self._lock:
+            self._untrimmed.clear()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM webhook_keys WHERE claimed_at < ?", (cutoff,))
+            return conn.execute(
+                """
+                DELETE FROM webhook_events WHERE channel IN (
+                    SELECT channel FROM webhook_events
+                    GROUP BY channel HAVING MAX(created_at) < ?
+                )
+                """,
+                (cutoff,),
+            ).rowcount
+
+    def stats(self) -> dict:
+        (channels,) = (
+            self._connect()
+            .execute("SELECT COUNT(DISTINCT channel) FROM webhook_events")
+            .fetchone()
+        )
+        return {**super().stats(), "channels": channels}
+
+
+def event_broker_from_env() -> EventBroker:
+    """Build the broker selected by EVENT_BROKER (`memory` or `sqlite`)."""
+    settings = {
+        "ttl_seconds": float(os.getenv("EVENT_BROKER_TTL", "300")),
+        "max_events": int(os.getenv("EVENT_BROKER_MAX_EVENTS", "2000")),
+    }
+    if os.getenv("EVENT_BROKER", "memory").lower() == "sqlite":
+        path = os.getenv("EVENT_BROKER_DB", "webhook_events.db")
+        logger.info(f"Using SQLite event broker at {path}")
+        return SQLiteEventBroker(path, **settings)
+    return MemoryEventBroker(**settings)
@@ -0,0 +1,101 @@
+"""
+Background processing of webhook batches.
+
+`/api/webhook` only checks the request and hands the raw body to a
+WebhookConsumer, so CrewAI never waits on our event handling. One consumer
+thread per worker parses each batch and passes its events, in order, to the
+handler. Webhook retries can redeliver events, to any worker; an event is
+handled once per `(execution_id, seq)` key, claimed through `claim` (the
+event broker's, so every worker sharing the broker sees the same keys).
+"""
+
+import hashlib
+import json
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from crewai_client import CallMetrics
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookConsumer:
+    def __init__(self, handler, claim, max_queue: int = 10000):
+        self.handler = handler
+        self.claim = claim
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._counters = defaultdict(int)
+        self._lock = threading.Lock()
+        self._latency = CallMetrics()
+        self._thread = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="webhook-consumer", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, body: bytes) -> bool:
+        """Queue a raw batch; False when the queue is full."""
+        self.start()
+        try:
+            self._queue.put_nowait((body, time.monotonic()))
+        except queue.Full:
+            self._incr("rejected_batches")
+            return False
+        return True
+
+    def _incr(self, key: str, value: int = 1):
+        with self._lock:
+            self._counters[key] += value
+
+    @staticmethod
+    def _event_key(event: dict) -> str:
+        seq = event.get("seq", event.get("id"))
+        if seq is None:
+            # No sequence from the sender: fall back to the event's content
+            seq = hashlib.sha1(
+                json.dumps(event, sort_keys=True, default=str).encode()
+            ).hexdigest()
+        return json.dumps([event.get("execution_id"), seq], default=str)
+
+    def _first_delivery(self, event: dict) -> bool:
+        return self.claim(self._event_key(event))
+
+    def _run(self):
+        while True:
+            body, received_at = self._queue.get()
+            self._latency.record("queue_wait", (time.monotonic() - received_at) * 1000)
+            try:
+                events = json.loads(body).get("events", [])
+            except (ValueError, AttributeError) as e:
+                logger.warning(f"Dropping malformed webhook batch: {e}")
+                self._incr("malformed_batches")
+                continue
+
+            for event in events:
+                if not self._first_delivery(event):
+                    self._incr("duplicate_events")
+                    continue
+                try:
+                    self.handler(event)
+                    self._incr("processed_events")
+                except Exception:
+                    logger.exception(f"Webhook event {event.get('type')} failed")
+                    self._incr("failed_events")
+            self._incr("processed_batches")
+            self._latency.record("lag", (time.monotonic() - received_at) * 1000)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            "queue_depth": self._queue.qsize(),
+            **counters,
+            **self._latency.summary(),
+        }
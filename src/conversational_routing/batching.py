@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+from conversational_routing.stats import Counters
+
+
+class _Pending:
+    __slots__ = ("item", "done", "result", "error", "submitted_at")
+
+    def __init__(self, item: Any):
+        self.item = item
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.submitted_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """
+    Groups concurrent requests into batches for one call.
+
+    `submit(item)` blocks its caller until the item's result is ready. A
+    dispatcher thread collects items until `max_batch` are waiting or the first
+    of them has waited `max_wait_ms`, then hands the batch to
+    `process(items) -> results` on a pool of `max_concurrent_batches` threads,
+    so the next batch collects while the previous one is processed. If
+    `process` raises, every caller in the batch gets the exception.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[List[Any]], List[Any]],
+        max_batch: int = 16,
+        max_wait_ms: float = 10,
+        max_concurrent_batches: int = 8,
+        name: str = "micro_batcher",
+    ):
+        self.process = process
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.stats = Counters(name)
+        self._pending: List[_Pending] = []
+        self._condition = threading.Condition()
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_concurrent_batches, thread_name_prefix=name
+        )
+        self._dispatcher: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls, process, prefix: str, name: str) -> "MicroBatcher":
+        """Settings from {prefix}_MAX_SIZE, {prefix}_MAX_WAIT_MS and {prefix}_CONCURRENCY."""
+        return cls(
+            process,
+            max_batch=int(os.getenv(f"{prefix}_MAX_SIZE", "16")),
+            max_wait_ms=float(os.getenv(f"{prefix}_MAX_WAIT_MS", "10")),
+            max_concurrent_batches=int(os.getenv(f"{prefix}_CONCURRENCY", "8")),
+            name=name,
+        )
+
+    def submit(self, item: Any) -> Any:
+        pending = _Pending(item)
+        with self._condition:
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(
+                    target=self._dispatch,
+                    name=f"{self.stats.name}-dispatch",
+                    daemon=True,
+                )
+                self._dispatcher.start()
+            self._pending.append(pending)
+            self._condition.notify()
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _dispatch(self):
+        while True:
+            with self._condition:
+                while not self._pending:
+                    self._condition.wait()
+                deadline = self._pending[0].submitted_at + self.max_wait_ms / 1000
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._pending[: self.max_batch]
+                del self._pending[: self.max_batch]
+            self._pool.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: List[_Pending]):
+        started = time.perf_counter()
+        self.stats.incr("batches")
+        self.stats.incr("items", len(batch))
+        self.stats.incr(
+            "wait_ms", sum((started - p.submitted_at) * 1000 for p in batch)
+        )
+        try:
+            results = self.process([p.item for p in batch])
+            if len(results) != len(batch):
+                raise ValueError(
+                    f"Batch of {len(batch)} items returned {len(results)} results"
+                )
+        except BaseException as e:
+            self.stats.incr("failed_batches")
+            for pending in batch:
+                pending.error = e
+                pending.done.set()
+            return
+        for pending, result in zip(batch, results):
+            pending.result = result
+            pending.done.set()
+
+    def summary(self) -> dict:
+        """Counters plus mean batch size and queueing delay, for operators."""
+        stats = self.stats.snapshot()
+        batches = stats.get("batches", 0)
+        items = stats.get("items", 0)
+        stats["mean_batch_size"] = items / batches if batches else 0.0
+        stats["mean_wait_ms"] = stats.get("wait_ms", 0) / items if items else 0.0
+        return stats
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Optional
+
+import numpy as np
+
+from conversational_routing.knowledge_index import KNOWLEDGE_DIRECTORY
+from conversational_routing.stats import Counters
+
+logger = logging.getLogger(__name__)
+
+KNOWLEDGE_PATH = KNOWLEDGE_DIRECTORY / "freedom_benefits.pdf"
+
+
+def normalize_message(message: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    return " ".join(re.sub(r"[^\w\s]", " ", message.lower()).split())
+
+
+def history_fingerprint(
+    conversation_history: List[dict], turns: int, summary: str = ""
+) -> str:
+    """
+    Hash the conversation summary and the last `turns` history entries, the
+    parts of the conversation that can change the answer.
+    """
+    relevant = []
+    if conversation_history and turns > 0:
+        relevant = [
+            (entry.get("role"), normalize_message(str(entry.get("content", ""))))
+            for entry in conversation_history[-turns:]
+        ]
+    summary = normalize_message(summary)
+    if not relevant and not summary:
+        return ""
+    payload = json.dumps([summary, relevant])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class CacheEntry(NamedTuple):
+    key: str
+    history: str
+    embedding: Optional[np.ndarray]
+    answer: str
+    created_at: float
+    compute_ms: float
+    size: int
+
+
+class SemanticCache:
+    """
+    Response cache for the respond_to_question route.
+
+    Entries are keyed by the normalized message plus a fingerprint of the
+    conversation summary and recent history. Lookups try an exact hash match first and then the nearest cached
+    embedding with the same history fingerprint, accepted above `threshold`.
+    Eviction is LRU under a byte budget plus a per-entry TTL; the whole cache is
+    dropped when the knowledge file changes.
+    """
+
+    def __init__(
+        self,
+        embed: Optional[Callable[[List[str]], np.ndarray]] = None,
+        threshold: float = 0.92,
+        ttl_seconds: float = 3600,
+        max_bytes: int = 16 * 1024 * 1024,
+        history_turns: int = 2,
+        knowledge_path: Path = KNOWLEDGE_PATH,
+    ):
+        self.embed = embed
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.history_turns = history_turns
+        self.knowledge_path = Path(knowledge_path)
+        self.stats = Counters("answer_cache")
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._knowledge_version = self._current_knowledge_version()
+        if self._knowledge_version is None:
+            logger.warning(
+                f"Knowledge file {self.knowledge_path} not found; cached answers "
+                "will not be invalidated when the knowledge changes"
+            )
+
+    @classmethod
+    def from_env(cls) -> "SemanticCache":
+        # The semantic tier embeds every question, hit or miss: one extra
+        # embedding call on the request path, so it is opt-in
+        embed = None
+        if os.getenv("ANSWER_CACHE_SEMANTIC", "false").lower() == "true":
+            from conversational_routing.embeddings import embed
+        return cls(
+            embed=embed,
+            threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92")),
+            ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600")),
+            max_bytes=int(os.getenv("ANSWER_CACHE_MAX_BYTES", str(16 * 1024 * 1024))),
+            history_turns=int(os.getenv("ANSWER_CACHE_HISTORY_TURNS", "2")),
+        )
+
+    def _current_knowledge_version(self):
+        try:
+            stat = self.knowledge_path.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _check_knowledge(self) -> None:
+        version = self._current_knowledge_version()
+        if version != self._knowledge_version:
+            self._entries.clear()
+            self._bytes = 0
+            self._knowledge_version = version
+            self.stats.incr("invalidations")
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _expire(self, now: float) -> None:
+        expired = [
+            k for k, e in self._entries.items() if now - e.created_at > self.ttl_seconds
+        ]
+        for key in expired:
+            self._remove(key)
+        if expired:
+            self.stats.incr("expirations", len(expired))
+
+    def _embed_one(self, message: str) -> Optional[np.ndarray]:
+        if self.embed is None:
+            return None
+        try:
+            return self.embed([message])[0]
+        except Exception:
+            # A failing embedder only costs us the semantic tier
+            self.stats.incr("embedding_errors")
+            return None
+
+    def make_key(
+        self, message: str, conversation_history: List[dict], summary: str = ""
+    ):
+        history = history_fingerprint(conversation_history, self.history_turns, summary)
+        normalized = normalize_message(message)
+        key = hashlib.sha256(f"{history}|{normalized}".encode("utf-8")).hexdigest()
+        return key, history, normalized
+
+    def get(
+        self, message: str, conversation_history: List[dict], summary: str = ""
+    ) -> Optional[str]:
+        key, history, normalized = self.make_key(message, conversation_history, summary)
+        now = time.time()
+
+        with self._lock:
+            self._check_knowledge()
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._record_hit("exact_hits", entry)
+                return entry.answer
+            candidates = [
+                e
+                for e in self._entries.values()
+                if e.history == history and e.embedding is not None
+            ]
+
+        if not candidates:
+            self.stats.incr("misses")
+            return None
+
+        # Embedding happens outside the lock; it is a provider round trip
+        query = self._embed_one(normalized)
+        if query is None:
+            self.stats.incr("misses")
+            return None
+
+        matrix = np.stack([e.embedding for e in candidates])
+        scores = matrix @ query
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            self.stats.incr("misses")
+            return None
+
+        entry = candidates[best]
+        with self._lock:
+            if entry.key in self._entries:
+                self._entries.move_to_end(entry.key)
+        self._record_hit("semantic_hits", entry)
+        return entry.answer
+
+    def _record_hit(self, kind: str, entry: CacheEntry) -> None:
+        self.stats.incr(kind)
+        self.stats.incr("latency_saved_ms", entry.compute_ms)
+
+    def put(
+        self,
+        message: str,
+        conversation_history: List[dict],
+        answer: str,
+        compute_ms: float = 0.0,
+        summary: str = "",
+    ) -> None:
+        key, history, normalized = self.make_key(message, conversation_history, summary)
+        embedding = self._embed_one(normalized)
+        size = (
+            len(answer.encode("utf-8"))
+            + len(key)
+            + (embedding.nbytes if embedding is not None else 0)
+        )
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            self._check_knowledge()
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CacheEntry(
+                key, history, embedding, answer, time.time(), compute_ms, size
+            )
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.stats.incr("evictions")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def summary(self) -> dict:
+        """Counters plus current size, for operators."""
+        stats = self.stats.snapshot()
+        hits = stats.get("exact_hits", 0) + stats.get("semantic_hits", 0)
+        lookups = hits + stats.get("misses", 0)
+        with self._lock:
+            stats.update(entries=len(self._entries), bytes=self._bytes)
+        stats["hit_rate"] = hits / lookups if lookups else 0.0
+        return stats
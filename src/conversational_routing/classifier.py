@@ -0,0 +1,256 @@
+import json
+import math
+import os
+import re
+import zlib
+from typing import Any, Dict, List, Literal, NamedTuple, Optional
+
+from pydantic import BaseModel
+
+from conversational_routing.stats import Counters
+
+LABELS = ("pleasantries", "question", "non-chase-question")
+
+# Whole-message greetings, thanks and goodbyes - these never need an LLM
+PLEASANTRY_PATTERN = re.compile(
+    r"^\s*(hi|hello|hey|hiya|yo|howdy|greetings|good (morning|afternoon|evening|day)"
+    r"|thanks?( a lot| so much| you( so much| very much)?)?|thank you|thx|ty|cheers"
+    r"|bye|goodbye|see you|see ya|ok(ay)?|cool|great|awesome|nice|perfect|got it"
+    r"|how are you( doing)?|what'?s up)"
+    r"([\s,!.?:;)]+(there|again|bot|assistant|all|everyone))?[\s,!.?:;)(]*$",
+    re.IGNORECASE,
+)
+
+# Phrases that only show up in Chase Freedom benefit questions
+CARD_BENEFIT_PATTERN = re.compile(
+    r"\b(chase freedom|freedom (credit )?card|card ?member|auto rental collision"
+    r"|collision damage waiver|purchase protection|extended warranty protection"
+    r"|travel and emergency assistance|trip cancell?ation( and|/) ?interruption)\b",
+    re.IGNORECASE,
+)
+
+# Benefit terms that are also everyday words ("benefits of meditation", "my phone's
+# warranty"); they only count as a card question next to a reference to the card
+BENEFIT_TERM_PATTERN = re.compile(
+    r"\b(benefits?|auto rental|rental cars?|car rental|collision damage|warranty"
+    r"|roadside|emergency assistance|trip cancell?ation|trip interruption|coverage"
+    r"|cover(ed|s)?|claims?|reimburse(ment)?)\b",
+    re.IGNORECASE,
+)
+CARD_CONTEXT_PATTERN = re.compile(
+    r"\b(chase|freedom|(my|this|the|your) (credit )?card)\b", re.IGNORECASE
+)
+
+# Seed transcripts for the centroid model; extend with FAST_PATH_EXAMPLES (JSONL
+# file with {"message": ..., "label": ...} lines exported from real conversations)
+SEED_EXAMPLES = [
+    ("Hello!", "pleasantries"),
+    ("Hi there, how are you today?", "pleasantries"),
+    ("Good morning", "pleasantries"),
+    ("Thanks, that was helpful", "pleasantries"),
+    ("Thank you so much for your help!", "pleasantries"),
+    ("Great, have a nice day", "pleasantries"),
+    ("Bye for now", "pleasantries"),
+    ("Nice to meet you", "pleasantries"),
+    ("Who are you?", "pleasantries"),
+    ("Hey, I need some help", "pleasantries"),
+    ("What are the coverage limits?", "question"),
+    ("Is there an extended warranty protection?", "question"),
+    ("Tell me about benefits", "question"),
+    ("Does my card cover rental cars?", "question"),
+    ("How do I file a claim for a stolen purchase?", "question"),
+    ("What does purchase protection cover?", "question"),
+    ("Is roadside assistance included?", "question"),
+    ("Am I covered if my trip gets cancelled?", "question"),
+    ("What are the travel benefits?", "question"),
+    ("How long is the warranty extended for?", "question"),
+    ("What's the weather like tomorrow?", "non-chase-question"),
+    ("Can you write me a poem about cats?", "non-chase-question"),
+    ("Who won the football game last night?", "non-chase-question"),
+    ("How do I cook pasta?", "non-chase-question"),
+    ("What is the capital of France?", "non-chase-question"),
+    ("Recommend a good movie to watch", "non-chase-question"),
+    ("How do I fix my python code?", "non-chase-question"),
+    ("What stocks should I buy?", "non-chase-question"),
+    ("Translate hello into Spanish", "non-chase-question"),
+    ("What is the best pizza place near me?", "non-chase-question"),
+    ("What are the health benefits of green tea?", "non-chase-question"),
+    ("Does my car insurance cover hail damage?", "non-chase-question"),
+    ("How do I claim a tax refund?", "non-chase-question"),
+    ("Is my laptop still under the manufacturer warranty?", "non-chase-question"),
+]
+
+FEATURE_DIMENSIONS = 2**18
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+class Prediction(NamedTuple):
+    label: str
+    confidence: float
+    source: str
+
+
+class ClassificationLabel(BaseModel):
+    """Structured output for the LLM classifier: providers constrain `label` to the enum."""
+
+    label: Literal["pleasantries", "question", "non-chase-question"]
+
+
+class ClassificationLabels(BaseModel):
+    """Structured output for a batched classification: one label per message, in order."""
+
+    labels: List[Literal["pleasantries", "question", "non-chase-question"]]
+
+
+LABEL_PATTERNS = {
+    "non-chase-question": re.compile(r"\bnon ?chase( question)?\b"),
+    "pleasantries": re.compile(r"\bpleasantr(y|ies)\b"),
+    "question": re.compile(r"\bquestion\b"),
+}
+
+
+def normalize_label(reply: Any) -> Optional[str]:
+    """
+    The label in an LLM classifier reply, or None if there isn't exactly one.
+
+    Accepts a ClassificationLabel, a {"label": ...} JSON object or free text, and
+    ignores case, punctuation, markup and surrounding words, so "Non-Chase Question."
+    and "Final Answer: **question**" both parse.
+    """
+    if isinstance(reply, BaseModel):
+        reply = getattr(reply, "label", "")
+    text = str(reply).strip()
+    if text.startswith("{"):
+        try:
+            text = str(json.loads(text).get("label", ""))
+        except (ValueError, AttributeError):
+            pass
+    text = " ".join(re.sub(r"[^a-z]+", " ", text.lower()).split())
+    found = set()
+    for label, pattern in LABEL_PATTERNS.items():
+        if pattern.search(text):
+            found.add(label)
+            # "non-chase question" must not also count as a question
+            text = pattern.sub(" ", text) if label == "non-chase-question" else text
+    return found.pop() if len(found) == 1 else None
+
+
+def featurize(text: str) -> Dict[int, float]:
+    """Hash unigrams and bigrams into an L2-normalized sparse vector."""
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    features: Dict[int, float] = {}
+    for gram in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+        index = zlib.crc32(gram.encode("utf-8")) % FEATURE_DIMENSIONS
+        features[index] = features.get(index, 0.0) + 1.0
+    norm = math.sqrt(sum(v * v for v in features.values()))
+    if norm:
+        for index in features:
+            features[index] /= norm
+    return features
+
+
+def load_examples(path: str) -> List[tuple]:
+    examples = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.get("label") in LABELS:
+                examples.append((record["message"], record["label"]))
+    return examples
+
+
+class FastPathClassifier:
+    """
+    In-process first-stage classifier for ChatFlow.classify_message.
+
+    Whole-message pleasantries and phrases that name a card benefit are answered by
+    rules, as are generic benefit terms next to a reference to the card; anything
+    else is scored against per-label centroids of hashed n-gram vectors. Predictions
+    below `threshold` return None so the caller falls back to the LLM classifier.
+    """
+
+    def __init__(
+        self, examples=None, threshold: float = 0.9, temperature: float = 10.0
+    ):
+        self.threshold = threshold
+        self.temperature = temperature
+        self.stats = Counters("fast_path_classifier")
+        self._centroids = self._train(examples or SEED_EXAMPLES)
+
+    @classmethod
+    def from_env(cls) -> "FastPathClassifier":
+        examples = list(SEED_EXAMPLES)
+        examples_path = os.getenv("FAST_PATH_EXAMPLES")
+        if examples_path:
+            examples += load_examples(examples_path)
+        return cls(
+            examples=examples,
+            threshold=float(os.getenv("FAST_PATH_CONFIDENCE", "0.9")),
+        )
+
+    @staticmethod
+    def _train(examples) -> Dict[str, Dict[int, float]]:
+        centroids: Dict[str, Dict[int, float]] = {}
+        for message, label in examples:
+            centroid = centroids.setdefault(label, {})
+            for index, value in featurize(message).items():
+                centroid[index] = centroid.get(index, 0.0) + value
+        for centroid in centroids.values():
+            norm = math.sqrt(sum(v * v for v in centroid.values()))
+            for index in centroid:
+                centroid[index] /= norm
+        return centroids
+
+    def predict(self, message: str) -> Prediction:
+        """Return the best guess and its confidence, regardless of the threshold."""
+        if PLEASANTRY_PATTERN.match(message):
+            return Prediction("pleasantries", 0.99, "rules")
+        if CARD_BENEFIT_PATTERN.search(message):
+            return Prediction("question", 0.95, "rules")
+        if BENEFIT_TERM_PATTERN.search(message) and CARD_CONTEXT_PATTERN.search(
+            message
+        ):
+            return Prediction("question", 0.9, "card terms")
+
+        features = featurize(message)
+        if not features:
+            return Prediction("pleasantries", 0.0, "centroid")
+        scores = {
+            label: sum(
+                value * centroid.get(index, 0.0) for index, value in features.items()
+            )
+            for label, centroid in self._centroids.items()
+        }
+        # Softmax over cosine similarities turns them into a confidence in [0, 1]
+        exps = {
+            label: math.exp(self.temperature * score) for label, score in scores.items()
+        }
+        total = sum(exps.values())
+        label = max(exps, key=exps.get)
+        return Prediction(label, exps[label] / total, "centroid")
+
+    def classify(self, message: str, conversation_history=None) -> Optional[Prediction]:
+        """Return a confident prediction, or None when the LLM should decide."""
+        prediction = self.predict(message)
+        # Short follow-ups lean on earlier turns ("and for rentals?"), which neither
+        # the centroid model nor generic terms can see - once a conversation is
+        # going, only whole-message pleasantries and card benefit phrases are trusted
+        if conversation_history and prediction.source != "rules":
+            prediction = prediction._replace(confidence=0.0)
+
+        if prediction.confidence >= self.threshold:
+            self.stats.incr("fast_path_hits")
+            self.stats.incr(f"fast_path_{prediction.label}")
+            return prediction
+
+        self.stats.incr("llm_fallbacks")
+        return None
+
+    def hit_rate(self) -> float:
+        return self.stats.ratio("fast_path_hits", ("fast_path_hits", "llm_fallbacks"))
+
+    def fallback_rate(self) -> float:
+        return self.stats.ratio("llm_fallbacks", ("fast_path_hits", "llm_fallbacks"))
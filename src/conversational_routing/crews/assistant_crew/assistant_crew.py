@@ -1,19 +1,29 @@
 import os
+from functools import lru_cache
 
 from crewai import Agent, Crew, Process, Task
 from crewai.knowledge.knowledge_config import KnowledgeConfig
 from crewai.knowledge.source.pdf_knowledge_source import PDFKnowledgeSource
 from crewai.project import CrewBase, agent, crew, task
 
-model_family = os.getenv("MODEL_FAMILY", "gemini")
-if model_family == "gemini":
-    from conversational_routing.models.gemini import embedder_configuration, llm
-elif model_family == "vertex":
-    from conversational_routing.models.vertex import embedder_configuration, llm
-elif model_family == "openai":
-    from conversational_routing.models.openai import embedder_configuration, llm
-else:
-    raise ValueError(f"Unsupported model family: {model_family}")
+from conversational_routing.knowledge_index import INDEX_DIRECTORY
+from conversational_routing.models import (
+    get_embedder_configuration,
+    get_response_llm,
+)
+
+
+@lru_cache(maxsize=1)
+def knowledge_backend() -> str:
+    """
+    "index" hands passages from the prebuilt index (`ingest`) to the task,
+    "crewai" keeps CrewAI's PDFKnowledgeSource; by default the index wins if
+    present. Resolved once, when the crew is first built, not at import.
+    """
+    return os.getenv(
+        "KNOWLEDGE_BACKEND",
+        "index" if (INDEX_DIRECTORY / "CURRENT").exists() else "crewai",
+    )
 
 
 @CrewBase
@@ -26,6 +36,13 @@ class AssistantCrew:
 
     @agent
     def benefits_expert_agent(self) -> Agent:
+        if knowledge_backend() == "index":
+            # ChatFlow puts the retrieved passages in the task's context
+            return Agent(
+                config=self.agents_config["benefits_expert_agent"],
+                llm=get_response_llm(),
+            )
+
         return Agent(
             config=self.agents_config["benefits_expert_agent"],
             knowledge_sources=[
@@ -34,8 +51,8 @@ class AssistantCrew:
                 )
             ],
             knowledge_config=KnowledgeConfig(results_limit=5, score_threshold=0.7),
-            embedder=embedder_configuration,
-            llm=llm,
+            embedder=get_embedder_configuration(),
+            llm=get_response_llm(),
         )
 
     @task
@@ -51,6 +68,6 @@ class AssistantCrew:
             agents=self.agents,  # Automatically created by the @agent decorator
             tasks=self.tasks,  # Automatically created by the @task decorator
             process=Process.sequential,
-            embedder=embedder_configuration,
+            embedder=get_embedder_configuration(),
             verbose=False,
         )
@@ -0,0 +1,26 @@
+from functools import lru_cache
+from typing import Iterable
+
+import numpy as np
+
+from conversational_routing.models import get_embedder_configuration
+
+
+@lru_cache(maxsize=1)
+def get_embedder():
+    """Build the provider embedding function once per process."""
+    from crewai.rag.embeddings.factory import build_embedder
+
+    return build_embedder(get_embedder_configuration())
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so dot products are cosine similarities."""
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def embed(texts: Iterable[str]) -> np.ndarray:
+    """Embed texts with the configured provider; returns a normalized float32 matrix."""
+    vectors = np.asarray(get_embedder()(list(texts)), dtype=np.float32)
+    return normalize(vectors)
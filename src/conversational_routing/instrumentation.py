@@ -0,0 +1,699 @@
+"""
+Spans, metrics and per-turn timings for ChatFlow.
+
+CrewAI already emits paired started/finished events, with parent ids, for
+every flow method, crew, task, agent, LLM call, tool call and knowledge query.
+`Instrumentation` turns each pair into a span, and steps CrewAI does not see
+(persistence, index search) open their own with `instrumentation.span(...)`.
+Spans are grouped per turn by the flow run's id and feed:
+
+- Prometheus text metrics: `render_metrics()`, served at GET /metrics by
+  `serve`, and by a small HTTP server in processes that call
+  `serve_metrics_from_env()` with METRICS_PORT set;
+- OpenTelemetry traces, one per turn, when OTEL_TRACES_EXPORTER is `otlp`
+  (endpoint from the standard OTEL_EXPORTER_OTLP_* variables) or `console`.
+  They use their own tracer provider, separate from CrewAI's telemetry;
+- `turn_timings()`, which `send_response` adds to its JSON.
+
+LLM spans carry the provider, model, token usage and whether the call retried
+one that failed. INSTRUMENTATION=false turns all of it off; OTEL_SDK_DISABLED
+turns off the traces only.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from conversational_routing.stats import snapshot_all
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Spans left open this long (a start whose end never came) are dropped
+STALE_SPAN_SECONDS = 600
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Counter:
+    """Prometheus counter with labels."""
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values = defaultdict(float)
+
+    def inc(self, value: float = 1, **labels):
+        self._values[tuple(sorted(labels.items()))] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    """Prometheus histogram with labels and fixed buckets (seconds)."""
+
+    def __init__(self, name: str, help: str, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        # labels -> [bucket counts..., sum, count]
+        self._values = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        values = self._values.get(key)
+        if values is None:
+            values = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                values[i] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, values in sorted(self._values.items()):
+            for bound, count in zip(self.buckets, values):
+                bucket = labels + (("le", f"{bound:g}"),)
+                lines.append(f"{self.name}_bucket{_labels(bucket)} {count}")
+            lines.append(
+                f"{self.name}_bucket{_labels(labels + (('le', '+Inf'),))} {values[-1]}"
+            )
+            lines.append(f"{self.name}_sum{_labels(labels)} {values[-2]:g}")
+            lines.append(f"{self.name}_count{_labels(labels)} {values[-1]}")
+        return lines
+
+
+class Span:
+    """One timed step of a turn. Ids are CrewAI event ids (or uuids for our own)."""
+
+    __slots__ = (
+        "span_id",
+        "parent_id",
+        "trace_id",
+        "kind",
+        "name",
+        "start",
+        "end",
+        "attributes",
+        "error",
+    )
+
+    def __init__(self, span_id: str):
+        self.span_id = span_id
+        self.parent_id: Optional[str] = None
+        self.trace_id: Optional[str] = None
+        self.kind = ""
+        self.name = ""
+        self.start: Optional[datetime] = None
+        self.end: Optional[datetime] = None
+        self.attributes: dict = {}
+        self.error: Optional[str] = None
+
+    @property
+    def duration(self) -> float:
+        return (self.end - self.start).total_seconds()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _int_id(value: str, bits: int) -> int:
+    """Stable non-zero OpenTelemetry id derived from a uuid string."""
+    digest = hashlib.blake2b(value.encode(), digest_size=bits // 8).digest()
+    return int.from_bytes(digest, "big") or 1
+
+
+def _usage_tokens(usage: Optional[dict]) -> Dict[str, int]:
+    """Normalize provider usage dicts (same keys CrewAI's BaseLLM accepts)."""
+    if not usage:
+        return {}
+    tokens = {
+        "prompt": usage.get("prompt_tokens")
+        or usage.get("prompt_token_count")
+        or usage.get("input_tokens"),
+        "completion": usage.get("completion_tokens")
+        or usage.get("candidates_token_count")
+        or usage.get("output_tokens"),
+        "cached": usage.get("cached_tokens")
+        or usage.get("cached_prompt_tokens")
+        or usage.get("cache_read_input_tokens"),
+    }
+    return {kind: int(value) for kind, value in tokens.items() if value}
+
+
+class OpenTelemetryExporter:
+    """
+    Re-emits finished spans to OpenTelemetry with their CrewAI ids.
+
+    Trace and span ids are derived from the flow run and event ids, so a span
+    can be exported as soon as it ends, before or after its parent.
+    """
+
+    def __init__(self, exporter: str):
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import (
+            BatchSpanProcessor,
+            ConsoleSpanExporter,
+        )
+        from opentelemetry.sdk.trace.id_generator import IdGenerator
+
+        if exporter == "otlp":
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                OTLPSpanExporter,
+            )
+
+            span_exporter = OTLPSpanExporter()
+        else:
+            span_exporter = ConsoleSpanExporter()
+
+        ids = self._ids = threading.local()
+
+        class EventIdGenerator(IdGenerator):
+            def generate_span_id(self) -> int:
+                return ids.span_id
+
+            def generate_trace_id(self) -> int:
+                return ids.trace_id
+
+        provider = TracerProvider(
+            resource=Resource.create(
+                {"service.name": os.getenv("OTEL_SERVICE_NAME", "chatflow")}
+            ),
+            id_generator=EventIdGenerator(),
+        )
+        provider.add_span_processor(BatchSpanProcessor(span_exporter))
+        self.provider = provider
+        self.tracer = provider.get_tracer(__name__)
+
+    def export(self, span: Span):
+        from opentelemetry import trace
+        from opentelemetry.trace import (
+            NonRecordingSpan,
+            SpanContext,
+            Status,
+            StatusCode,
+            TraceFlags,
+        )
+
+        trace_id = _int_id(span.trace_id or span.span_id, 128)
+        context = None
+        if span.parent_id:
+            parent = SpanContext(
+                trace_id,
+                _int_id(span.parent_id, 64),
+                is_remote=False,
+                trace_flags=TraceFlags(TraceFlags.SAMPLED),
+            )
+            context = trace.set_span_in_context(NonRecordingSpan(parent))
+
+        self._ids.trace_id = trace_id
+        self._ids.span_id = _int_id(span.span_id, 64)
+        attributes = {
+            f"chatflow.{key}": value
+            for key, value in span.attributes.items()
+            if isinstance(value, (str, bool, int, float))
+        }
+        attributes["chatflow.kind"] = span.kind
+        otel_span = self.tracer.start_span(
+            span.name,
+            context=context,
+            attributes=attributes,
+            start_time=int(span.start.timestamp() * 1e9),
+        )
+        if span.error is not None:
+            otel_span.set_status(Status(StatusCode.ERROR, span.error))
+        otel_span.end(end_time=int(span.end.timestamp() * 1e9))
+
+
+class Instrumentation:
+    """Collects spans from the event bus and our own steps; see module docstring."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        traces_exporter: str = "none",
+        flush_timeout: float = 0.25,
+    ):
+        self.enabled = enabled
+        self.flush_timeout = flush_timeout
+        self._lock = threading.Lock()
+        # Notified whenever a span completes; turn_timings waits on it
+        self._completed = threading.Condition(self._lock)
+        self._installed = False
+        self._exporter = None
+        if enabled and traces_exporter in ("otlp", "console"):
+            try:
+                self._exporter = OpenTelemetryExporter(traces_exporter)
+            except ImportError as e:
+                logger.warning(f"OpenTelemetry traces disabled: {e}")
+
+        # span id -> Span still missing its start or end event
+        self._open: Dict[str, Span] = {}
+        # flow run id -> (created_at, finished spans of that turn)
+        self._traces: Dict[str, tuple] = {}
+        # (flow run id, caller) pairs whose last LLM call failed
+        self._failed_llm_callers = set()
+
+        self.turns = Counter("chatflow_turns_total", "Completed ChatFlow turns.")
+        self.turn_duration = Histogram(
+            "chatflow_turn_duration_seconds", "ChatFlow turn latency by route."
+        )
+        self.span_duration = Histogram(
+            "chatflow_span_duration_seconds",
+            "Duration of flow methods, crews, tasks, agents, LLM, tool, knowledge and persistence calls.",
+        )
+        self.errors = Counter("chatflow_span_errors_total", "Failed spans by kind.")
+        self.llm_calls = Counter("chatflow_llm_calls_total", "LLM calls by outcome.")
+        self.llm_retries = Counter(
+            "chatflow_llm_retries_total",
+            "LLM calls made by a caller whose previous call failed.",
+        )
+        self.llm_tokens = Counter("chatflow_llm_tokens_total", "LLM tokens by type.")
+        self._metrics = [
+            self.turns,
+            self.turn_duration,
+            self.span_duration,
+            self.errors,
+            self.llm_calls,
+            self.llm_retries,
+            self.llm_tokens,
+        ]
+
+    @classmethod
+    def from_env(cls) -> "Instrumentation":
+        return cls(
+            enabled=os.getenv("INSTRUMENTATION", "true").lower() == "true",
+            traces_exporter=os.getenv("OTEL_TRACES_EXPORTER", "none").lower(),
+            flush_timeout=float(os.getenv("INSTRUMENTATION_FLUSH_TIMEOUT", "0.25")),
+        )
+
+    def install(self):
+        """Subscribe to CrewAI's event bus; safe to call more than once."""
+        with self._lock:
+            if not self.enabled or self._installed:
+                return
+            self._installed = True
+
+        from crewai.events import crewai_event_bus
+
+        for event_class, (phase, kind) in _span_events().items():
+            crewai_event_bus.register_handler(event_class, self._handler(phase, kind))
+
+    def _handler(self, phase: str, kind: str):
+        # Exactly (source, event): the bus passes its runtime state as a third
+        # argument to handlers that take more
+        def handle(source, event):
+            self._on_event(source, event, phase, kind)
+
+        return handle
+
+    # Event bus handlers run on CrewAI's handler threads, in no guaranteed
+    # order, with the emitting context copied - so current_flow_id still works
+    def _on_event(self, source, event, phase: str, kind: str):
+        from crewai.flow.flow_context import current_flow_id
+
+        span_id = event.event_id if phase == "start" else event.started_event_id
+        if span_id is None:
+            return
+        with self._lock:
+            span = self._open.pop(span_id, None) or Span(span_id)
+            span.kind = kind
+            if phase == "start":
+                span.start = event.timestamp
+                span.parent_id = event.parent_event_id
+                span.trace_id = current_flow_id.get()
+                span.name = _span_name(kind, event)
+                if kind == "method":
+                    span.attributes["method"] = event.method_name
+                elif kind == "llm":
+                    self._llm_started(span, source, event)
+            else:
+                span.end = event.timestamp
+                if phase == "error":
+                    span.error = str(getattr(event, "error", None) or f"{kind} failed")
+                if kind == "llm":
+                    self._llm_finished(span, event)
+                elif kind == "flow":
+                    self._flow_finished(span, event)
+            if span.start is None or span.end is None:
+                self._open[span_id] = span
+                return
+        self._complete(span)
+
+    def _llm_started(self, span: Span, source, event):
+        model = event.model or getattr(source, "model", "") or ""
+        span.attributes["model"] = model
+        span.attributes["provider"] = getattr(source, "provider", None) or (
+            model.split("/")[0] if "/" in model else "unknown"
+        )
+        caller = (span.trace_id, event.agent_id or event.task_id or id(source))
+        span.attributes["retry"] = caller in self._failed_llm_callers
+        self._failed_llm_callers.discard(caller)
+        span.attributes["caller"] = caller
+
+    def _llm_finished(self, span: Span, event):
+        for kind, count in _usage_tokens(getattr(event, "usage", None)).items():
+            span.attributes[f"{kind}_tokens"] = count
+
+    def _flow_finished(self, span: Span, event):
+        try:
+            result = json.loads(event.result)
+        except (TypeError, ValueError):
+            return
+        if isinstance(result, dict):
+            span.attributes["route"] = (
+                "resync" if result.get("resync") else result.get("classification", "")
+            )
+            span.attributes["conversation_id"] = result.get("id", "")
+
+    @contextmanager
+    def span(self, kind: str, name: str, **attributes):
+        """
+        Time a step CrewAI emits no events for. Yields the span's attribute dict,
+        so the caller can add results (counts, sizes) before it closes.
+        """
+        if not self.enabled:
+            yield {}
+            return
+
+        from crewai.events.event_context import get_current_parent_id
+        from crewai.flow.flow_context import current_flow_id
+
+        span = Span(str(uuid.uuid4()))
+        span.kind = kind
+        span.name = name
+        span.parent_id = get_current_parent_id()
+        span.trace_id = current_flow_id.get()
+        span.attributes.update(attributes)
+        span.start = _now()
+        try:
+            yield span.attributes
+        except Exception as e:
+            span.error = str(e)
+            raise
+        finally:
+            span.end = _now()
+            self._complete(span)
+
+    def _complete(self, span: Span):
+        """Record a span that has both ends: metrics, the turn's trace, export."""
+        caller = span.attributes.pop("caller", None)
+        with self._lock:
+            if span.kind == "flow":
+                self.turns.inc(route=span.attributes.get("route", ""))
+                self.turn_duration.observe(
+                    span.duration, route=span.attributes.get("route", "")
+                )
+                self._traces.pop(span.trace_id, None)
+                self._expire(span.end)
+            elif span.trace_id is not None:
+                self._traces.setdefault(span.trace_id, (time.time(), []))[1].append(
+                    span
+                )
+
+            self._completed.notify_all()
+            self.span_duration.observe(span.duration, kind=span.kind, name=span.name)
+            if span.error is not None:
+                self.errors.inc(kind=span.kind)
+            if span.kind == "llm":
+                labels = {
+                    "provider": span.attributes["provider"],
+                    "model": span.attributes["model"],
+                }
+                self.llm_calls.inc(
+                    status="error" if span.error is not None else "ok", **labels
+                )
+                if span.attributes.get("retry"):
+                    self.llm_retries.inc(**labels)
+                if span.error is not None and caller is not None:
+                    self._failed_llm_callers.add(caller)
+                for kind in ("prompt", "completion", "cached"):
+                    tokens = span.attributes.get(f"{kind}_tokens")
+                    if tokens:
+                        self.llm_tokens.inc(tokens, type=kind, **labels)
+
+        if self._exporter is not None:
+            try:
+                self._exporter.export(span)
+            except Exception as e:
+                logger.debug(f"Could not export span {span.name}: {e}")
+
+    def _expire(self, now: datetime):
+        """Drop turns and open spans whose flow never finished (lock held)."""
+        cutoff = now.timestamp() - STALE_SPAN_SECONDS
+        for trace_id in [
+            t for t, (created, _) in self._traces.items() if created < cutoff
+        ]:
+            del self._traces[trace_id]
+        for span_id in [
+            s
+            for s, span in self._open.items()
+            if (span.start or span.end).timestamp() < cutoff
+        ]:
+            del self._open[span_id]
+        if len(self._failed_llm_callers) > 10000:
+            self._failed_llm_callers.clear()
+
+    def turn_timings(self) -> dict:
+        """
+        Where the current turn's time went so far, in milliseconds.
+
+        Called from inside the flow (send_response). Event handlers run
+        asynchronously, so this waits up to `flush_timeout` for the turn's
+        spans that have started but not yet finished, other than the flow and
+        the calling method. Other turns' events are not waited for. The turn's
+        own persistence write comes after and is not included.
+        """
+        if not self.enabled:
+            return {}
+
+        from crewai.flow.flow_context import current_flow_id
+
+        trace_id = current_flow_id.get()
+        deadline = time.monotonic() + self.flush_timeout
+        with self._completed:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._unfinished(trace_id):
+                    break
+                self._completed.wait(remaining)
+            spans = list(self._traces.get(trace_id, (0, []))[1])
+            flow = next(
+                (
+                    s
+                    for s in self._open.values()
+                    if s.trace_id == trace_id and s.kind == "flow"
+                ),
+                None,
+            )
+
+        timings = defaultdict(float)
+        steps = {}
+        for span in spans:
+            ms = span.duration * 1000
+            if span.kind == "method":
+                steps[span.attributes.get("method", span.name)] = round(ms, 1)
+            elif span.kind in ("llm", "tool", "knowledge", "persistence"):
+                timings[f"{span.kind}_ms"] += ms
+                if span.kind == "llm":
+                    timings["llm_calls"] += 1
+                    timings["llm_retries"] += bool(span.attributes.get("retry"))
+                    for kind in ("prompt", "completion"):
+                        timings[f"{kind}_tokens"] += span.attributes.get(
+                            f"{kind}_tokens", 0
+                        )
+
+        result = {
+            key: round(value, 1) if key.endswith("_ms") else int(value)
+            for key, value in timings.items()
+        }
+        if flow is not None and flow.start is not None:
+            result["total_ms"] = round((_now() - flow.start).total_seconds() * 1000, 1)
+        result["steps"] = steps
+        return result
+
+    def _unfinished(self, trace_id: str) -> bool:
+        """Whether the turn has started spans still waiting for their end (lock held)."""
+        spans = [
+            span
+            for span in self._open.values()
+            if span.trace_id == trace_id and span.start is not None
+        ]
+        methods = [span for span in spans if span.kind == "method"]
+        if methods:
+            # The latest method is the one asking for timings
+            spans.remove(max(methods, key=lambda span: span.start))
+        return any(span.kind != "flow" for span in spans)
+
+    def render_metrics(self) -> str:
+        """All metrics, plus the routing components' counters, in Prometheus text format."""
+        with self._lock:
+            lines = [line for metric in self._metrics for line in metric.render()]
+            active = sum(1 for span in self._open.values() if span.kind == "flow")
+        lines += [
+            "# HELP chatflow_active_turns ChatFlow turns in progress.",
+            "# TYPE chatflow_active_turns gauge",
+            f"chatflow_active_turns {active}",
+            "# HELP chatflow_component_stat Counters kept by the routing components.",
+            "# TYPE chatflow_component_stat gauge",
+        ]
+        for component, values in sorted(snapshot_all().items()):
+            for key, value in sorted(values.items()):
+                labels = (("component", component), ("key", key))
+                lines.append(f"chatflow_component_stat{_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def serve_metrics(self, port: int, host: str = "0.0.0.0"):
+        """Serve GET /metrics from a daemon thread, for processes without a web server."""
+        instrumentation = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = instrumentation.render_metrics().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(
+            target=server.serve_forever, name="metrics-server", daemon=True
+        ).start()
+        logger.info(f"Serving metrics on http://{host}:{port}/metrics")
+        return server
+
+    def serve_metrics_from_env(self):
+        """Start `serve_metrics` on METRICS_PORT, if set; returns the server or None."""
+        port = os.getenv("METRICS_PORT")
+        if not self.enabled or not port:
+            return None
+        return self.serve_metrics(int(port))
+
+
+def _span_events() -> dict:
+    """Event class -> (phase, span kind) for every event pair we turn into spans."""
+    from crewai.events.types.agent_events import (
+        AgentExecutionCompletedEvent,
+        AgentExecutionErrorEvent,
+        AgentExecutionStartedEvent,
+        LiteAgentExecutionCompletedEvent,
+        LiteAgentExecutionErrorEvent,
+        LiteAgentExecutionStartedEvent,
+    )
+    from crewai.events.types.crew_events import (
+        CrewKickoffCompletedEvent,
+        CrewKickoffFailedEvent,
+        CrewKickoffStartedEvent,
+    )
+    from crewai.events.types.flow_events import (
+        FlowFinishedEvent,
+        FlowStartedEvent,
+        MethodExecutionFailedEvent,
+        MethodExecutionFinishedEvent,
+        MethodExecutionStartedEvent,
+    )
+    from crewai.events.types.knowledge_events import (
+        KnowledgeRetrievalCompletedEvent,
+        KnowledgeRetrievalStartedEvent,
+        KnowledgeSearchQueryFailedEvent,
+    )
+    from crewai.events.types.llm_events import (
+        LLMCallCompletedEvent,
+        LLMCallFailedEvent,
+        LLMCallStartedEvent,
+    )
+    from crewai.events.types.task_events import (
+        TaskCompletedEvent,
+        TaskFailedEvent,
+        TaskStartedEvent,
+    )
+    from crewai.events.types.tool_usage_events import (
+        ToolUsageErrorEvent,
+        ToolUsageFinishedEvent,
+        ToolUsageStartedEvent,
+    )
+
+    return {
+        FlowStartedEvent: ("start", "flow"),
+        FlowFinishedEvent: ("end", "flow"),
+        MethodExecutionStartedEvent: ("start", "method"),
+        MethodExecutionFinishedEvent: ("end", "method"),
+        MethodExecutionFailedEvent: ("error", "method"),
+        CrewKickoffStartedEvent: ("start", "crew"),
+        CrewKickoffCompletedEvent: ("end", "crew"),
+        CrewKickoffFailedEvent: ("error", "crew"),
+        TaskStartedEvent: ("start", "task"),
+        TaskCompletedEvent: ("end", "task"),
+        TaskFailedEvent: ("error", "task"),
+        AgentExecutionStartedEvent: ("start", "agent"),
+        AgentExecutionCompletedEvent: ("end", "agent"),
+        AgentExecutionErrorEvent: ("error", "agent"),
+        LiteAgentExecutionStartedEvent: ("start", "agent"),
+        LiteAgentExecutionCompletedEvent: ("end", "agent"),
+        LiteAgentExecutionErrorEvent: ("error", "agent"),
+        LLMCallStartedEvent: ("start", "llm"),
+        LLMCallCompletedEvent: ("end", "llm"),
+        LLMCallFailedEvent: ("error", "llm"),
+        ToolUsageStartedEvent: ("start", "tool"),
+        ToolUsageFinishedEvent: ("end", "tool"),
+        ToolUsageErrorEvent: ("error", "tool"),
+        KnowledgeRetrievalStartedEvent: ("start", "knowledge"),
+        KnowledgeRetrievalCompletedEvent: ("end", "knowledge"),
+        KnowledgeSearchQueryFailedEvent: ("error", "knowledge"),
+    }
+
+
+def _span_name(kind: str, event) -> str:
+    if kind == "flow":
+        return event.flow_name
+    if kind == "method":
+        return f"{event.flow_name}.{event.method_name}"
+    if kind == "crew":
+        return event.crew_name or "crew"
+    if kind == "task":
+        task = getattr(event, "task", None)
+        return getattr(task, "name", None) or (event.task_name or "task")[:80]
+    if kind == "agent":
+        role = event.agent_role or getattr(getattr(event, "agent", None), "role", None)
+        info = getattr(event, "agent_info", None) or {}
+        return (role or info.get("role") or "agent").strip()
+    if kind == "llm":
+        return event.model or "llm"
+    if kind == "tool":
+        return event.tool_name
+    return "knowledge retrieval"
+
+
+instrumentation = Instrumentation.from_env()
@@ -0,0 +1,263 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# Bump when the on-disk layout changes; workers refuse indexes of other versions
+INDEX_FORMAT_VERSION = 2
+
+# The repository root (src/conversational_routing/ is two levels down), so paths
+# don't depend on the directory the process was started from
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+
+def _default_knowledge_directory() -> Path:
+    # The repository's knowledge/ in a source tree or editable install; in a
+    # wheel install there is none, so fall back to CrewAI's convention (the
+    # assistant crew's PDFKnowledgeSource), knowledge/ in the working directory
+    bundled = PROJECT_ROOT / "knowledge"
+    return bundled if bundled.is_dir() else Path.cwd() / "knowledge"
+
+
+KNOWLEDGE_DIRECTORY = Path(os.getenv("KNOWLEDGE_DIR") or _default_knowledge_directory())
+INDEX_DIRECTORY = Path(os.getenv("KNOWLEDGE_INDEX_DIR", KNOWLEDGE_DIRECTORY / ".index"))
+
+# Same defaults as CrewAI's BaseKnowledgeSource, so answers don't shift
+DEFAULT_CHUNK_SIZE = 4000
+DEFAULT_CHUNK_OVERLAP = 200
+
+SUPPORTED_SUFFIXES = (".pdf", ".txt", ".md")
+
+
+def load_documents(knowledge_dir: Path) -> Dict[str, str]:
+    """Extract text from every supported file in the knowledge directory."""
+    documents = {}
+    for path in sorted(Path(knowledge_dir).iterdir()):
+        if path.suffix.lower() not in SUPPORTED_SUFFIXES:
+            continue
+        if path.suffix.lower() == ".pdf":
+            import pdfplumber
+
+            with pdfplumber.open(path) as pdf:
+                pages = [page.extract_text() for page in pdf.pages]
+            documents[path.name] = "".join(f"{text}\n" for text in pages if text)
+        else:
+            documents[path.name] = path.read_text()
+    return documents
+
+
+def check_chunking(chunk_size: int, chunk_overlap: int):
+    """Raise ValueError unless chunks advance, i.e. 0 <= overlap < size."""
+    if chunk_size <= 0 or not 0 <= chunk_overlap < chunk_size:
+        raise ValueError(
+            f"Need 0 <= chunk_overlap < chunk_size, got overlap {chunk_overlap} "
+            f"and size {chunk_size}"
+        )
+
+
+def chunk_text(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+    check_chunking(chunk_size, chunk_overlap)
+    return [
+        text[i : i + chunk_size]
+        for i in range(0, len(text), chunk_size - chunk_overlap)
+    ]
+
+
+def fingerprint_sources(knowledge_dir: Path) -> str:
+    digest = hashlib.sha256()
+    for path in sorted(Path(knowledge_dir).iterdir()):
+        if path.suffix.lower() in SUPPORTED_SUFFIXES:
+            digest.update(path.name.encode("utf-8"))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def embedder_name(configuration: dict) -> str:
+    """Identify an embedder configuration, e.g. "openai/text-embedding-ada-002"."""
+    config = configuration.get("config", {})
+    model = config.get("model_name") or getattr(
+        config.get("embedding_callable"), "__name__", ""
+    )
+    return f"{configuration['provider']}/{model}"
+
+
+def configured_embedder_name() -> str:
+    from conversational_routing.models import get_embedder_configuration
+
+    return embedder_name(get_embedder_configuration())
+
+
+def build_index(
+    knowledge_dir: Path,
+    index_dir: Path,
+    embed: Callable[[List[str]], np.ndarray],
+    embedder_name: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
+    batch_size: int = 32,
+) -> Path:
+    """
+    Parse, chunk and embed the knowledge directory into a versioned artifact.
+
+    The artifact is a directory holding chunks.json, a raw float32 embeddings
+    matrix (rows L2-normalized) and manifest.json. Its name covers the sources,
+    the embedder and the chunking parameters, so a rebuild with other settings
+    never writes into a directory workers may have memory-mapped. It is written
+    under a temporary name, renamed into place, and only then is
+    index_dir/CURRENT switched to it, atomically. `embedder_name` defaults to
+    the configured embedder's.
+    """
+    knowledge_dir, index_dir = Path(knowledge_dir), Path(index_dir)
+    if not knowledge_dir.is_dir():
+        raise FileNotFoundError(
+            f"Knowledge directory {knowledge_dir} does not exist; set KNOWLEDGE_DIR "
+            "or pass --knowledge-dir"
+        )
+    check_chunking(chunk_size, chunk_overlap)
+    source_fingerprint = fingerprint_sources(knowledge_dir)
+    if embedder_name is None:
+        embedder_name = configured_embedder_name()
+    params_fingerprint = hashlib.sha256(
+        json.dumps([embedder_name, chunk_size, chunk_overlap]).encode("utf-8")
+    ).hexdigest()
+
+    chunks, sources = [], []
+    for name, text in load_documents(knowledge_dir).items():
+        for chunk in chunk_text(text, chunk_size, chunk_overlap):
+            chunks.append(chunk)
+            sources.append(name)
+    if not chunks:
+        raise ValueError(f"No indexable documents found in {knowledge_dir}")
+
+    batches = [
+        embed(chunks[i : i + batch_size]) for i in range(0, len(chunks), batch_size)
+    ]
+    embeddings = np.ascontiguousarray(np.vstack(batches), dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    embeddings /= np.where(norms == 0, 1, norms)
+
+    version = (
+        f"v{INDEX_FORMAT_VERSION}-{source_fingerprint[:12]}-{params_fingerprint[:8]}"
+    )
+    target = index_dir / version
+    staging = index_dir / f".{version}.{os.getpid()}.tmp"
+    staging.mkdir(parents=True)
+
+    embeddings.tofile(staging / "embeddings.f32")
+    (staging / "chunks.json").write_text(
+        json.dumps({"chunks": chunks, "sources": sources})
+    )
+    manifest = {
+        "format_version": INDEX_FORMAT_VERSION,
+        "source_fingerprint": source_fingerprint,
+        "params_fingerprint": params_fingerprint,
+        "embedder": embedder_name,
+        "count": embeddings.shape[0],
+        "dimensions": embeddings.shape[1],
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    (staging / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+    try:
+        os.replace(staging, target)
+    except OSError:
+        # Same sources and settings were already built, and workers may be
+        # reading that copy: keep it rather than replace files under them
+        shutil.rmtree(staging)
+
+    pointer = index_dir / "CURRENT.tmp"
+    pointer.write_text(version)
+    os.replace(pointer, index_dir / "CURRENT")
+    return target
+
+
+class KnowledgeIndex:
+    """
+    Read-only view of an ingested index.
+
+    The embeddings matrix is opened with np.memmap, so every worker on the box
+    shares the same page-cache copy and opening the index costs next to nothing.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.manifest = json.loads((self.path / "manifest.json").read_text())
+        if self.manifest["format_version"] != INDEX_FORMAT_VERSION:
+            raise ValueError(
+                f"Index {self.path} has format version {self.manifest['format_version']}, "
+                f"expected {INDEX_FORMAT_VERSION}; re-run `ingest`"
+            )
+        chunk_data = json.loads((self.path / "chunks.json").read_text())
+        self.chunks: List[str] = chunk_data["chunks"]
+        self.sources: List[str] = chunk_data["sources"]
+        self.embeddings = np.memmap(
+            self.path / "embeddings.f32",
+            dtype=np.float32,
+            mode="r",
+            shape=(self.manifest["count"], self.manifest["dimensions"]),
+        )
+
+    @classmethod
+    def open(cls, index_dir: Path = INDEX_DIRECTORY) -> "KnowledgeIndex":
+        index_dir = Path(index_dir)
+        version = (index_dir / "CURRENT").read_text().strip()
+        return cls(index_dir / version)
+
+    def is_stale(self, knowledge_dir: Path = KNOWLEDGE_DIRECTORY) -> bool:
+        return self.manifest["source_fingerprint"] != fingerprint_sources(knowledge_dir)
+
+    def check_embedder(self, name: str) -> None:
+        """Raise ValueError unless the index was built with this embedder."""
+        if self.manifest["embedder"] != name:
+            raise ValueError(
+                f"Index {self.path} was built with embedder "
+                f"{self.manifest['embedder']!r}, but {name!r} is configured; "
+                "re-run `ingest`"
+            )
+
+
+@lru_cache(maxsize=1)
+def load_index(index_dir: Path = INDEX_DIRECTORY) -> KnowledgeIndex:
+    """Open the current index once per process."""
+    return KnowledgeIndex.open(index_dir)
+
+
+def ingest():
+    parser = argparse.ArgumentParser(
+        description="Parse, chunk and embed the knowledge directory into a memory-mapped index."
+    )
+    parser.add_argument("--knowledge-dir", type=Path, default=KNOWLEDGE_DIRECTORY)
+    parser.add_argument("--index-dir", type=Path, default=INDEX_DIRECTORY)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--chunk-overlap", type=int, default=DEFAULT_CHUNK_OVERLAP)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    from conversational_routing.embeddings import embed
+
+    target = build_index(
+        args.knowledge_dir,
+        args.index_dir,
+        embed,
+        chunk_size=args.chunk_size,
+        chunk_overlap=args.chunk_overlap,
+        batch_size=args.batch_size,
+    )
+    index = KnowledgeIndex(target)
+    print(
+        f"Indexed {index.manifest['count']} chunks "
+        f"({index.manifest['dimensions']} dimensions) into {target}"
+    )
+
+
+if __name__ == "__main__":
+    ingest()
@@ -1,30 +1,342 @@
 #!/usr/bin/env python
 import json
 import os
-from typing import List
+import time
+from functools import lru_cache
+from typing import List, Optional, Tuple
 
 from crewai import Agent
 from crewai.flow import Flow, listen, or_, persist, router, start
-from pydantic import BaseModel
+from crewai.flow.persistence import SQLiteFlowPersistence
+from pydantic import BaseModel, PrivateAttr
 
-from conversational_routing.crews.assistant_crew.assistant_crew import AssistantCrew
+from conversational_routing.batching import MicroBatcher
+from conversational_routing.cache import SemanticCache
+from conversational_routing.classifier import (
+    LABELS,
+    FastPathClassifier,
+    normalize_label,
+)
+from conversational_routing.instrumentation import instrumentation
+from conversational_routing.memory import (
+    ConversationMemory,
+    llm_summarizer,
+    render_context,
+)
+from conversational_routing.models import (
+    get_batch_classifier_llm,
+    get_classifier_llm,
+    get_llm,
+    get_response_llm,
+    llm_providers,
+)
+from conversational_routing.persistence import TurnPersistence
+from conversational_routing.singleflight import SingleFlight, flight_key
+from conversational_routing.speculative import Prefetch, SpeculativeRetrieval
+from conversational_routing.stats import Counters
 
-model_family = os.getenv("MODEL_FAMILY", "gemini")
+# Fail fast on an unknown MODEL_FAMILY or LLM_PROVIDERS; provider SDKs are only
+# imported, and LLMs built, on the first turn that needs them (see conversational_routing.models)
+llm_providers()
 
-if model_family == "gemini":
-    from conversational_routing.models.gemini import llm
-elif model_family == "vertex":
-    from conversational_routing.models.vertex import llm
-elif model_family == "openai":
-    from conversational_routing.models.openai import llm
-else:
-    raise ValueError(f"Unsupported model family: {model_family}")
+fast_path_classifier = (
+    FastPathClassifier.from_env()
+    if os.getenv("FAST_PATH_CLASSIFIER", "true").lower() == "true"
+    else None
+)
+
+answer_cache = (
+    SemanticCache.from_env()
+    if os.getenv("ANSWER_CACHE", "true").lower() == "true"
+    else None
+)
+
+# Identical messages arriving together (e.g. everyone clicking the same suggested
+# prompt) share one classification and one crew run instead of each paying for it
+single_flight = (
+    SingleFlight() if os.getenv("SINGLE_FLIGHT", "true").lower() == "true" else None
+)
+
+
+def coalesced(kind: str, message: str, context: str, fn):
+    if single_flight is None:
+        return fn()
+    result, _ = single_flight.do(flight_key(kind, message, context), fn)
+    return result
+
+
+# Knowledge search for a message starts while the LLM is still classifying it;
+# benefits questions hand the passages to the crew, other routes discard them
+speculative_retrieval = (
+    SpeculativeRetrieval.from_env()
+    if os.getenv("SPECULATIVE_RETRIEVAL", "false").lower() == "true"
+    else None
+)
+
+
+def discard_prefetch(prefetch: Optional[Prefetch]):
+    if speculative_retrieval is not None:
+        speculative_retrieval.discard(prefetch)
+
+
+def knowledge_context(message: str, prefetch: Optional[Prefetch]) -> str:
+    """
+    Passages from the prebuilt index for the crew's task, so the agent answers
+    without a tool round trip. A speculative search's passages are used when
+    there are any; "" with the crewai backend, whose agent has its own source.
+    """
+    from conversational_routing.crews.assistant_crew.assistant_crew import (
+        knowledge_backend,
+    )
+    from conversational_routing.retriever import format_passages, get_retriever
+
+    if knowledge_backend() != "index":
+        return ""
+    passages = None
+    if prefetch is not None:
+        passages = speculative_retrieval.passages(prefetch)
+    if passages is None:
+        passages = format_passages(get_retriever().query([message])[0])
+    if not passages:
+        return "No passages in the benefits guide match the current message."
+    return (
+        "Passages from the benefits guide retrieved for the current message:\n\n"
+        + passages
+    )
+
+
+conversation_memory = ConversationMemory.from_env(summarize=llm_summarizer(get_llm))
+
+# Spans for every flow method, agent, LLM, tool and knowledge call (/metrics, traces)
+instrumentation.install()
+
+# "turn" writes once per completed turn with history as an append-only log;
+# "sqlite" is CrewAI's default, a full state snapshot after every flow method
+flow_persistence = (
+    TurnPersistence.from_env()
+    if os.getenv("FLOW_PERSISTENCE", "turn").lower() == "turn"
+    else SQLiteFlowPersistence()
+)
+
+
+@lru_cache(maxsize=1)
+def assistant_crew():
+    """
+    The benefits crew, built once per process on first use.
+
+    Building it imports the crew module, reads its YAML config, chooses the
+    knowledge backend and creates the agent; each turn runs on a cheap copy of this template instead.
+    """
+    from conversational_routing.crews.assistant_crew.assistant_crew import (
+        AssistantCrew,
+    )
+
+    return AssistantCrew().crew()
+
+
+CLASSIFICATION_GUIDE = (
+    "You understand if the user is just sending a pleasantry or a general conversation item - then return 'pleasantries'. "
+    "If the user is asking a question related to Chase Freedom card or card benefits such as Auto Rental Coverage, Extended Warranty Protection, Purchase Protection, Roadside Assistance, Travel and Emergency Assistance, Trip Cancellation and Interruption Insurance - then return 'question'. "
+    "If the user is asking a question that is not related to Chase Freedom card benefits - then return 'non-chase-question'."
+)
+
+
+def classify_with_agent(current_message: str, conversation_context: str) -> str:
+    """The classifier agent's raw reply (CLASSIFIER_PROFILE=agent)."""
+    classification_agent = Agent(
+        role="User Prompt Classification Agent",
+        goal="Classify the user prompt into one of the following categories: pleasantries, question, or non-Chase question.",
+        backstory="You are a user prompt classification agent. " + CLASSIFICATION_GUIDE,
+        verbose=False,
+        llm=get_llm(),
+    )
+
+    classification_task = (
+        f"Evaluate the user prompt: '{current_message}'.\n\n"
+        f"Consider Conversation History:\n{conversation_context}\n\n"
+        "Return the classification result as a single word: pleasantries, question, or non-chase-question."
+    )
+
+    return classification_agent.kickoff(classification_task).raw
+
+
+def classify_constrained(
+    current_message: str, conversation_context: str, retry: bool = False
+) -> str:
+    """
+    One classifier call with the constrained profile (see get_classifier_llm).
+
+    The retry prompt leaves out the label guide, so it is shorter and asks for
+    nothing but one of the labels.
+    """
+    guide = "" if retry else CLASSIFICATION_GUIDE + "\n\n"
+    prompt = (
+        f"{guide}Evaluate the user prompt: '{current_message}'.\n\n"
+        f"Consider Conversation History:\n{conversation_context}\n\n"
+        "Return the classification result as a single word: pleasantries, question, or non-chase-question."
+    )
+    if retry:
+        prompt += " Return nothing else."
+    return get_classifier_llm().call([{"role": "user", "content": prompt}])
+
+
+# "constrained" classifies with one direct, enum-constrained call; "agent" keeps
+# the classifier agent with default generation settings
+classifier_profile = os.getenv("CLASSIFIER_PROFILE", "constrained").lower()
+if classifier_profile not in ("constrained", "agent"):
+    raise ValueError(f"Unsupported classifier profile: {classifier_profile}")
+
+# Route taken when neither the reply nor its retry parse to a label
+classifier_default_label = os.getenv("CLASSIFIER_DEFAULT_LABEL", "question")
+if classifier_default_label not in LABELS:
+    raise ValueError(
+        f"Unsupported classifier default label: {classifier_default_label}"
+    )
+
+classifier_stats = Counters("llm_classifier")
+
+
+def classify_with_llm(current_message: str, conversation_context: str) -> str:
+    """
+    Classify a message with the LLM; always returns one of LABELS.
+
+    Replies are normalized (case, punctuation, extra words). One that still
+    has no single label is retried once with classify_constrained's short
+    prompt, and after that the turn takes classifier_default_label, so the
+    router never ends up without a route.
+    """
+    classifier_stats.incr("calls")
+    if classifier_profile == "agent":
+        reply = classify_with_agent(current_message, conversation_context)
+    else:
+        reply = classify_constrained(current_message, conversation_context)
+    label = normalize_label(reply)
+    if label is not None:
+        if label != reply and getattr(reply, "label", None) != label:
+            classifier_stats.incr("normalized")
+        return label
+
+    classifier_stats.incr("parse_failures")
+    classifier_stats.incr("retries")
+    label = normalize_label(
+        classify_constrained(current_message, conversation_context, retry=True)
+    )
+    if label is not None:
+        return label
+    classifier_stats.incr("parse_failures")
+    classifier_stats.incr("defaulted")
+    return classifier_default_label
+
+
+def classify_batch(requests: List[Tuple[str, str]]) -> List[str]:
+    """
+    Classify several (message, conversation context) pairs in one LLM call.
+
+    The call uses the classifier profile (see get_batch_classifier_llm). The
+    reply must hold one known label per message; if it does not, each message
+    is classified on its own with classify_with_llm.
+    """
+    blocks = [
+        f"[{i}] Message: '{message}'\n    Conversation History: {context or '(none)'}"
+        for i, (message, context) in enumerate(requests, 1)
+    ]
+    prompt = (
+        "Classify each user message below as pleasantries, question, or non-chase-question. "
+        + CLASSIFICATION_GUIDE
+        + "\n\nMessages:\n"
+        + "\n".join(blocks)
+        + f"\n\nReturn only a JSON array of {len(requests)} labels, one per message, in order."
+    )
+    reply = get_batch_classifier_llm().call([{"role": "user", "content": prompt}])
+    labels = getattr(reply, "labels", None)
+    if labels is None:
+        reply = str(reply)
+        try:
+            labels = json.loads(reply[reply.index("[") : reply.rindex("]") + 1])
+        except ValueError:
+            labels = None
+    if isinstance(labels, list) and len(labels) == len(requests):
+        labels = [normalize_label(label) for label in labels]
+        if None not in labels:
+            return labels
+    if classification_batcher is not None:
+        classification_batcher.stats.incr("fallbacks")
+    return [classify_with_llm(message, context) for message, context in requests]
+
+
+# LLM classifications from concurrent turns are grouped into one call per batch:
+# up to CLASSIFICATION_BATCH_MAX_SIZE messages, collected for at most
+# CLASSIFICATION_BATCH_MAX_WAIT_MS after the first one arrives
+classification_batcher = (
+    MicroBatcher.from_env(
+        classify_batch, prefix="CLASSIFICATION_BATCH", name="classification_batches"
+    )
+    if os.getenv("CLASSIFICATION_BATCHING", "false").lower() == "true"
+    else None
+)
+
+
+def classify(current_message: str, conversation_context: str) -> str:
+    if classification_batcher is None:
+        return classify_with_llm(current_message, conversation_context)
+    return classification_batcher.submit((current_message, conversation_context))
+
+
+# One LLM call classifies the message and, for pleasantries, also writes the
+# reply, so those turns skip the answer step's own LLM call
+classify_and_respond_mode = os.getenv("CLASSIFY_AND_RESPOND", "false").lower() == "true"
+classify_and_respond_stats = Counters("classify_and_respond")
+
+
+def classify_and_respond(
+    current_message: str, conversation_context: str
+) -> Tuple[str, str]:
+    """
+    Classify a message and draft the reply to a pleasantry in one LLM call.
+
+    Returns (label, reply); reply is "" unless the label is pleasantries. If
+    the LLM's reply is not the expected JSON object, the message is classified
+    with classify_with_llm and the route's own answer step writes the reply.
+    """
+    prompt = (
+        "You are a friendly Chase Freedom Benefits card assistant. "
+        + CLASSIFICATION_GUIDE
+        + f"\n\nEvaluate the user prompt: '{current_message}'.\n\n"
+        f"Consider Conversation History:\n{conversation_context}\n\n"
+        'Return only a JSON object {"classification": ..., "response": ...}. '
+        "classification is one of pleasantries, question, or non-chase-question. "
+        "If it is pleasantries, response is a friendly, short reply to the user's pleasantry; "
+        "otherwise response is an empty string."
+    )
+    classify_and_respond_stats.incr("calls")
+    reply = str(get_llm().call([{"role": "user", "content": prompt}]))
+    try:
+        result = json.loads(reply[reply.index("{") : reply.rindex("}") + 1])
+        label = normalize_label(result["classification"])
+        response = str(result.get("response") or "").strip()
+    except (ValueError, TypeError, KeyError):
+        label = None
+    if label is None:
+        classify_and_respond_stats.incr("fallbacks")
+        return classify_with_llm(current_message, conversation_context), ""
+    return label, response if label == "pleasantries" else ""
 
 
 class ChatState(BaseModel):
     # id : str is a hidden Flow state property maintained by CrewAI framework
     current_message: str = ""
     conversation_history: List[dict] = []
+    conversation_summary: str = ""
+    # Position of conversation_history[0] in the full conversation, so the
+    # persistence layer can append new entries without rewriting old ones
+    history_offset: int = 0
+    # Completed turns in this conversation. Clients that only send the new message
+    # pass expected_turns (the turns they have seen); if the persisted state is
+    # behind (expired, or another deployment), the flow asks them to resend their
+    # copy of the thread as resync_history
+    turn_count: int = 0
+    expected_turns: int = 0
+    resync_history: List[dict] = []
 
     current_agent: str = ""
     current_agent_response: str = ""
@@ -35,38 +347,80 @@ class ChatState(BaseModel):
 # Here's how @persist() works:
 # * if inputs['id'] is provided, CrewAI will use it to resume the conversation (retrieve the state from database)
 # * if inputs['id'] is not provided, CrewAI will create a new conversation (persist the state to database)
-@persist()
+# * with TurnPersistence the state is only written once per turn, after send_response
+@persist(flow_persistence)
 class ChatFlow(Flow[ChatState]):
+    # Knowledge search started during classification; not part of the state
+    _prefetch: Optional[Prefetch] = PrivateAttr(default=None)
+    # Pleasantry reply written by classify_and_respond; not part of the state
+    _drafted_response: str = PrivateAttr(default="")
+
     @start()
     def initial_processing(self):
-        # This is a good place to put any initial processing logic before routing, such as filtering or sanitizing the input or reducing number of messages
-        # In this example, we're reducing the conversation history to the last 10 messages
-        self.state.conversation_history = self.state.conversation_history[-10:]
+        if self.state.resync_history:
+            # The client resent the (bounded) tail of the thread: rebuild from it
+            entries = 2 * self.state.expected_turns
+            self.state.conversation_history = list(self.state.resync_history)
+            self.state.conversation_summary = ""
+            self.state.history_offset = max(
+                0, entries - len(self.state.conversation_history)
+            )
+            self.state.turn_count = self.state.expected_turns
+            self.state.resync_history = []
 
-    @router(initial_processing)
-    def classify_message(self):
-        classification_agent = Agent(
-            role="User Prompt Classification Agent",
-            goal="Classify the user prompt into one of the following categories: pleasantries, question, or non-Chase question.",
-            backstory=(
-                "You are a user prompt classification agent. "
-                "You understand if the user is just sending a pleasantry or a general conversation item - then return 'pleasantries'. "
-                "If the user is asking a question related to Chase Freedom card or card benefits such as Auto Rental Coverage, Extended Warranty Protection, Purchase Protection, Roadside Assistance, Travel and Emergency Assistance, Trip Cancellation and Interruption Insurance - then return 'question'. "
-                "If the user is asking a question that is not related to Chase Freedom card benefits - then return 'non-chase-question'."
-            ),
-            verbose=False,
-            llm=llm,
+        # This is a good place to put any initial processing logic before routing, such as filtering or sanitizing the input or reducing number of messages
+        # In this example, once the history goes over its token budget the older turns are folded
+        # into a running summary, and only the most recent turns are kept verbatim
+        update = conversation_memory.update(
+            self.state.conversation_summary, self.state.conversation_history
         )
+        self.state.history_offset += len(self.state.conversation_history) - len(
+            update.conversation_history
+        )
+        self.state.conversation_summary = update.summary
+        self.state.conversation_history = update.conversation_history
 
-        classification_task = (
-            f"Evaluate the user prompt: '{self.state.current_message}'.\n\n"
-            f"Consider Conversation History:\n{self.state.conversation_history}.\n\n"
-            "Return the classification result as a single word: pleasantries, question, or non-chase-question."
+    def conversation_context(self) -> str:
+        return render_context(
+            self.state.conversation_summary, self.state.conversation_history
         )
 
-        result = classification_agent.kickoff(classification_task)
+    @router(initial_processing)
+    def classify_message(self):
+        if self.state.expected_turns > self.state.turn_count:
+            return "resync_history"
+
+        # Greetings, thanks and obvious benefit questions are classified locally;
+        # only messages the fast path is unsure about pay for an LLM round trip
+        prediction = None
+        if fast_path_classifier is not None:
+            prediction = fast_path_classifier.classify(
+                self.state.current_message, self.state.conversation_history
+            )
 
-        self.state.classification = result.raw
+        if prediction is not None:
+            self.state.classification = prediction.label
+        else:
+            if speculative_retrieval is not None:
+                self._prefetch = speculative_retrieval.start(self.state.current_message)
+            context = self.conversation_context()
+            if classify_and_respond_mode:
+                self.state.classification, self._drafted_response = coalesced(
+                    "classify_and_respond",
+                    self.state.current_message,
+                    context,
+                    lambda: classify_and_respond(self.state.current_message, context),
+                )
+            else:
+                self.state.classification = coalesced(
+                    "classify",
+                    self.state.current_message,
+                    context,
+                    lambda: classify(self.state.current_message, context),
+                )
+            if self.state.classification != "question":
+                discard_prefetch(self._prefetch)
+                self._prefetch = None
 
         if self.state.classification == "pleasantries":
             return "respond_to_pleasantries"
@@ -77,6 +431,13 @@ class ChatFlow(Flow[ChatState]):
 
     @listen("respond_to_pleasantries")
     def answer_pleasantries(self):
+        # Written along with the classification: sent as-is, without streamed chunks
+        if self._drafted_response:
+            classify_and_respond_stats.incr("drafted_replies")
+            self.state.current_agent_response = self._drafted_response
+            self.state.current_agent = "classify_and_respond"
+            return
+
         simple_response_agent = Agent(
             role="Chase Freedom Card Assistant",
             goal="Respond to the user's pleasantry",
@@ -86,7 +447,7 @@ class ChatFlow(Flow[ChatState]):
                 "You respond to the user's pleasantry with a friendly, short message."
             ),
             verbose=False,
-            llm=llm,
+            llm=get_response_llm(),
         )
 
         self.state.current_agent_response = simple_response_agent.kickoff(
@@ -96,28 +457,74 @@ class ChatFlow(Flow[ChatState]):
 
     @listen("respond_to_question")
     def answer_question(self):
-        # Call the crew that will respond to the user message
-        assistant_crew = (
-            AssistantCrew()
-            .crew()
-            .kickoff(
-                {
-                    "current_message": self.state.current_message,
-                    "conversation_history": self.state.conversation_history,
-                }
+        self.state.current_agent = "chase_question_crew"
+        prefetch, self._prefetch = self._prefetch, None
+
+        # Benefits questions repeat a lot - serve them from the answer cache when we can
+        if answer_cache is not None:
+            cached_response = answer_cache.get(
+                self.state.current_message,
+                self.state.conversation_history,
+                self.state.conversation_summary,
             )
-        )
+            if cached_response is not None:
+                discard_prefetch(prefetch)
+                self.state.current_agent_response = cached_response
+                return
 
-        self.state.current_agent_response = assistant_crew.raw
-        self.state.current_agent = "chase_question_crew"
+        context = self.conversation_context()
+
+        def run_crew() -> str:
+            started = time.perf_counter()
+
+            # Call the crew that will respond to the user message
+            crew_output = (
+                assistant_crew()
+                .copy()
+                .kickoff(
+                    {
+                        "current_message": self.state.current_message,
+                        "conversation_history": context,
+                        "knowledge_context": knowledge_context(
+                            self.state.current_message, prefetch
+                        ),
+                    }
+                )
+            )
+
+            if answer_cache is not None:
+                answer_cache.put(
+                    self.state.current_message,
+                    self.state.conversation_history,
+                    crew_output.raw,
+                    compute_ms=(time.perf_counter() - started) * 1000,
+                    summary=self.state.conversation_summary,
+                )
+            return crew_output.raw
+
+        # Turns that join a run already in flight get its answer in the final
+        # response only, like cached answers, without streamed chunks
+        self.state.current_agent_response = coalesced(
+            "answer", self.state.current_message, context, run_crew
+        )
+        # Turns that joined another run never used theirs
+        discard_prefetch(prefetch)
 
     @listen("respond_to_non_chase_question")
     def answer_non_chase_question(self):
         self.state.current_agent_response = "This doesn't look like a Chase Freedom card question, can you please try something else?"
         self.state.current_agent = "non_chase_question"
 
+    @listen("resync_history")
+    def request_history(self):
+        # Nothing is persisted for this turn; the client retries with resync_history
+        return json.dumps(
+            {"id": self.state.id, "resync": True, "turns": self.state.turn_count}
+        )
+
     @listen(or_(answer_pleasantries, answer_question, answer_non_chase_question))
     def send_response(self):
+        self.state.turn_count += 1
         # Update the conversation history in context
         self.state.conversation_history.append(
             {"role": "user", "content": self.state.current_message}
@@ -133,11 +540,13 @@ class ChatFlow(Flow[ChatState]):
                 "response": self.state.current_agent_response,
                 "current_agent": self.state.current_agent,
                 "classification": self.state.classification,
+                "timings": instrumentation.turn_timings(),
             }
         )
 
 
 def kickoff():
+    instrumentation.serve_metrics_from_env()
     chat_flow = ChatFlow()
     chat_flow.kickoff(inputs={})
 
@@ -0,0 +1,154 @@
+import os
+import re
+from functools import lru_cache
+from typing import Callable, List, NamedTuple, Optional
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken when available, ~4 characters per token otherwise."""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to at most `max_tokens` tokens, marking the cut with an ellipsis."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _encoding()
+    if encoding is not None:
+        return encoding.decode(encoding.encode(text)[: max(max_tokens - 1, 0)]) + "…"
+    return text[: max(max_tokens - 1, 0) * 4] + "…"
+
+
+def render_context(summary: str, conversation_history: List[dict]) -> str:
+    """Compact prompt text for the summary plus the verbatim recent turns."""
+    lines = []
+    if summary:
+        lines.append(f"Summary of earlier conversation: {summary}")
+    for entry in conversation_history:
+        lines.append(f"{entry.get('role', 'user')}: {entry.get('content', '')}")
+    return "\n".join(lines) if lines else "(no previous messages)"
+
+
+def extractive_summary(summary: str, turns: List[dict], max_tokens: int) -> str:
+    """Keep the first sentence of each folded turn; used when no LLM summarizer is set."""
+    sentences = [summary] if summary else []
+    for entry in turns:
+        first = re.split(r"(?<=[.!?])\s", str(entry.get("content", "")).strip(), 1)[0]
+        sentences.append(f"{entry.get('role', 'user')}: {first}")
+    text = " ".join(sentences)
+    while count_tokens(text) > max_tokens and len(sentences) > 1:
+        sentences.pop(0)
+        text = " ".join(sentences)
+    return text
+
+
+class MemoryUpdate(NamedTuple):
+    summary: str
+    conversation_history: List[dict]
+    summarized: bool
+
+
+class ConversationMemory:
+    """
+    Token-budgeted conversation memory for ChatFlow.
+
+    The last `recent_entries` history entries are always kept. Only when the
+    rendered context goes over `token_budget` are the older entries folded into
+    the running summary, so the summarizer runs once every few turns rather
+    than on every message. Recent entries longer than their share of the budget
+    are truncated first; otherwise a few long answers would keep the context
+    over budget on their own and the summarizer would run on every turn.
+    """
+
+    def __init__(
+        self,
+        summarize: Optional[Callable[[str, List[dict], int], str]] = None,
+        token_budget: int = 800,
+        recent_entries: int = 4,
+        summary_tokens: int = 150,
+    ):
+        self.summarize = summarize or extractive_summary
+        self.token_budget = token_budget
+        self.recent_entries = recent_entries
+        self.summary_tokens = summary_tokens
+
+    @classmethod
+    def from_env(cls, summarize=None) -> "ConversationMemory":
+        return cls(
+            summarize=summarize,
+            token_budget=int(os.getenv("MEMORY_TOKEN_BUDGET", "800")),
+            recent_entries=int(os.getenv("MEMORY_RECENT_ENTRIES", "4")),
+            summary_tokens=int(os.getenv("MEMORY_SUMMARY_TOKENS", "150")),
+        )
+
+    def _fits(self, summary: str, conversation_history: List[dict]) -> bool:
+        context = render_context(summary, conversation_history)
+        return count_tokens(context) <= self.token_budget
+
+    def update(self, summary: str, conversation_history: List[dict]) -> MemoryUpdate:
+        if self._fits(summary, conversation_history):
+            return MemoryUpdate(summary, conversation_history, False)
+
+        split = max(len(conversation_history) - self.recent_entries, 0)
+        folded, recent = conversation_history[:split], conversation_history[split:]
+        recent = self._truncate(recent)
+        # Trimming the recent window may be enough; then nothing is folded yet
+        if not folded or self._fits(summary, folded + recent):
+            return MemoryUpdate(summary, folded + recent, False)
+
+        try:
+            new_summary = self.summarize(summary, folded, self.summary_tokens)
+        except Exception:
+            # Never lose a turn because the summarizer call failed
+            new_summary = extractive_summary(summary, folded, self.summary_tokens)
+        return MemoryUpdate(new_summary, recent, True)
+
+    def _truncate(self, recent: List[dict]) -> List[dict]:
+        """Cap each entry at its share of the budget left after the summary."""
+        if not recent:
+            return recent
+        # Three quarters of an even split, so a trimmed window lands well under
+        # budget and the next few turns fit before anything is folded again
+        share = max(
+            (self.token_budget - self.summary_tokens) * 3 // 4 // len(recent), 1
+        )
+        return [
+            {**entry, "content": truncate_tokens(str(entry.get("content", "")), share)}
+            if count_tokens(str(entry.get("content", ""))) > share
+            else entry
+            for entry in recent
+        ]
+
+
+def llm_summarizer(get_llm: Callable) -> Callable[[str, List[dict], int], str]:
+    """
+    Summarizer that folds turns into the running summary with one LLM call.
+
+    `get_llm` is called on first use, so the model is not built until a
+    conversation actually outgrows its token budget.
+    """
+
+    def summarize(summary: str, turns: List[dict], max_tokens: int) -> str:
+        prompt = (
+            f"Current summary of the conversation so far:\n{summary or '(empty)'}\n\n"
+            f"New messages to fold into the summary:\n{render_context('', turns)}\n\n"
+            f"Write an updated summary in at most {max_tokens} tokens. Keep the facts, "
+            "card benefits and open questions the assistant needs to answer follow-ups. "
+            "Return only the summary."
+        )
+        return str(get_llm().call([{"role": "user", "content": prompt}])).strip()
+
+    return summarize
@@ -0,0 +1,133 @@
+"""
+Model providers, selected by MODEL_FAMILY and built on first use.
+
+Importing a provider SDK and constructing its LLM takes over a second, and
+vertex also decodes a service account. None of that happens at import time.
+Each provider module exposes `build_llm()`, `build_classifier_llm(**settings)`
+and `build_embedder_configuration()`.
+The getters below import the selected module on first call and memoize what it
+builds for the life of the process.
+
+LLM_PROVIDERS lists several families (e.g. "gemini,openai") to spread LLM calls
+over them with a RoutingLLM (see router.py); embeddings always use MODEL_FAMILY.
+"""
+
+import importlib
+import os
+from functools import lru_cache
+from typing import List
+
+PROVIDERS = {
+    "gemini": "conversational_routing.models.gemini",
+    "vertex": "conversational_routing.models.vertex",
+    "openai": "conversational_routing.models.openai",
+    "fake": "conversational_routing.models.fake",
+}
+
+
+def model_family() -> str:
+    """The configured MODEL_FAMILY; raises ValueError for unknown families."""
+    family = os.getenv("MODEL_FAMILY", "gemini")
+    if family not in PROVIDERS:
+        raise ValueError(f"Unsupported model family: {family}")
+    return family
+
+
+def llm_providers() -> List[str]:
+    """Families LLM calls go to: LLM_PROVIDERS, or just MODEL_FAMILY."""
+    families = [
+        family.strip()
+        for family in os.getenv("LLM_PROVIDERS", model_family()).split(",")
+        if family.strip()
+    ]
+    for family in families:
+        if family not in PROVIDERS:
+            raise ValueError(f"Unsupported model family: {family}")
+    return families
+
+
+def _provider(family: str):
+    return importlib.import_module(PROVIDERS[family])
+
+
+@lru_cache(maxsize=1)
+def get_llm():
+    """The LLM for routing, summaries and other internal calls."""
+    families = llm_providers()
+    if len(families) == 1:
+        return _provider(families[0]).build_llm()
+
+    from conversational_routing.models.router import RoutingLLM
+
+    return RoutingLLM.from_env(
+        {family: _provider(family).build_llm() for family in families}
+    )
+
+
+def classifier_settings() -> dict:
+    """
+    Call profile for routing classification: the reply is one label, so it is
+    constrained to the label enum, generated greedily and capped at a few tokens.
+    """
+    from conversational_routing.classifier import ClassificationLabel
+
+    return {
+        "temperature": float(os.getenv("CLASSIFIER_TEMPERATURE", "0")),
+        "max_tokens": int(os.getenv("CLASSIFIER_MAX_TOKENS", "16")),
+        "response_format": ClassificationLabel,
+    }
+
+
+def batch_classifier_settings() -> dict:
+    """
+    classifier_settings() for a batch of up to CLASSIFICATION_BATCH_MAX_SIZE
+    messages: a list of labels, with the output budget scaled to match.
+    """
+    from conversational_routing.classifier import ClassificationLabels
+
+    settings = classifier_settings()
+    max_batch = int(os.getenv("CLASSIFICATION_BATCH_MAX_SIZE", "16"))
+    settings["max_tokens"] *= max_batch
+    settings["response_format"] = ClassificationLabels
+    return settings
+
+
+@lru_cache(maxsize=1)
+def get_classifier_llm():
+    """The LLM for message classification, built with classifier_settings()."""
+    return _build_classifier_llm(classifier_settings())
+
+
+@lru_cache(maxsize=1)
+def get_batch_classifier_llm():
+    """The LLM for batched classification, built with batch_classifier_settings()."""
+    return _build_classifier_llm(batch_classifier_settings())
+
+
+def _build_classifier_llm(settings: dict):
+    families = llm_providers()
+    if len(families) == 1:
+        return _provider(families[0]).build_classifier_llm(**settings)
+
+    from conversational_routing.models.router import RoutingLLM
+
+    return RoutingLLM.from_env(
+        {
+            family: _provider(family).build_classifier_llm(**settings)
+            for family in families
+        }
+    )
+
+
+@lru_cache(maxsize=1)
+def get_response_llm():
+    """The LLM for user-facing answers: streams tokens unless STREAM_RESPONSES=false."""
+    llm = get_llm()
+    if os.getenv("STREAM_RESPONSES", "true").lower() == "true":
+        return llm.model_copy(update={"stream": True})
+    return llm
+
+
+@lru_cache(maxsize=1)
+def get_embedder_configuration() -> dict:
+    return _provider(model_family()).build_embedder_configuration()
@@ -0,0 +1,322 @@
+"""
+Deterministic stand-ins for the LLM and the embedder (MODEL_FAMILY=fake).
+
+They let ChatFlow run end to end without network access or credentials, for
+benchmarks and local development. Responses depend only on the prompt (and the
+noise rates below), and latency is simulated with sleeps:
+
+- FAKE_LLM_LATENCY_MS: time to first token of every call (default 200)
+- FAKE_LLM_TOKEN_MS: time per generated word (default 0)
+- FAKE_LLM_ANSWER_WORDS: length of answers (default 60)
+- FAKE_LLM_TAIL_RATE, FAKE_LLM_TAIL_MS: share of calls that take FAKE_LLM_TAIL_MS
+  longer (default 0, 0)
+- FAKE_LLM_ERROR_RATE: share of calls that fail with a 429 (default 0)
+- FAKE_LLM_MAX_CONCURRENCY: calls served at once, like a provider's concurrency
+  quota; further calls wait for a slot (default 0, unlimited)
+- FAKE_LLM_LABEL_NOISE: share of unconstrained classification replies that come
+  back decorated ("Question.", "**pleasantries**") the way real models sometimes
+  answer (default 0)
+- FAKE_EMBEDDER_LATENCY_MS: time per embedding batch (default 0)
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Any, List, Optional
+
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+from crewai.events.types.llm_events import LLMCallType
+from crewai.llms.base_llm import BaseLLM, llm_call_context
+from crewai.rag.embeddings.providers.custom.embedding_callable import (
+    CustomEmbeddingFunction,
+)
+from pydantic import PrivateAttr
+
+PLEASANTRIES = {"hello", "hi", "hey", "thanks", "thank", "morning", "bye", "great"}
+CHASE_TERMS = {
+    "benefit",
+    "benefits",
+    "card",
+    "chase",
+    "freedom",
+    "coverage",
+    "covered",
+    "warranty",
+    "rental",
+    "insurance",
+    "protection",
+    "claim",
+    "roadside",
+    "travel",
+    "trip",
+}
+
+ANSWER_TEXT = (
+    "Your Chase Freedom card includes purchase protection, extended warranty "
+    "protection and auto rental collision damage waiver when you pay with the "
+    "card. Coverage limits and exclusions apply, so check the benefits guide "
+    "and call the benefits administrator to start a claim."
+).split()
+
+PLEASANTRY_REPLY = "Happy to help! What would you like to know about your card?"
+
+# How models dress up a bare label when nothing constrains their output
+NOISY_LABELS = (
+    lambda label: label.capitalize() + ".",
+    lambda label: f"**{label}**",
+    lambda label: f"Classification: {label}",
+    lambda label: label.replace("-", " ").upper(),
+)
+
+# One line per message in a batched classification prompt
+BATCH_MESSAGE = re.compile(r"^\[\d+\] Message: '(.*)'$", re.MULTILINE)
+
+
+class FakeProviderError(Exception):
+    """A provider error with an HTTP status, like the SDKs raise."""
+
+    def __init__(self, status_code: int = 429):
+        super().__init__(f"Fake provider returned HTTP {status_code}")
+        self.status_code = status_code
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"[a-z']+", text.lower())
+
+
+def _user_message(prompt: str) -> str:
+    """The end user's message quoted in a ChatFlow prompt, or the whole prompt."""
+    match = re.search(
+        r"Evaluate the user prompt: '(.*?)'\.\n|Current message: (.*)", prompt
+    )
+    if match is None:
+        return prompt
+    return match.group(1) if match.group(1) is not None else match.group(2)
+
+
+def _label(message: str) -> str:
+    words = set(_words(message))
+    if words & CHASE_TERMS:
+        return "question"
+    if words & PLEASANTRIES:
+        return "pleasantries"
+    return "non-chase-question"
+
+
+class FakeLLM(BaseLLM):
+    """
+    BaseLLM that answers from the prompt text alone.
+
+    Classification prompts get a keyword-based label, batched ones a JSON
+    array of them, and classify-and-respond ones a JSON object with the label
+    and, for pleasantries, a reply. Other prompts get a fixed benefits answer
+    of `answer_words` words. Agent prompts are answered in the ReAct format
+    CrewAI parses. With `stream` set, answers are emitted word by word as
+    LLMStreamChunkEvents, like a real streaming model.
+    """
+
+    model: str = "fake/chat"
+    llm_type: str = "fake"
+    provider: str = "fake"
+    stream: bool = False
+    latency_ms: float = 200.0
+    token_ms: float = 0.0
+    answer_words: int = 60
+    tail_rate: float = 0.0
+    tail_latency_ms: float = 0.0
+    error_rate: float = 0.0
+    max_concurrency: int = 0
+    label_noise: float = 0.0
+    max_tokens: Optional[int] = None
+    response_format: Optional[type] = None
+    _slots: Optional[threading.BoundedSemaphore] = PrivateAttr(default=None)
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        if self.max_concurrency > 0:
+            self._slots = threading.BoundedSemaphore(self.max_concurrency)
+
+    @classmethod
+    def from_env(cls) -> "FakeLLM":
+        return cls(
+            model="fake/chat",
+            provider="fake",
+            latency_ms=float(os.getenv("FAKE_LLM_LATENCY_MS", "200")),
+            token_ms=float(os.getenv("FAKE_LLM_TOKEN_MS", "0")),
+            answer_words=int(os.getenv("FAKE_LLM_ANSWER_WORDS", "60")),
+            tail_rate=float(os.getenv("FAKE_LLM_TAIL_RATE", "0")),
+            tail_latency_ms=float(os.getenv("FAKE_LLM_TAIL_MS", "0")),
+            error_rate=float(os.getenv("FAKE_LLM_ERROR_RATE", "0")),
+            max_concurrency=int(os.getenv("FAKE_LLM_MAX_CONCURRENCY", "0")),
+            label_noise=float(os.getenv("FAKE_LLM_LABEL_NOISE", "0")),
+        )
+
+    def _respond(self, prompt: str, last_message: str, structured=None) -> str:
+        if "single word: pleasantries, question, or non-chase-question" in prompt:
+            label = _label(_user_message(last_message))
+            if structured is not None:
+                # A provider's structured output: JSON for the model's one field
+                return json.dumps({next(iter(structured.model_fields)): label})
+            if random.random() < self.label_noise:
+                return random.choice(NOISY_LABELS)(label)
+            return label
+        if '{"classification": ..., "response": ...}' in prompt:
+            label = _label(_user_message(last_message))
+            reply = PLEASANTRY_REPLY if label == "pleasantries" else ""
+            return json.dumps({"classification": label, "response": reply})
+        if "Return only a JSON array of" in prompt:
+            labels = [_label(m) for m in BATCH_MESSAGE.findall(prompt)]
+            if structured is not None:
+                return json.dumps({next(iter(structured.model_fields)): labels})
+            return json.dumps(labels)
+        if "Return only the summary" in prompt:
+            return " ".join(_words(last_message)[-40:])
+        if "pleasantry" in prompt:
+            return PLEASANTRY_REPLY
+        repeats = self.answer_words // len(ANSWER_TEXT) + 1
+        return " ".join((ANSWER_TEXT * repeats)[: self.answer_words])
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ) -> str | Any:
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        prompt = "\n".join(str(m.get("content", "")) for m in messages)
+        user_messages = [m for m in messages if m.get("role") == "user"]
+        last_message = (
+            str(user_messages[-1].get("content", "")) if user_messages else ""
+        )
+
+        # Calls beyond the concurrency quota queue for a slot, as at a provider
+        with self._slots or contextlib.nullcontext(), llm_call_context():
+            self._emit_call_started_event(
+                messages=messages, from_task=from_task, from_agent=from_agent
+            )
+            latency_ms = self.latency_ms
+            if random.random() < self.tail_rate:
+                latency_ms += self.tail_latency_ms
+            time.sleep(latency_ms / 1000)
+            if random.random() < self.error_rate:
+                error = FakeProviderError(429)
+                self._emit_call_failed_event(
+                    error=str(error), from_task=from_task, from_agent=from_agent
+                )
+                raise error
+
+            react = "Final Answer:" in prompt
+            structured = response_model or self.response_format
+            answer = self._respond(prompt, last_message, structured)
+            if self.max_tokens is not None:
+                answer = " ".join(answer.split(" ")[: self.max_tokens])
+            if self.stream:
+                response_id = str(uuid.uuid4())
+                for i, word in enumerate(answer.split(" ")):
+                    time.sleep(self.token_ms / 1000)
+                    self._emit_stream_chunk_event(
+                        chunk=word if i == 0 else f" {word}",
+                        from_task=from_task,
+                        from_agent=from_agent,
+                        call_type=LLMCallType.LLM_CALL,
+                        response_id=response_id,
+                    )
+            else:
+                time.sleep(self.token_ms * len(answer.split(" ")) / 1000)
+            response = (
+                f"Thought: I now know the final answer\nFinal Answer: {answer}"
+                if react
+                else answer
+            )
+
+            self._emit_call_completed_event(
+                response=response,
+                call_type=LLMCallType.LLM_CALL,
+                from_task=from_task,
+                from_agent=from_agent,
+                messages=messages,
+                # Words stand in for tokens
+                usage={
+                    "prompt_tokens": len(prompt.split()),
+                    "completion_tokens": len(response.split()),
+                },
+            )
+        if structured is not None:
+            try:
+                return structured.model_validate_json(response)
+            except ValueError:
+                pass
+        return response
+
+    async def acall(self, *args, **kwargs) -> str | Any:
+        return self.call(*args, **kwargs)
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 128000
+
+
+class FakeEmbeddingFunction(CustomEmbeddingFunction, EmbeddingFunction):
+    """
+    Hashed bag-of-words embeddings: texts sharing words get similar vectors,
+    so the answer cache and knowledge search behave plausibly offline.
+
+    Crew validates custom embedders against chromadb's EmbeddingFunction and
+    CrewAI's factory against its own, hence both bases.
+    """
+
+    def __init__(
+        self, dimensions: int = 256, latency_ms: Optional[float] = None, **kwargs
+    ):
+        self.dimensions = dimensions
+        if latency_ms is None:
+            latency_ms = float(os.getenv("FAKE_EMBEDDER_LATENCY_MS", "0"))
+        self.latency_ms = latency_ms
+
+    def __call__(self, input):
+        time.sleep(self.latency_ms / 1000)
+        texts = [input] if isinstance(input, str) else list(input)
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in _words(text):
+                bucket = int.from_bytes(
+                    hashlib.blake2b(word.encode(), digest_size=4).digest(), "little"
+                )
+                vectors[row, bucket % self.dimensions] += 1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return list(vectors / np.where(norms == 0, 1, norms))
+
+
+def build_llm() -> FakeLLM:
+    return FakeLLM.from_env()
+
+
+def build_classifier_llm(temperature, max_tokens, response_format) -> FakeLLM:
+    return FakeLLM.from_env().model_copy(
+        update={
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "response_format": response_format,
+        }
+    )
+
+
+def build_embedder_configuration() -> dict:
+    return {
+        "provider": "custom",
+        "config": {"embedding_callable": FakeEmbeddingFunction},
+    }
@@ -1,15 +1,36 @@
 import os
 
-from crewai import LLM
-
-llm = LLM(
-    model=os.getenv("MODEL", "gemini/gemini-2.5-flash-lite"),
-    client_params={
-        "api_key": os.getenv("GEMINI_API_KEY"),
-    },
-)
-
-embedder_configuration = {
-    "provider": "google-generativeai",
-    "config": {"model_name": "gemini-embedding-001"},
-}
+
+def build_llm():
+    from crewai import LLM
+
+    return LLM(
+        model=os.getenv("MODEL", "gemini/gemini-2.5-flash-lite"),
+        client_params={
+            "api_key": os.getenv("GEMINI_API_KEY"),
+        },
+    )
+
+
+def build_classifier_llm(temperature, max_tokens, response_format):
+    from crewai import LLM
+    from google.genai import types
+
+    return LLM(
+        model=os.getenv("MODEL", "gemini/gemini-2.5-flash-lite"),
+        client_params={
+            "api_key": os.getenv("GEMINI_API_KEY"),
+        },
+        temperature=temperature,
+        max_output_tokens=max_tokens,
+        response_format=response_format,
+        # Thinking tokens would count against the small output budget
+        thinking_config=types.ThinkingConfig(thinking_budget=0),
+    )
+
+
+def build_embedder_configuration() -> dict:
+    return {
+        "provider": "google-generativeai",
+        "config": {"model_name": "gemini-embedding-001"},
+    }
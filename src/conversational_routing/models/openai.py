@@ -1,14 +1,30 @@
 import os
-from crewai import LLM
-
-llm = LLM(
-    model="gpt-4o",
-    client_params={
-        "api_key": os.getenv("OPENAI_API_KEY"),
-    }
-)
-
-embedder_configuration = {
-    "provider": "openai",
-    "config": {"model_name": "text-embedding-ada-002"}
-}
\ No newline at end of file
+
+
+def build_llm():
+    from crewai import LLM
+
+    return LLM(
+        model="gpt-4o",
+        client_params={
+            "api_key": os.getenv("OPENAI_API_KEY"),
+        },
+    )
+
+
+def build_classifier_llm(temperature, max_tokens, response_format):
+    from crewai import LLM
+
+    return LLM(
+        model="gpt-4o",
+        client_params={
+            "api_key": os.getenv("OPENAI_API_KEY"),
+        },
+        temperature=temperature,
+        max_tokens=max_tokens,
+        response_format=response_format,
+    )
+
+
+def build_embedder_configuration() -> dict:
+    return {"provider": "openai", "config": {"model_name": "text-embedding-ada-002"}}
@@ -0,0 +1,344 @@
+"""
+An LLM that spreads calls over several providers (LLM_PROVIDERS=gemini,openai).
+
+Each provider's recent latencies and failures are tracked. A call goes to the
+fastest provider that is not cooling down after a rate limit or server error.
+If the call fails that way, the next provider takes it. Non-streaming calls are
+also hedged: if the first provider has not answered after its own p95 latency,
+the same request goes to the next provider and whichever answers first wins.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+from crewai.llms.base_llm import BaseLLM
+from pydantic import Field, PrivateAttr
+
+from conversational_routing.stats import Counters
+
+# Exception class names the provider SDKs use for throttling and outages, for
+# errors that carry no HTTP status
+RETRYABLE_ERRORS = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "DeadlineExceeded",
+    "InternalServerError",
+    "RateLimitError",
+    "ResourceExhausted",
+    "ServiceUnavailable",
+    "ServiceUnavailableError",
+    "Timeout",
+}
+
+router_stats = Counters("llm_router")
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    for source in (error, getattr(error, "response", None)):
+        for attr in ("status_code", "code", "status"):
+            value = getattr(source, attr, None)
+            if isinstance(value, int) and 100 <= value < 600:
+                return value
+    return None
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether another provider should get a call that failed with `error`."""
+    while error is not None:
+        status = _status_code(error)
+        if status is not None:
+            return status in (408, 429) or status >= 500
+        if isinstance(error, (TimeoutError, ConnectionError)):
+            return True
+        if type(error).__name__ in RETRYABLE_ERRORS:
+            return True
+        # Native providers re-raise SDK errors wrapped in their own
+        error = error.__cause__
+    return False
+
+
+def _percentile(values, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+class ProviderHealth:
+    """Rolling latency and error window for one provider."""
+
+    def __init__(self, window: int):
+        self._lock = threading.Lock()
+        self.latencies_ms = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.consecutive_errors = 0
+        self.cooldown_until = 0.0
+
+    def succeeded(self, elapsed_ms: float):
+        with self._lock:
+            self.calls += 1
+            self.latencies_ms.append(elapsed_ms)
+            self.outcomes.append(True)
+            self.consecutive_errors = 0
+
+    def failed(self, cooldown_seconds: float, max_cooldown_seconds: float):
+        with self._lock:
+            self.calls += 1
+            self.errors += 1
+            self.outcomes.append(False)
+            self.consecutive_errors += 1
+            cooldown = min(
+                max_cooldown_seconds,
+                cooldown_seconds * 2 ** (self.consecutive_errors - 1),
+            )
+            self.cooldown_until = time.monotonic() + cooldown
+
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.cooldown_until
+
+    def latency_ms(self, pct: float) -> float:
+        with self._lock:
+            return _percentile(list(self.latencies_ms), pct)
+
+    def samples(self) -> int:
+        with self._lock:
+            return len(self.latencies_ms)
+
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self.outcomes:
+                return 0.0
+            return self.outcomes.count(False) / len(self.outcomes)
+
+
+class RoutingLLM(BaseLLM):
+    """
+    BaseLLM that sends each call to the fastest healthy provider.
+
+    Providers that have not answered yet rank first, so each gets measured.
+    A 429, 5xx, timeout or connection error puts the provider in a cooldown
+    that doubles with each consecutive failure, and the call moves on to the
+    next provider. Other errors (bad requests, context length) are raised.
+
+    With `hedge`, a non-streaming call that is still running after the
+    provider's p95 latency (at least `hedge_min_ms`) is sent to the next
+    provider as well. The slower call runs to completion in the background so
+    its latency still counts. Streaming calls are never hedged, because both
+    providers would stream chunks to the client, and neither are calls with
+    `tools` or `available_functions`, whose tools could run twice; those only
+    fail over.
+
+    Copies made with model_copy (e.g. the streaming response LLM) share the
+    providers and their health.
+    """
+
+    model: str = "router"
+    llm_type: str = "router"
+    provider: str = "router"
+    stream: bool = False
+    providers: Dict[str, Any] = Field(default_factory=dict)
+    hedge: bool = True
+    hedge_min_ms: float = 50.0
+    hedge_default_ms: float = 2000.0
+    window: int = 200
+    cooldown_seconds: float = 1.0
+    max_cooldown_seconds: float = 60.0
+    max_workers: int = 64
+
+    _health: Dict[str, ProviderHealth] = PrivateAttr(default_factory=dict)
+    _variants: Dict[tuple, BaseLLM] = PrivateAttr(default_factory=dict)
+    _pool: Optional[ThreadPoolExecutor] = PrivateAttr(default=None)
+
+    def model_post_init(self, __context):
+        super().model_post_init(__context)
+        if not self.providers:
+            raise ValueError("RoutingLLM needs at least one provider")
+        self._health = {name: ProviderHealth(self.window) for name in self.providers}
+        # Threads start on first submit, so routers that never hedge cost nothing
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="llm-router"
+        )
+        self.model = "router/" + "+".join(self.providers)
+
+    @classmethod
+    def from_env(cls, providers: Dict[str, BaseLLM]) -> "RoutingLLM":
+        return cls(
+            model="router",
+            provider="router",
+            providers=providers,
+            hedge=os.getenv("LLM_HEDGE", "true").lower() == "true",
+            hedge_min_ms=float(os.getenv("LLM_HEDGE_MIN_MS", "50")),
+            hedge_default_ms=float(os.getenv("LLM_HEDGE_DEFAULT_MS", "2000")),
+            window=int(os.getenv("LLM_ROUTER_WINDOW", "200")),
+            cooldown_seconds=float(os.getenv("LLM_ROUTER_COOLDOWN_SECONDS", "1")),
+            max_cooldown_seconds=float(
+                os.getenv("LLM_ROUTER_MAX_COOLDOWN_SECONDS", "60")
+            ),
+            max_workers=int(os.getenv("LLM_ROUTER_WORKERS", "64")),
+        )
+
+    def ranked(self) -> List[str]:
+        """Provider names, healthy before cooling down, then by p50 latency."""
+        return sorted(
+            self.providers,
+            key=lambda name: (
+                not self._health[name].healthy(),
+                self._health[name].latency_ms(50),
+            ),
+        )
+
+    def report(self) -> Dict[str, dict]:
+        """Calls, error rate and tail latency per provider over the window."""
+        return {
+            name: {
+                "calls": health.calls,
+                "errors": health.errors,
+                "error_rate": round(health.error_rate(), 4),
+                "p50_ms": round(health.latency_ms(50), 2),
+                "p95_ms": round(health.latency_ms(95), 2),
+                "p99_ms": round(health.latency_ms(99), 2),
+                "healthy": health.healthy(),
+            }
+            for name, health in self._health.items()
+        }
+
+    def _provider_llm(self, name: str) -> BaseLLM:
+        """The provider, with this router's stream flag and stop words."""
+        llm = self.providers[name]
+        if llm.stream == self.stream and llm.stop == self.stop:
+            return llm
+        key = (name, self.stream, tuple(self.stop))
+        variant = self._variants.get(key)
+        if variant is None:
+            variant = llm.model_copy(
+                update={"stream": self.stream, "stop": list(self.stop)}
+            )
+            self._variants[key] = variant
+        return variant
+
+    def _call_provider(self, name: str, messages, kwargs) -> Any:
+        health = self._health[name]
+        router_stats.incr(f"{name}_calls")
+        started = time.perf_counter()
+        try:
+            result = self._provider_llm(name).call(messages, **kwargs)
+        except Exception as e:
+            if is_retryable(e):
+                router_stats.incr(f"{name}_errors")
+                health.failed(self.cooldown_seconds, self.max_cooldown_seconds)
+            raise
+        health.succeeded((time.perf_counter() - started) * 1000)
+        return result
+
+    def _hedge_delay(self, name: str) -> float:
+        health = self._health[name]
+        if health.samples() < 10:
+            return self.hedge_default_ms / 1000
+        return max(self.hedge_min_ms, health.latency_ms(95)) / 1000
+
+    def _submit(self, name: str, messages, kwargs, hedged: bool = False):
+        if isinstance(messages, list):
+            # Providers may rewrite messages in place; hedged calls get their own
+            messages = [dict(m) for m in messages]
+        # Keep the flow and event context, so events are attributed to this turn
+        context = contextvars.copy_context()
+        future = self._pool.submit(
+            context.run, self._call_provider, name, messages, kwargs
+        )
+        future.provider = name
+        future.hedged = hedged
+        return future
+
+    def call(
+        self,
+        messages,
+        tools=None,
+        callbacks=None,
+        available_functions=None,
+        from_task=None,
+        from_agent=None,
+        response_model=None,
+    ) -> str | Any:
+        kwargs = {
+            "tools": tools,
+            "callbacks": callbacks,
+            "available_functions": available_functions,
+            "from_task": from_task,
+            "from_agent": from_agent,
+            "response_model": response_model,
+        }
+        candidates = self.ranked()
+        # A call with tools may run them (available_functions) before it
+        # returns; a hedge would run them twice, so those calls only fail over
+        if (
+            self.hedge
+            and not self.stream
+            and not tools
+            and not available_functions
+            and len(candidates) > 1
+        ):
+            return self._hedged_call(candidates, messages, kwargs)
+
+        error = None
+        for name in candidates:
+            try:
+                return self._call_provider(name, messages, kwargs)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                error = e
+                router_stats.incr("failovers")
+        raise error
+
+    def _hedged_call(self, candidates: List[str], messages, kwargs) -> Any:
+        remaining = list(candidates)
+        # At most two calls are in flight: the current one and its hedge
+        running = {self._submit(remaining.pop(0), messages, kwargs)}
+        error = None
+        while running:
+            timeout = None
+            if remaining and len(running) == 1:
+                timeout = self._hedge_delay(next(iter(running)).provider)
+            done, running = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                router_stats.incr("hedges")
+                running.add(
+                    self._submit(remaining.pop(0), messages, kwargs, hedged=True)
+                )
+                continue
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    if not is_retryable(e):
+                        raise
+                    error = e
+                    continue
+                if future.hedged:
+                    router_stats.incr("hedge_wins")
+                return result
+            if not running and remaining:
+                router_stats.incr("failovers")
+                running.add(self._submit(remaining.pop(0), messages, kwargs))
+        raise error
+
+    async def acall(self, *args, **kwargs) -> str | Any:
+        return await asyncio.to_thread(self.call, *args, **kwargs)
+
+    def supports_function_calling(self) -> bool:
+        return all(llm.supports_function_calling() for llm in self.providers.values())
+
+    def supports_stop_words(self) -> bool:
+        return all(llm.supports_stop_words() for llm in self.providers.values())
+
+    def get_context_window_size(self) -> int:
+        return min(llm.get_context_window_size() for llm in self.providers.values())
@@ -1,43 +1,92 @@
 import base64
 import json
 import os
-
-from crewai import LLM
-from google.genai import types
-from google.oauth2 import service_account
+from functools import lru_cache
 
 SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
-sa_base64 = os.getenv("GOOGLE_SERVICE_ACCOUNT_BASE64")
-
-with open("/tmp/vertex_credentials.json", "w") as f:
-    f.write(base64.b64decode(sa_base64).decode("utf-8"))
-
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = "/tmp/vertex_credentials.json"
-
-sa_json = base64.b64decode(sa_base64).decode("utf-8")
-sa_info = json.loads(sa_json)
-vertex_credentials = service_account.Credentials.from_service_account_info(
-    sa_info, scopes=SCOPES
-)
-
-if "GEMINI_API_KEY" in os.environ:
-    del os.environ["GEMINI_API_KEY"]
-
-llm = LLM(
-    model="gemini-2.5-flash-lite",
-    client_params={
-        "project": os.getenv("GOOGLE_CLOUD_PROJECT"),
-        "location": os.getenv("GOOGLE_CLOUD_LOCATION"),
-        "credentials": vertex_credentials,
-    },
-    thinking_config=types.ThinkingConfig(include_thoughts=False),
-)
-
-embedder_configuration = {
-    "provider": "google-vertex",
-    "config": {
-        "project_id": os.getenv("GOOGLE_CLOUD_PROJECT"),
-        "location": os.getenv("GOOGLE_CLOUD_LOCATION"),
-        "model_name": "gemini-embedding-001",  # or "text-embedding-005", "text-multilingual-embedding-002"
-    },
-}
+CREDENTIALS_PATH = "/tmp/vertex_credentials.json"
+
+
+@lru_cache(maxsize=1)
+def credentials():
+    """
+    Decode GOOGLE_SERVICE_ACCOUNT_BASE64 once per process.
+
+    The key is also written to CREDENTIALS_PATH for the embedder, which reads
+    GOOGLE_APPLICATION_CREDENTIALS; the file is only rewritten when it changed.
+    """
+    from google.oauth2 import service_account
+
+    sa_json = base64.b64decode(os.getenv("GOOGLE_SERVICE_ACCOUNT_BASE64")).decode(
+        "utf-8"
+    )
+    try:
+        with open(CREDENTIALS_PATH) as f:
+            current = f.read()
+    except OSError:
+        current = None
+    if current != sa_json:
+        fd = os.open(CREDENTIALS_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(sa_json)
+    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = CREDENTIALS_PATH
+
+    return service_account.Credentials.from_service_account_info(
+        json.loads(sa_json), scopes=SCOPES
+    )
+
+
+def build_llm():
+    from crewai import LLM
+    from google.genai import types
+
+    vertex_credentials = credentials()
+
+    if "GEMINI_API_KEY" in os.environ:
+        del os.environ["GEMINI_API_KEY"]
+
+    return LLM(
+        model="gemini-2.5-flash-lite",
+        client_params={
+            "project": os.getenv("GOOGLE_CLOUD_PROJECT"),
+            "location": os.getenv("GOOGLE_CLOUD_LOCATION"),
+            "credentials": vertex_credentials,
+        },
+        thinking_config=types.ThinkingConfig(include_thoughts=False),
+    )
+
+
+def build_classifier_llm(temperature, max_tokens, response_format):
+    from crewai import LLM
+    from google.genai import types
+
+    vertex_credentials = credentials()
+
+    if "GEMINI_API_KEY" in os.environ:
+        del os.environ["GEMINI_API_KEY"]
+
+    return LLM(
+        model="gemini-2.5-flash-lite",
+        client_params={
+            "project": os.getenv("GOOGLE_CLOUD_PROJECT"),
+            "location": os.getenv("GOOGLE_CLOUD_LOCATION"),
+            "credentials": vertex_credentials,
+        },
+        temperature=temperature,
+        max_output_tokens=max_tokens,
+        response_format=response_format,
+        # Thinking tokens would count against the small output budget
+        thinking_config=types.ThinkingConfig(include_thoughts=False, thinking_budget=0),
+    )
+
+
+def build_embedder_configuration() -> dict:
+    credentials()
+    return {
+        "provider": "google-vertex",
+        "config": {
+            "project_id": os.getenv("GOOGLE_CLOUD_PROJECT"),
+            "location": os.getenv("GOOGLE_CLOUD_LOCATION"),
+            "model_name": "gemini-embedding-001",  # or "text-embedding-005", "text-multilingual-embedding-002"
+        },
+    }
@@ -0,0 +1,293 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from crewai.flow.persistence.base import FlowPersistence
+from crewai.utilities.paths import db_storage_path
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
+
+from conversational_routing.instrumentation import instrumentation
+from conversational_routing.stats import Counters
+
+logger = logging.getLogger(__name__)
+
+
+class TurnPersistence(FlowPersistence):
+    """
+    @persist backend that writes a conversation once per completed turn.
+
+    `save_state` is a no-op for every method except the ones in `commit_methods`
+    (by default `send_response`, the last step of a ChatFlow turn). On commit the
+    conversation row keeps the small, per-turn part of the state, while history
+    entries go to an append-only log keyed by conversation id: only entries that
+    are not stored yet are inserted, so a turn costs two rows instead of a full
+    copy of the history. When the stored entries from the state's offset on
+    differ from its history (a client resynced the thread), those rows are
+    rewritten and any stored past the new end are deleted.
+
+    `offset_field` is the absolute log position of the first entry still in
+    the state's history (memory folding drops entries from the front); the log
+    keeps everything, `load_state` returns only the live tail.
+
+    Commits run on one writer thread against a WAL database. Turns that finish
+    while a commit is in flight are written together in the next transaction,
+    and `save_state` returns once its turn is durable.
+
+    Conversations not written for `ttl_seconds` (0 keeps them forever) are
+    deleted with their history by the writer, at most once per
+    `purge_interval`; clients that come back later resync their thread.
+    """
+
+    persistence_type: str = Field(default="TurnPersistence")
+    db_path: str = Field(
+        default_factory=lambda: str(Path(db_storage_path()) / "chat_flow_turns.db")
+    )
+    commit_methods: Tuple[str, ...] = ("send_response",)
+    history_field: str = "conversation_history"
+    offset_field: str = "history_offset"
+    max_batch: int = 64
+    ttl_seconds: float = 7 * 86400
+    purge_interval: float = 300
+
+    _queue: queue.Queue = PrivateAttr(default_factory=queue.Queue)
+    _writer: Optional[threading.Thread] = PrivateAttr(default=None)
+    _writer_lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _local: threading.local = PrivateAttr(default_factory=threading.local)
+    _stats: Counters = PrivateAttr(default_factory=lambda: Counters("flow_persistence"))
+    _last_purge: float = PrivateAttr(default=0.0)
+
+    def __init__(self, db_path: Optional[str] = None, /, **kwargs: Any) -> None:
+        if db_path is not None:
+            kwargs["db_path"] = db_path
+        super().__init__(**kwargs)
+
+    @model_validator(mode="after")
+    def _setup(self) -> "TurnPersistence":
+        self.init_db()
+        return self
+
+    @classmethod
+    def from_env(cls) -> "TurnPersistence":
+        kwargs = {"ttl_seconds": float(os.getenv("FLOW_PERSISTENCE_TTL", "604800"))}
+        db_path = os.getenv("FLOW_PERSISTENCE_DB")
+        return cls(db_path, **kwargs) if db_path else cls(**kwargs)
+
+    @property
+    def stats(self) -> Counters:
+        return self._stats
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL only fsyncs on checkpoint; a committed turn survives a
+        # process crash, and at worst the last turns are lost on power failure
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def init_db(self) -> None:
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS conversations (
+                    flow_uuid TEXT PRIMARY KEY,
+                    updated_at TEXT NOT NULL,
+                    state_json TEXT NOT NULL,
+                    history_offset INTEGER NOT NULL,
+                    history_length INTEGER NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS history (
+                    flow_uuid TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    entry_json TEXT NOT NULL,
+                    PRIMARY KEY (flow_uuid, seq)
+                ) WITHOUT ROWID
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS conversations_updated_at "
+                "ON conversations (updated_at)"
+            )
+
+    def save_state(
+        self,
+        flow_uuid: str,
+        method_name: str,
+        state_data: Dict[str, Any] | BaseModel,
+    ) -> None:
+        if method_name not in self.commit_methods:
+            self._stats.incr("skipped_saves")
+            return
+
+        state = (
+            state_data.model_dump()
+            if isinstance(state_data, BaseModel)
+            else dict(state_data)
+        )
+        done = threading.Event()
+        turn = {"flow_uuid": flow_uuid, "state": state, "done": done, "error": None}
+        with instrumentation.span("persistence", "save_state"):
+            self._ensure_writer()
+            self._queue.put(turn)
+            done.wait()
+            if turn["error"] is not None:
+                raise turn["error"]
+
+    def load_state(self, flow_uuid: str) -> Optional[Dict[str, Any]]:
+        with instrumentation.span("persistence", "load_state"):
+            return self._load_state(flow_uuid)
+
+    def _load_state(self, flow_uuid: str) -> Optional[Dict[str, Any]]:
+        conn = self._reader()
+        row = conn.execute(
+            "SELECT state_json, history_offset, history_length "
+            "FROM conversations WHERE flow_uuid = ?",
+            (flow_uuid,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        state_json, offset, length = row
+        state = json.loads(state_json)
+        entries = conn.execute(
+            "SELECT entry_json FROM history "
+            "WHERE flow_uuid = ? AND seq >= ? AND seq < ? ORDER BY seq",
+            (flow_uuid, offset, offset + length),
+        ).fetchall()
+        state[self.history_field] = [json.loads(entry) for (entry,) in entries]
+        state[self.offset_field] = offset
+        return state
+
+    def _ensure_writer(self):
+        if self._writer is not None and self._writer.is_alive():
+            return
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(
+                    target=self._write_loop, name="turn-persistence", daemon=True
+                )
+                self._writer.start()
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                with conn:
+                    for turn in batch:
+                        self._write_turn(conn, turn["flow_uuid"], turn["state"])
+                self._stats.incr("commits")
+                self._stats.incr("turns", len(batch))
+            except Exception as e:
+                for turn in batch:
+                    turn["error"] = e
+            for turn in batch:
+                turn["done"].set()
+
+            now = time.time()
+            if self.ttl_seconds and now - self._last_purge > self.purge_interval:
+                self._last_purge = now
+                try:
+                    self.purge(conn)
+                except sqlite3.Error as e:
+                    logger.warning(f"Could not purge expired conversations: {e}")
+
+    def purge(self, conn: Optional[sqlite3.Connection] = None) -> int:
+        """Delete conversations not written for `ttl_seconds`; returns how many."""
+        cutoff = (
+            datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+        ).isoformat()
+        conn = conn or self._connect()
+        with conn:
+            conn.execute(
+                "DELETE FROM history WHERE flow_uuid IN ("
+                "SELECT flow_uuid FROM conversations WHERE updated_at < ?)",
+                (cutoff,),
+            )
+            removed = conn.execute(
+                "DELETE FROM conversations WHERE updated_at < ?", (cutoff,)
+            ).rowcount
+        self._stats.incr("expired_conversations", removed)
+        return removed
+
+    def _write_turn(self, conn: sqlite3.Connection, flow_uuid: str, state: dict):
+        history: List[dict] = state.pop(self.history_field, None) or []
+        offset = int(state.pop(self.offset_field, 0) or 0)
+
+        # Normally only the new entries differ; after a resync the live window
+        # can differ anywhere, and must not be mixed with the old conversation
+        stored = dict(
+            conn.execute(
+                "SELECT seq, entry_json FROM history WHERE flow_uuid = ? AND seq >= ?",
+                (flow_uuid, offset),
+            ).fetchall()
+        )
+        end = offset + len(history)
+        new_rows = [
+            (flow_uuid, offset + i, entry_json)
+            for i, entry_json in enumerate(json.dumps(entry) for entry in history)
+            if stored.get(offset + i) != entry_json
+        ]
+        conn.executemany(
+            """
+            INSERT INTO history (flow_uuid, seq, entry_json) VALUES (?, ?, ?)
+            ON CONFLICT(flow_uuid, seq) DO UPDATE SET entry_json = excluded.entry_json
+            """,
+            new_rows,
+        )
+        if any(seq >= end for seq in stored):
+            conn.execute(
+                "DELETE FROM history WHERE flow_uuid = ? AND seq >= ?",
+                (flow_uuid, end),
+            )
+        if any(row[1] in stored for row in new_rows):
+            self._stats.incr("history_rewrites")
+
+        state_json = json.dumps(state)
+        conn.execute(
+            """
+            INSERT INTO conversations (
+                flow_uuid, updated_at, state_json, history_offset, history_length
+            ) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(flow_uuid) DO UPDATE SET
+                updated_at = excluded.updated_at,
+                state_json = excluded.state_json,
+                history_offset = excluded.history_offset,
+                history_length = excluded.history_length
+            """,
+            (
+                flow_uuid,
+                datetime.now(timezone.utc).isoformat(),
+                state_json,
+                offset,
+                len(history),
+            ),
+        )
+        self._stats.incr("history_rows", len(new_rows))
+        self._stats.incr(
+            "bytes_written",
+            len(state_json) + sum(len(row[2]) for row in new_rows),
+        )
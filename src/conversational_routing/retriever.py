@@ -0,0 +1,128 @@
+import logging
+import os
+from functools import lru_cache
+from typing import Callable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from conversational_routing.instrumentation import instrumentation
+from conversational_routing.knowledge_index import (
+    KnowledgeIndex,
+    configured_embedder_name,
+    load_index,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievedChunk(NamedTuple):
+    text: str
+    source: str
+    score: float
+
+
+class VectorRetriever:
+    """
+    Exact top-k search over a small corpus held in one contiguous matrix.
+
+    Rows of `embeddings` must be L2-normalized, so a single matrix-vector product
+    gives cosine scores; argpartition picks the top k without a full sort.
+    """
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        chunks: Sequence[str],
+        sources: Optional[Sequence[str]] = None,
+        embed: Optional[Callable[[List[str]], np.ndarray]] = None,
+        results_limit: int = 5,
+        score_threshold: float = 0.0,
+    ):
+        # A C-contiguous memmap is used as-is, keeping the pages shared
+        self.matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+        self.chunks = list(chunks)
+        self.sources = list(sources) if sources is not None else [""] * len(chunks)
+        self.embed = embed
+        self.results_limit = results_limit
+        self.score_threshold = score_threshold
+
+    @classmethod
+    def from_index(cls, index: KnowledgeIndex, **kwargs) -> "VectorRetriever":
+        return cls(index.embeddings, index.chunks, index.sources, **kwargs)
+
+    def search(
+        self, query: np.ndarray, k: Optional[int] = None
+    ) -> List[RetrievedChunk]:
+        """Top-k chunks for one normalized query vector."""
+        return self.search_batch(query[np.newaxis, :], k)[0]
+
+    def search_batch(
+        self, queries: np.ndarray, k: Optional[int] = None
+    ) -> List[List[RetrievedChunk]]:
+        """Top-k chunks for each row of a (m, d) matrix of normalized queries."""
+        k = min(k or self.results_limit, len(self.chunks))
+        if k == 0:
+            return [[] for _ in range(len(queries))]
+
+        scores = np.asarray(queries, dtype=np.float32) @ self.matrix.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+        results = []
+        for row, candidates in zip(scores, top):
+            ranked = candidates[np.argsort(-row[candidates])]
+            results.append(
+                [
+                    RetrievedChunk(self.chunks[i], self.sources[i], float(row[i]))
+                    for i in ranked
+                    if row[i] >= self.score_threshold
+                ]
+            )
+        return results
+
+    def query(
+        self, texts: List[str], k: Optional[int] = None
+    ) -> List[List[RetrievedChunk]]:
+        """Embed the texts in one provider call and search them as a batch."""
+        if self.embed is None:
+            raise ValueError("VectorRetriever needs an embed function to query text")
+        with instrumentation.span("knowledge", "index search", queries=len(texts)):
+            queries = self.embed(texts)
+            if queries.shape[-1] != self.matrix.shape[1]:
+                raise ValueError(
+                    f"Query embeddings have {queries.shape[-1]} dimensions, the "
+                    f"index has {self.matrix.shape[1]}; re-run `ingest`"
+                )
+            return self.search_batch(queries, k)
+
+
+def format_passages(results: Sequence[RetrievedChunk]) -> str:
+    """Passages as the agent sees them, each headed by its source and score."""
+    return "\n\n".join(
+        f"[{result.source}, score {result.score:.2f}]\n{result.text}"
+        for result in results
+    )
+
+
+@lru_cache(maxsize=1)
+def get_retriever() -> VectorRetriever:
+    """
+    Retriever over the ingested index, built once per process.
+
+    Raises ValueError if the index was built with another embedder, and warns
+    if the knowledge directory changed since it was built.
+    """
+    from conversational_routing.embeddings import embed
+
+    index = load_index()
+    index.check_embedder(configured_embedder_name())
+    if index.is_stale():
+        logger.warning(
+            f"Knowledge index {index.path} is older than the knowledge directory; "
+            "re-run `ingest`"
+        )
+    return VectorRetriever.from_index(
+        index,
+        embed=embed,
+        results_limit=int(os.getenv("KNOWLEDGE_RESULTS_LIMIT", "5")),
+        score_threshold=float(os.getenv("KNOWLEDGE_SCORE_THRESHOLD", "0.7")),
+    )
@@ -0,0 +1,371 @@
+import argparse
+import asyncio
+import contextvars
+import itertools
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Optional
+
+from aiohttp import ClientSession, ClientTimeout, web
+
+logger = logging.getLogger(__name__)
+
+# Kickoff the current flow execution belongs to; it follows the run into
+# asyncio.to_thread workers and CrewAI's event handler threads
+_current_job: contextvars.ContextVar[Optional["Job"]] = contextvars.ContextVar(
+    "_current_job", default=None
+)
+
+
+@lru_cache(maxsize=1)
+def flow_inputs() -> list:
+    """Inputs ChatFlow accepts: the flow id and every ChatState field."""
+    from conversational_routing.main import ChatState
+
+    return ["id", *ChatState.model_fields]
+
+
+def _event_classes() -> Dict[str, type]:
+    """Map CrewAI event type names ("flow_finished", ...) to their event classes."""
+    import crewai.events.event_types  # noqa: F401 - registers every event class
+    from crewai.events.base_events import BaseEvent
+
+    classes, pending = {}, [BaseEvent]
+    while pending:
+        cls = pending.pop()
+        pending.extend(cls.__subclasses__())
+        field = getattr(cls, "model_fields", {}).get("type")
+        if field is not None and isinstance(field.default, str):
+            classes.setdefault(field.default, cls)
+    return classes
+
+
+class Job:
+    """One /kickoff request: its state, result and webhook subscription."""
+
+    def __init__(self, kickoff_id: str, inputs: dict, webhooks: Optional[dict]):
+        self.kickoff_id = kickoff_id
+        self.inputs = inputs
+        self.webhooks = webhooks or {}
+        self.webhook_events = set(self.webhooks.get("events", []))
+        self.state = "PENDING"
+        self.result: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.outbox: Optional[asyncio.Queue] = None
+        # Per-kickoff event sequence; with execution_id it lets receivers drop
+        # events redelivered by a webhook retry
+        self._seq = itertools.count(1)
+
+    def status(self) -> dict:
+        status = {"state": self.state, "kickoff_id": self.kickoff_id}
+        if self.result is not None:
+            status["result"] = self.result
+        if self.error is not None:
+            status["error"] = self.error
+        return status
+
+    def publish(self, event_type: str, data: dict):
+        """Queue a webhook event; safe to call from any thread."""
+        if self.outbox is None or event_type not in self.webhook_events:
+            return
+        event = {
+            "type": event_type,
+            "execution_id": self.kickoff_id,
+            "seq": next(self._seq),
+            "data": data,
+        }
+        self.loop.call_soon_threadsafe(self.outbox.put_nowait, event)
+
+
+class ChatServer:
+    """
+    Self-hosted stand-in for a CrewAI deployment of ChatFlow.
+
+    Exposes the same POST /kickoff, GET /status/{kickoff_id} and webhook
+    contract the demos use. Up to `concurrency` flows run at once through
+    `kickoff_async`; their blocking steps share a pool of `workers` threads.
+    Kickoffs beyond `max_pending` are refused with 503 instead of queueing
+    without bound.
+
+    The worker warms up (see warmup.py) as soon as it starts; GET /ready
+    answers 503 until that has finished, so load balancers only route to warm
+    workers. Kickoffs that arrive earlier are still accepted.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 16,
+        workers: int = 32,
+        max_pending: int = 1000,
+        result_ttl_seconds: float = 3600,
+        bearer_token: Optional[str] = None,
+        webhook_timeout_seconds: float = 10,
+        webhook_retries: int = 3,
+    ):
+        self.concurrency = concurrency
+        self.workers = workers
+        self.max_pending = max_pending
+        self.result_ttl_seconds = result_ttl_seconds
+        self.bearer_token = bearer_token
+        self.webhook_timeout_seconds = webhook_timeout_seconds
+        self.webhook_retries = webhook_retries
+
+        self.jobs: Dict[str, Job] = {}
+        self._active = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._http: Optional[ClientSession] = None
+        self._event_classes: Optional[Dict[str, type]] = None
+        self._subscribed_events: set = set()
+
+    @classmethod
+    def from_env(cls) -> "ChatServer":
+        return cls(
+            concurrency=int(os.getenv("CHAT_SERVER_CONCURRENCY", "16")),
+            workers=int(os.getenv("CHAT_SERVER_WORKERS", "32")),
+            max_pending=int(os.getenv("CHAT_SERVER_MAX_PENDING", "1000")),
+            result_ttl_seconds=float(
+                os.getenv("CHAT_SERVER_RESULT_TTL_SECONDS", "3600")
+            ),
+            bearer_token=os.getenv("CHAT_SERVER_BEARER_TOKEN"),
+            webhook_timeout_seconds=float(
+                os.getenv("CHAT_SERVER_WEBHOOK_TIMEOUT_SECONDS", "10")
+            ),
+            webhook_retries=int(os.getenv("CHAT_SERVER_WEBHOOK_RETRIES", "3")),
+        )
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self._authenticate])
+        app.router.add_post("/kickoff", self.kickoff)
+        app.router.add_get("/status/{kickoff_id}", self.status)
+        app.router.add_get("/inputs", self.inputs)
+        app.router.add_get("/metrics", self.metrics)
+        app.router.add_get("/ready", self.ready)
+        app.cleanup_ctx.append(self._lifecycle)
+        return app
+
+    async def _lifecycle(self, app):
+        loop = asyncio.get_running_loop()
+        # Sync flow steps run through asyncio.to_thread, i.e. this executor
+        executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="chatflow"
+        )
+        loop.set_default_executor(executor)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._http = ClientSession(
+            timeout=ClientTimeout(total=self.webhook_timeout_seconds)
+        )
+        from conversational_routing.warmup import warmup
+
+        warmup.start()
+        yield
+        await self._http.close()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    @web.middleware
+    async def _authenticate(self, request, handler):
+        if (
+            self.bearer_token
+            and request.path != "/ready"
+            and request.headers.get("Authorization") != f"Bearer {self.bearer_token}"
+        ):
+            return web.json_response({"error": "Unauthorized"}, status=401)
+        return await handler(request)
+
+    async def inputs(self, request):
+        # Reported like a CrewAI deployment; the first call imports the flow
+        return web.json_response({"inputs": await asyncio.to_thread(flow_inputs)})
+
+    async def ready(self, request):
+        from conversational_routing.warmup import warmup
+
+        status = warmup.status()
+        return web.json_response(status, status=200 if status["ready"] else 503)
+
+    async def metrics(self, request):
+        from conversational_routing.instrumentation import instrumentation
+
+        text = instrumentation.render_metrics()
+        text += (
+            "# HELP chatflow_server_pending_kickoffs Kickoffs queued or running.\n"
+            "# TYPE chatflow_server_pending_kickoffs gauge\n"
+            f"chatflow_server_pending_kickoffs {self._active}\n"
+        )
+        return web.Response(text=text, content_type="text/plain")
+
+    async def kickoff(self, request):
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            return web.json_response({"error": "Body must be JSON"}, status=400)
+        if not isinstance(body, dict):
+            return web.json_response(
+                {"error": "Body must be a JSON object"}, status=400
+            )
+        inputs = body.get("inputs")
+        if not isinstance(inputs, dict) or not inputs.get("current_message"):
+            return web.json_response(
+                {"error": "inputs.current_message is required"}, status=400
+            )
+        if self._active >= self.max_pending:
+            return web.json_response(
+                {"error": "Too many kickoffs in progress, retry later"}, status=503
+            )
+
+        self._expire_jobs()
+        job = Job(str(uuid.uuid4()), inputs, body.get("webhooks"))
+        self.jobs[job.kickoff_id] = job
+        self._subscribe(job.webhook_events)
+
+        self._active += 1
+        asyncio.create_task(self._run(job))
+        return web.json_response({"kickoff_id": job.kickoff_id})
+
+    async def status(self, request):
+        job = self.jobs.get(request.match_info["kickoff_id"])
+        if job is None:
+            return web.json_response({"error": "Unknown kickoff_id"}, status=404)
+        return web.json_response(job.status())
+
+    async def _run(self, job: Job):
+        from conversational_routing.main import ChatFlow
+
+        sender = None
+        if job.webhooks.get("url"):
+            job.loop = asyncio.get_running_loop()
+            job.outbox = asyncio.Queue()
+            sender = asyncio.create_task(self._deliver(job))
+
+        _current_job.set(job)
+        try:
+            async with self._semaphore:
+                job.state = "RUNNING"
+                result = await ChatFlow().kickoff_async(inputs=job.inputs)
+            job.result = result if isinstance(result, str) else json.dumps(result)
+            job.state = "SUCCESS"
+            # Sent from here rather than from the event bus, so it is always the
+            # last event and carries exactly what /status returns
+            job.publish("flow_finished", {"result": job.result})
+        except Exception as e:
+            logger.exception(f"Kickoff {job.kickoff_id} failed")
+            job.error = str(e)
+            job.state = "FAILURE"
+            job.publish("flow_failed", {"error": job.error})
+        finally:
+            job.finished_at = time.time()
+            self._active -= 1
+            if sender is not None:
+                # Same path as publish(), so the end marker queues after every event
+                job.loop.call_soon_threadsafe(job.outbox.put_nowait, None)
+                await sender
+
+    async def _deliver(self, job: Job):
+        """Post a job's events to its webhook URL, in order."""
+        realtime = job.webhooks.get("realtime", False)
+        pending = []
+        done = False
+        while not done:
+            event = await job.outbox.get()
+            if event is None:
+                done = True
+            else:
+                pending.append(event)
+            # Whatever queued up while the last POST was in flight goes in one batch
+            while not done and not job.outbox.empty():
+                event = job.outbox.get_nowait()
+                if event is None:
+                    done = True
+                else:
+                    pending.append(event)
+            if pending and (realtime or done):
+                await self._post_events(job, pending)
+                pending = []
+
+    async def _post_events(self, job: Job, events: list):
+        headers = {}
+        authentication = job.webhooks.get("authentication") or {}
+        if authentication.get("strategy") == "bearer":
+            headers["Authorization"] = f"Bearer {authentication.get('token')}"
+        body = json.dumps({"events": events}, default=str)
+        headers["Content-Type"] = "application/json"
+
+        for attempt in range(self.webhook_retries):
+            try:
+                async with self._http.post(
+                    job.webhooks["url"], data=body, headers=headers
+                ) as response:
+                    if response.status < 500:
+                        return
+            except Exception as e:
+                logger.debug(f"Webhook delivery for {job.kickoff_id} failed: {e}")
+            await asyncio.sleep(0.5 * 2**attempt)
+        logger.error(f"Dropped {len(events)} webhook events for {job.kickoff_id}")
+
+    def _subscribe(self, event_types):
+        """Register one event bus handler per event type any webhook asked for."""
+        from crewai.events.event_bus import crewai_event_bus
+
+        if self._event_classes is None:
+            self._event_classes = _event_classes()
+        for event_type in event_types:
+            if event_type in self._subscribed_events or event_type in (
+                "flow_finished",
+                "flow_failed",
+            ):
+                continue
+            event_class = self._event_classes.get(event_type)
+            if event_class is None:
+                continue
+            crewai_event_bus.register_handler(event_class, _forward_event)
+            self._subscribed_events.add(event_type)
+
+    def _expire_jobs(self):
+        cutoff = time.time() - self.result_ttl_seconds
+        expired = [
+            kickoff_id
+            for kickoff_id, job in self.jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for kickoff_id in expired:
+            del self.jobs[kickoff_id]
+
+
+def _forward_event(source, event):
+    job = _current_job.get()
+    if job is None:
+        return
+    try:
+        data = event.to_json()
+    except Exception:
+        data = {}
+    job.publish(event.type, data)
+
+
+def serve():
+    parser = argparse.ArgumentParser(
+        description="Serve ChatFlow behind a CrewAI-compatible /kickoff and /status API."
+    )
+    parser.add_argument("--host", default=os.getenv("CHAT_SERVER_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--concurrency", type=int)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper())
+    server = ChatServer.from_env()
+    if args.concurrency:
+        server.concurrency = args.concurrency
+    if args.workers:
+        server.workers = args.workers
+    web.run_app(server.app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    serve()
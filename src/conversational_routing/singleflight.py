@@ -0,0 +1,107 @@
+import contextvars
+import hashlib
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from conversational_routing.cache import normalize_message
+from conversational_routing.stats import Counters
+
+# LLM calls made by the execution running in this context, so a shared result
+# can report how many calls its waiters did not have to make
+_llm_calls: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar(
+    "_llm_calls", default=None
+)
+_hook_lock = threading.Lock()
+_hook_registered = False
+
+
+def _count_llm_call(context) -> None:
+    calls = _llm_calls.get()
+    if calls is not None:
+        calls[0] += 1
+    # None lets the call proceed; False would block it
+
+
+def _register_llm_hook() -> None:
+    global _hook_registered
+    with _hook_lock:
+        if _hook_registered:
+            return
+        from crewai.hooks import register_before_llm_call_hook
+
+        register_before_llm_call_hook(_count_llm_call)
+        _hook_registered = True
+
+
+def flight_key(kind: str, message: str, context: str = "") -> str:
+    """Key for `kind` work on a message; `context` is whatever else the prompt holds."""
+    payload = f"{kind}|{normalize_message(message)}|{context}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.llm_calls = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent executions of the same work.
+
+    The first caller for a key runs `fn`; callers that arrive with the same key
+    while it runs wait for it and get the same result, or the same exception.
+    Nothing is kept once the execution finishes; the answer cache covers
+    repeats that are not concurrent.
+
+    Agent LLM calls made by an execution are counted (through a CrewAI
+    before-LLM-call hook), so stats record the LLM calls the waiters saved.
+    """
+
+    def __init__(self, name: str = "single_flight"):
+        self.stats = Counters(name)
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+        _register_llm_hook()
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run `fn` once per concurrent `key`; return (result, shared)."""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            self.stats.incr("shared")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            self.stats.incr("llm_calls_saved", flight.llm_calls)
+            return flight.result, True
+
+        calls = [0]
+        token = _llm_calls.set(calls)
+        try:
+            flight.result = fn()
+            return flight.result, False
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            _llm_calls.reset(token)
+            flight.llm_calls = calls[0]
+            self.stats.incr("executions")
+            self.stats.incr("llm_calls", calls[0])
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def summary(self) -> dict:
+        """Counters plus executions currently in flight, for operators."""
+        stats = self.stats.snapshot()
+        with self._lock:
+            stats["in_flight"] = len(self._flights)
+        return stats
@@ -0,0 +1,126 @@
+"""
+Speculative knowledge retrieval, overlapped with LLM classification.
+
+Retrieval depends only on the user's message, not on the route, so it can
+start while the classifier is still deciding. If the turn turns out to be a
+benefits question, the passages are handed to the crew instead of searching
+after routing; otherwise they are thrown away. Only the prebuilt index (KNOWLEDGE_BACKEND=index) is searched
+this way.
+"""
+
+import contextvars
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Optional
+
+from conversational_routing.stats import Counters
+
+
+class Prefetch:
+    __slots__ = ("future", "started", "finished", "settled")
+
+    def __init__(self):
+        self.future: Optional[Future] = None
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.settled = False
+
+
+class SpeculativeRetrieval:
+    """
+    Runs knowledge searches ahead of routing on a small thread pool.
+
+    `start(message)` returns a Prefetch, or None when there is no index to
+    search. Each Prefetch is settled exactly once: `passages(prefetch)` waits
+    at most `timeout_seconds` for it and returns the formatted passages ("" if
+    nothing matched), or None if the search timed out or failed so the caller
+    searches again; `discard(prefetch)` drops it.
+
+    Stats count started, used, discarded, failed and timed-out searches, plus
+    `retrieval_ms` (time the used searches took) and `waited_ms` (the part of
+    it turns still spent waiting); their difference is what was taken off the
+    critical path.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        timeout_seconds: float = 5,
+        name: str = "speculative_retrieval",
+    ):
+        self.timeout_seconds = timeout_seconds
+        self.stats = Counters(name)
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+
+    @classmethod
+    def from_env(cls) -> "SpeculativeRetrieval":
+        return cls(
+            max_workers=int(os.getenv("SPECULATIVE_RETRIEVAL_WORKERS", "4")),
+            timeout_seconds=float(
+                os.getenv("SPECULATIVE_RETRIEVAL_TIMEOUT_SECONDS", "5")
+            ),
+        )
+
+    def start(self, message: str) -> Optional[Prefetch]:
+        from conversational_routing.crews.assistant_crew.assistant_crew import (
+            knowledge_backend,
+        )
+
+        if knowledge_backend() != "index":
+            return None
+        from conversational_routing.retriever import get_retriever
+
+        def search():
+            try:
+                return get_retriever().query([message])[0]
+            finally:
+                prefetch.finished = time.perf_counter()
+
+        # The search's span joins the turn's trace
+        context = contextvars.copy_context()
+        prefetch = Prefetch()
+        prefetch.future = self._pool.submit(context.run, search)
+        self.stats.incr("started")
+        return prefetch
+
+    def passages(self, prefetch: Prefetch) -> Optional[str]:
+        from conversational_routing.retriever import format_passages
+
+        waiting = time.perf_counter()
+        try:
+            results = prefetch.future.result(timeout=self.timeout_seconds)
+        except FutureTimeoutError:
+            self._settle(prefetch, "timeouts")
+            return None
+        except Exception:
+            self._settle(prefetch, "failed")
+            return None
+        self._settle(prefetch, "used")
+        finished = prefetch.finished or time.perf_counter()
+        self.stats.incr("retrieval_ms", (finished - prefetch.started) * 1000)
+        self.stats.incr("waited_ms", max(0.0, finished - waiting) * 1000)
+        return format_passages(results) if results else ""
+
+    def discard(self, prefetch: Optional[Prefetch]):
+        """Drop a prefetch the turn did not use; settled ones are left alone."""
+        if prefetch is None or prefetch.settled:
+            return
+        prefetch.future.cancel()
+        self._settle(prefetch, "discarded")
+
+    def _settle(self, prefetch: Prefetch, outcome: str):
+        prefetch.settled = True
+        self.stats.incr(outcome)
+
+    def summary(self) -> dict:
+        """Counters plus the retrieval time taken off the critical path."""
+        stats = self.stats.snapshot()
+        used = stats.get("used", 0)
+        saved = stats.get("retrieval_ms", 0) - stats.get("waited_ms", 0)
+        stats["saved_ms"] = saved
+        stats["mean_saved_ms"] = saved / used if used else 0.0
+        return stats
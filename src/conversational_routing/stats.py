@@ -0,0 +1,47 @@
+import threading
+from collections import defaultdict
+from typing import Dict
+
+# Every Counters instance registers itself here under its name so operators can
+# dump all of them at once (see snapshot_all)
+_registry: Dict[str, "Counters"] = {}
+_registry_lock = threading.Lock()
+
+
+class Counters:
+    """Thread-safe named counters shared by the routing components."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._values = defaultdict(float)
+        with _registry_lock:
+            _registry[name] = self
+
+    def incr(self, key: str, value: float = 1) -> None:
+        with self._lock:
+            self._values[key] += value
+
+    def get(self, key: str) -> float:
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def ratio(self, key: str, total_keys) -> float:
+        with self._lock:
+            total = sum(self._values.get(k, 0) for k in total_keys)
+            return self._values.get(key, 0) / total if total else 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+def snapshot_all() -> dict:
+    """Return the current values of every registered Counters instance."""
+    with _registry_lock:
+        counters = list(_registry.values())
+    return {c.name: c.snapshot() for c in counters}
@@ -0,0 +1,33 @@
+import json
+from typing import Iterator
+
+from crewai.types.streaming import StreamChunkType
+
+# Agents whose tokens are the user-facing answer; the classifier and the
+# summarizer never stream, and tool-call chunks are not shown either
+ANSWER_AGENT_ROLES = {"Chase Freedom Card Assistant", "Chase Freedom Benefits Expert"}
+
+
+def is_answer_chunk(agent_role: str, chunk_type=StreamChunkType.TEXT) -> bool:
+    return chunk_type == StreamChunkType.TEXT and (
+        (agent_role or "").strip() in ANSWER_AGENT_ROLES
+    )
+
+
+def stream_chat(inputs: dict) -> Iterator[dict]:
+    """
+    Run ChatFlow in-process and yield answer tokens as the LLM produces them.
+
+    Yields {"delta": text} for every answer chunk, then one final event with
+    "done": True and the fields `send_response` returns (id, response, ...).
+    The final response is authoritative: clients should replace the streamed
+    text with it, since cached answers and non-LLM replies are not streamed.
+    """
+    from conversational_routing.main import ChatFlow
+
+    streaming = ChatFlow(stream=True).kickoff(inputs=inputs)
+    for chunk in streaming:
+        if chunk.content and is_answer_chunk(chunk.agent_role, chunk.chunk_type):
+            yield {"delta": chunk.content}
+
+    yield {"done": True, **json.loads(streaming.result)}
@@ -0,0 +1,153 @@
+"""
+Once-per-worker warm-up, so the first real turn doesn't pay for setup.
+
+Steps run in order on a background thread:
+
+- models: build the LLMs (answers, classification) and the embedder (provider
+  SDKs and clients)
+- agents: build the benefits crew template
+- knowledge: load the index and run one search, which also opens the
+  embedding provider's connection
+- persistence: open the flow database
+- classification: classify a synthetic message with the LLM, which opens the
+  LLM provider's connection
+
+If a step fails, the error is logged and warm-up retries it after
+`retry_seconds`; steps that succeeded are not run again. `ready()` is only true
+once every step has succeeded, which is what readiness checks should report.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _models():
+    from conversational_routing.embeddings import get_embedder
+    from conversational_routing.models import (
+        get_batch_classifier_llm,
+        get_classifier_llm,
+        get_llm,
+        get_response_llm,
+    )
+
+    get_llm()
+    get_response_llm()
+    get_classifier_llm()
+    if os.getenv("CLASSIFICATION_BATCHING", "false").lower() == "true":
+        get_batch_classifier_llm()
+    get_embedder()
+
+
+def _agents():
+    from conversational_routing.main import assistant_crew
+
+    assistant_crew()
+
+
+def _knowledge():
+    from conversational_routing.crews.assistant_crew.assistant_crew import (
+        knowledge_backend,
+    )
+
+    if knowledge_backend() != "index":
+        # CrewAI's PDFKnowledgeSource is loaded by the crew template itself
+        return
+    from conversational_routing.retriever import get_retriever
+
+    get_retriever().query(["card benefits"])
+
+
+def _persistence():
+    from conversational_routing.main import flow_persistence
+
+    flow_persistence.load_state("warm-up")
+
+
+def _classification():
+    from conversational_routing.main import classify_with_llm
+
+    classify_with_llm("Hello", "")
+
+
+class WarmUp:
+    """Runs the warm-up steps once, in the background, and reports progress."""
+
+    def __init__(self, classify: bool = True, retry_seconds: float = 30):
+        self.retry_seconds = retry_seconds
+        self.steps: List[Tuple[str, Callable[[], None]]] = [
+            ("models", _models),
+            ("agents", _agents),
+            ("knowledge", _knowledge),
+            ("persistence", _persistence),
+        ]
+        if classify:
+            self.steps.append(("classification", _classification))
+        self.state = "pending"
+        self.error: Optional[str] = None
+        self.timings: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._done = threading.Event()
+
+    @classmethod
+    def from_env(cls) -> "WarmUp":
+        return cls(
+            classify=os.getenv("WARMUP_CLASSIFY", "true").lower() == "true",
+            retry_seconds=float(os.getenv("WARMUP_RETRY_SECONDS", "30")),
+        )
+
+    def start(self) -> "WarmUp":
+        """Start warming up in the background; later calls do nothing."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self.run, name="warm-up", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def run(self):
+        self.state = "running"
+        started = time.perf_counter()
+        for name, step in self.steps:
+            while name not in self.timings:
+                step_started = time.perf_counter()
+                try:
+                    step()
+                except Exception as e:
+                    logger.exception(f"Warm-up step {name} failed, retrying")
+                    self.state, self.error = "retrying", f"{name}: {e}"
+                    time.sleep(self.retry_seconds)
+                    self.state = "running"
+                    continue
+                self.timings[name] = round(
+                    (time.perf_counter() - step_started) * 1000, 2
+                )
+        self.timings["total"] = round((time.perf_counter() - started) * 1000, 2)
+        self.state, self.error = "ready", None
+        self._done.set()
+        logger.info(f"Warm-up finished in {self.timings['total']:.0f} ms")
+
+    def ready(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def status(self) -> dict:
+        status = {
+            "ready": self.ready(),
+            "state": self.state,
+            "steps_ms": dict(self.timings),
+        }
+        if self.error is not None:
+            status["error"] = self.error
+        return status
+
+
+warmup = WarmUp.from_env()